@@ -8,8 +8,11 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import requests
 import os
+import json
+import hashlib
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from PIL import Image, ImageTk
 import cv2
@@ -33,6 +36,12 @@ logger = logging.getLogger(__name__)
 # Configurações
 SERVER_URL = "http://localhost:5000"
 CHUNK_SIZE = 1024 * 1024  # 1MB chunks
+JOB_POLL_INTERVAL = 2  # Segundos entre consultas ao status do processamento
+CHUNKED_UPLOAD_THRESHOLD = 32 * 1024 * 1024  # Arquivos maiores são enviados em partes (retomável)
+UPLOAD_WORKERS = 4  # Partes enviadas em paralelo
+UPLOAD_RETRIES = 3  # Tentativas por parte antes de interromper o upload
+UPLOAD_STATE_FILE = Path('upload_state.json')  # Sessões de upload em andamento (para retomar)
+PREFLIGHT_UPLOADS = True  # Consulta o servidor pelo checksum antes de enviar o arquivo
 
 
 class VideoPlayerWindow:
@@ -248,6 +257,7 @@ class VideoProcessingClient:
         self.selected_file = None
         self.selected_filter = tk.StringVar(value="grayscale")
         self.video_history = []
+        self._checksums = {}
         
         # Criar interface
         self.create_widgets()
@@ -367,8 +377,7 @@ class VideoProcessingClient:
             filter_frame,
             textvariable=self.selected_filter,
             values=filters,
-            state='readonly',
-            width=15
+            width=25
         )
         filter_combo.pack(side=tk.LEFT, padx=10)
         
@@ -378,6 +387,7 @@ class VideoProcessingClient:
         
         # Atualizar descrição quando mudar filtro
         filter_combo.bind('<<ComboboxSelected>>', self.update_filter_description)
+        filter_combo.bind('<KeyRelease>', self.update_filter_description)
         
         # Frame de upload
         upload_action_frame = ttk.Frame(upload_frame)
@@ -629,8 +639,12 @@ class VideoProcessingClient:
             'negative': 'Invert all colors'
         }
         
-        filter_name = self.selected_filter.get()
-        description = descriptions.get(filter_name, '')
+        # Cadeias de filtros (ex.: "blur,pixelate") são aplicadas na ordem digitada
+        filter_names = [name.strip() for name in self.selected_filter.get().split(',') if name.strip()]
+        if len(filter_names) > 1:
+            description = 'Chain: ' + ' → '.join(filter_names)
+        else:
+            description = descriptions.get(filter_names[0] if filter_names else '', '')
         self.filter_description.config(text=description)
     
     def upload_video(self):
@@ -651,22 +665,50 @@ class VideoProcessingClient:
     def _upload_worker(self):
         """Worker thread para upload"""
         try:
-            # Preparar arquivo
-            with open(self.selected_file, 'rb') as f:
-                files = {'file': (os.path.basename(self.selected_file), f, 'video/mp4')}
-                data = {'filter': self.selected_filter.get()}
-                
-                # Fazer upload
+            filter_spec = self.selected_filter.get()
+            checksum = None
+            response = None
+            
+            if PREFLIGHT_UPLOADS:
+                # Conteúdo que o servidor já tem é processado sem reenviar o arquivo
+                self.root.after(0, lambda: self.upload_status.config(text="Checking...", foreground='blue'))
+                checksum = self._file_checksum(self.selected_file)
+                preflight = requests.post(f"{SERVER_URL}/api/upload/preflight", json={
+                    'checksum': checksum,
+                    'filter': filter_spec
+                }, timeout=30)
+                if preflight.status_code in (200, 202, 409):
+                    self.log("Content already on server, upload skipped")
+                    response = preflight
+            
+            if response is None and os.path.getsize(self.selected_file) > CHUNKED_UPLOAD_THRESHOLD:
+                # Arquivos grandes: partes paralelas, retomáveis após falhas
                 self.log(f"Uploading {os.path.basename(self.selected_file)}...")
-                
-                response = requests.post(
-                    f"{SERVER_URL}/api/upload",
-                    files=files,
-                    data=data,
-                    timeout=300  # 5 minutos timeout
-                )
+                response = self._chunked_upload(self.selected_file, filter_spec, checksum)
+            elif response is None:
+                # Preparar arquivo
+                self.log(f"Uploading {os.path.basename(self.selected_file)}...")
+                with open(self.selected_file, 'rb') as f:
+                    files = {'file': (os.path.basename(self.selected_file), f, 'video/mp4')}
+                    data = {'filter': filter_spec}
+                    
+                    # Fazer upload
+                    response = requests.post(
+                        f"{SERVER_URL}/api/upload",
+                        files=files,
+                        data=data,
+                        timeout=300  # 5 minutos timeout
+                    )
             
-            if response.status_code == 200:
+            if response.status_code == 202:
+                # O servidor enfileirou o processamento: acompanhar o job
+                self.root.after(0, lambda: self.upload_status.config(text="Queued...", foreground='blue'))
+                result = self._wait_for_job(response.json())
+                
+                # Atualizar UI no thread principal
+                self.root.after(0, self._upload_success, result)
+                
+            elif response.status_code == 200:
                 result = response.json()
                 
                 # Atualizar UI no thread principal
@@ -681,6 +723,131 @@ class VideoProcessingClient:
         except Exception as e:
             self.root.after(0, self._upload_error, str(e))
     
+    def _file_checksum(self, file_path):
+        """MD5 do arquivo local (memorizado por caminho, tamanho e data de modificação)"""
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime)
+        if key not in self._checksums:
+            started = time.time()
+            hash_md5 = hashlib.md5()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    hash_md5.update(chunk)
+            self._checksums[key] = hash_md5.hexdigest()
+            self.log(f"Checksum computed in {time.time() - started:.1f}s")
+        return self._checksums[key]
+    
+    def _chunked_upload(self, file_path, filter_spec, checksum=None):
+        """Envia o arquivo em partes paralelas pelo protocolo retomável do servidor
+        
+        O ID da sessão fica salvo em UPLOAD_STATE_FILE: se a conexão cair, o próximo upload do
+        mesmo arquivo consulta as partes já recebidas e envia apenas as que faltam.
+        Retorna a resposta da finalização (tratada como a do upload simples).
+        """
+        stat = os.stat(file_path)
+        state_key = f"{os.path.abspath(file_path)}|{stat.st_size}|{int(stat.st_mtime)}|{filter_spec}"
+        state = self._load_upload_state()
+        session = None
+        
+        # Retomar uma sessão anterior do mesmo arquivo, se o servidor ainda a tiver
+        if state.get(state_key):
+            response = requests.get(f"{SERVER_URL}/api/uploads/{state[state_key]}", timeout=10)
+            if response.status_code == 200:
+                session = response.json()
+                self.log(f"Resuming upload {session['upload_id']} "
+                         f"({len(session['missing_chunks'])}/{session['total_chunks']} chunks left)")
+        
+        if session is None:
+            response = requests.post(f"{SERVER_URL}/api/uploads", json={
+                'filename': os.path.basename(file_path),
+                'size': stat.st_size,
+                'filter': filter_spec,
+                'checksum': checksum
+            }, timeout=30)
+            if response.status_code != 201:
+                return response
+            session = response.json()
+            session['missing_chunks'] = list(range(session['total_chunks']))
+            state[state_key] = session['upload_id']
+            self._save_upload_state(state)
+        
+        upload_url = f"{SERVER_URL}/api/uploads/{session['upload_id']}"
+        chunk_size = session['chunk_size']
+        total_chunks = session['total_chunks']
+        sent = total_chunks - len(session['missing_chunks'])
+        
+        def send_chunk(index):
+            with open(file_path, 'rb') as f:
+                f.seek(index * chunk_size)
+                data = f.read(chunk_size)
+            
+            error = None
+            for attempt in range(UPLOAD_RETRIES):
+                try:
+                    response = requests.put(f"{upload_url}/chunks/{index}", data=data,
+                                            headers={'Content-Type': 'application/octet-stream'}, timeout=120)
+                    if response.status_code == 200:
+                        return index
+                    error = response.json().get('error', f"HTTP {response.status_code}")
+                except requests.exceptions.RequestException as e:
+                    error = str(e)
+                time.sleep(2 ** attempt)
+            raise RuntimeError(f"Chunk {index} failed after {UPLOAD_RETRIES} attempts: {error}")
+        
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as pool:
+            futures = [pool.submit(send_chunk, index) for index in session['missing_chunks']]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+                    sent += 1
+                    text = f"Uploading... {sent * 100 // total_chunks}% ({sent}/{total_chunks} chunks)"
+                    self.root.after(0, lambda t=text: self.upload_status.config(text=t, foreground='blue'))
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+        
+        response = requests.post(f"{upload_url}/complete", timeout=300)
+        
+        # Sessão encerrada no servidor (ou inexistente): não há mais o que retomar
+        if response.status_code in (200, 202, 404):
+            state.pop(state_key, None)
+            self._save_upload_state(state)
+        return response
+    
+    @staticmethod
+    def _load_upload_state():
+        """Lê as sessões de upload em andamento (arquivo -> ID da sessão)"""
+        try:
+            return json.loads(UPLOAD_STATE_FILE.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+    
+    @staticmethod
+    def _save_upload_state(state):
+        """Grava as sessões de upload em andamento"""
+        UPLOAD_STATE_FILE.write_text(json.dumps(state, indent=2), encoding='utf-8')
+    
+    def _wait_for_job(self, job):
+        """Consulta o status do job até o processamento terminar"""
+        status_url = job.get('status_url') or f"{SERVER_URL}/api/jobs/{job['job_id']}"
+        self.log(f"Processing queued as job {job['job_id']}")
+        
+        while True:
+            response = requests.get(status_url, timeout=10)
+            data = response.json()
+            status = data.get('status')
+            
+            if status == 'done':
+                return data
+            if status == 'failed' or response.status_code != 200:
+                error = data.get('job', {}).get('error') or data.get('error') or 'Processing failed'
+                raise RuntimeError(error)
+            
+            text = "Processing..." if status == 'running' else f"Queued (position {data.get('queue_position', '?')})..."
+            self.root.after(0, lambda t=text: self.upload_status.config(text=t, foreground='blue'))
+            time.sleep(JOB_POLL_INTERVAL)
+    
     def _upload_success(self, result):
         """Callback de sucesso do upload"""
         self.upload_progress.stop()
@@ -712,9 +879,13 @@ class VideoProcessingClient:
         
         # Perguntar se quer visualizar
         if messagebox.askyesno("View Video", "Do you want to view the processed video?"):
-            # Obter URLs dos vídeos
+            # Obter URLs dos vídeos (a versão do filtro escolhido, se o vídeo tiver várias)
             original_url = video_info.get('path_original', '')
             processed_url = video_info.get('path_processed', '')
+            selected = ','.join(name.strip() for name in self.selected_filter.get().split(',') if name.strip())
+            for rendition in video_info.get('renditions', []):
+                if rendition['filter'] == selected:
+                    processed_url = rendition['path']
             
             # Baixar vídeos temporariamente
             self.download_and_play(video_id, original_url, processed_url)
@@ -769,30 +940,34 @@ class VideoProcessingClient:
             self.log(f"Error loading history: {e}", level='error')
     
     def update_statistics(self):
-        """Atualiza estatísticas na aba de configurações"""
-        if not self.video_history:
+        """Atualiza estatísticas na aba de configurações (agregados do servidor, não só da página carregada)"""
+        try:
+            response = requests.get(f"{SERVER_URL}/api/stats", timeout=10)
+            response.raise_for_status()
+            stats = response.json()
+        except Exception as e:
+            self.log(f"Error loading statistics: {e}", level='error')
             return
         
-        total_videos = len(self.video_history)
-        total_size = sum(v.get('size_bytes', 0) for v in self.video_history) / (1024**3)  # GB
-        total_duration = sum(v.get('duration_sec', 0) for v in self.video_history) / 60  # minutos
-        
-        # Contar filtros
-        filter_counts = {}
-        for video in self.video_history:
-            filter_name = video.get('filter', 'unknown')
-            filter_counts[filter_name] = filter_counts.get(filter_name, 0) + 1
+        totals = stats['totals']
+        total_size = stats['storage']['total_bytes'] / (1024**3)  # GB
+        total_duration = totals['duration_sec'] / 60  # minutos
+        processing = totals['processing_time']
         
         stats_text = f"""📊 Video Processing Statistics:
 
-Total Videos: {total_videos}
+Total Videos: {totals['videos']}
 Total Size: {total_size:.2f} GB
-Total Duration: {total_duration:.1f} minutes
-
-Filters Used:"""
+Total Duration: {total_duration:.1f} minutes"""
+        
+        if processing['p50'] is not None:
+            stats_text += f"\nProcessing Time: p50 {processing['p50']:.1f}s, p95 {processing['p95']:.1f}s"
+        
+        stats_text += "\n\nFilters Used:"
         
-        for filter_name, count in filter_counts.items():
-            stats_text += f"\n  • {filter_name}: {count} videos"
+        for filter_name, entry in stats['filters'].items():
+            if entry['videos']:
+                stats_text += f"\n  • {filter_name}: {entry['videos']} videos"
         
         self.stats_label.config(text=stats_text)
     
@@ -62,6 +62,9 @@ def create_gallery_template():
         .action-btn.processed { background-color: #4299e1; color: white; }
         .action-btn.processed:hover { background-color: #3182ce; }
 
+        .pagination { display: flex; justify-content: center; gap: 15px; margin-top: 30px; }
+        .pagination a { background: white; color: #5a67d8; padding: 10px 20px; border-radius: 20px; text-decoration: none; font-weight: 600; display: inline-flex; align-items: center; gap: 8px; }
+
         .empty-gallery { color: white; text-align: center; font-size: 1.2rem; padding: 50px; background: rgba(255,255,255,0.1); border-radius: 15px; grid-column: 1 / -1; }
         
         @media (max-width: 768px) {
@@ -77,7 +80,7 @@ def create_gallery_template():
 
         <div class="stats">
             <div class="stat-item">
-                <div class="stat-value">{{ videos | length }}</div>
+                <div class="stat-value">{{ total_videos }}</div>
                 <div class="stat-label">Total de Vídeos</div>
             </div>
             <div class="stat-item">
@@ -96,17 +99,12 @@ def create_gallery_template():
                 <div class="video-card">
                     <div class="thumbnail-container">
                         {% if video.thumbnail_path %}
-                            {% if video.thumbnail_path.startswith('http') %}
-                                <img class="thumbnail" 
-                                     src="{{ video.thumbnail_path }}" 
-                                     alt="Thumbnail para {{ video.original_name }}"
-                                     onerror="this.style.display='none'; this.parentElement.querySelector('.no-thumbnail').style.display='flex';">
-                            {% else %}
-                                <img class="thumbnail" 
-                                     src="/media/{{ video.thumbnail_path }}" 
-                                     alt="Thumbnail para {{ video.original_name }}"
-                                     onerror="this.style.display='none'; this.parentElement.querySelector('.no-thumbnail').style.display='flex';">
-                            {% endif %}
+                            <img class="thumbnail" 
+                                 src="/thumb/{{ video.id }}?w=320&fmt=webp" 
+                                 alt="Thumbnail para {{ video.original_name }}"
+                                 width="320" height="190" decoding="async"
+                                 loading="{{ 'eager' if loop.index <= 4 else 'lazy' }}"
+                                 onerror="this.style.display='none'; this.parentElement.querySelector('.no-thumbnail').style.display='flex';">
                             <div class="no-thumbnail" style="display: none;">
                                 <i class="fas fa-video"></i>
                                 <span>Preview não disponível</span>
@@ -178,6 +176,13 @@ def create_gallery_template():
                 </div>
             {% endif %}
         </div>
+
+        {% if first_url or next_url %}
+        <div class="pagination">
+            {% if first_url %}<a href="{{ first_url }}"><i class="fas fa-arrow-left"></i> Mais recentes</a>{% endif %}
+            {% if next_url %}<a href="{{ next_url }}">Mais antigos <i class="fas fa-arrow-right"></i></a>{% endif %}
+        </div>
+        {% endif %}
     </div>
     
     <script>
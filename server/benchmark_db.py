@@ -0,0 +1,153 @@
+"""
+Benchmark da camada SQLite: índices e pool de conexões
+Popula um banco temporário com N vídeos e mede a latência das consultas da listagem, da galeria e
+da deduplicação por checksum sem os índices e com eles (incluindo OFFSET contra cursor e COUNT(*)
+contra a tabela video_counts), e o custo de abrir uma conexão nova por requisição comparado ao pool
+
+Uso (a partir da pasta server):
+    python benchmark_db.py --rows 100000 --repeat 200
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from server import AVAILABLE_FILTERS, _get_db_conn, adapt_datetime_iso, app, init_database
+
+START = datetime(2024, 1, 1)
+GALLERY_PAGE_SIZE = app.config['GALLERY_PAGE_SIZE']
+
+QUERIES = {
+    'lista (página 1)': ('SELECT * FROM videos ORDER BY created_at DESC LIMIT 20 OFFSET 0', ()),
+    'lista (offset 5000)': ('SELECT * FROM videos ORDER BY created_at DESC LIMIT 20 OFFSET 5000', ()),
+    'lista (cursor 5000)': (
+        'SELECT * FROM videos WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 20',
+        lambda i, rows: cursor(rows - 5000)
+    ),
+    'lista por filtro': (
+        'SELECT * FROM videos WHERE +filter = ? OR id IN (SELECT video_id FROM renditions WHERE filter = ?) '
+        'ORDER BY created_at DESC LIMIT 20', ('sepia', 'sepia')
+    ),
+    'contagem por filtro': (
+        'SELECT COUNT(*) FROM videos WHERE filter = ? OR id IN (SELECT video_id FROM renditions WHERE filter = ?)',
+        ('sepia', 'sepia')
+    ),
+    'contagem (video_counts)': ('SELECT total FROM video_counts WHERE filter = ?', ('sepia',)),
+    'galeria (página 1)': (
+        'SELECT * FROM videos ORDER BY created_at DESC, id DESC LIMIT ?', (GALLERY_PAGE_SIZE + 1,)
+    ),
+    'galeria (cursor 5000)': (
+        'SELECT * FROM videos WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?',
+        lambda i, rows: (*cursor(rows - 5000), GALLERY_PAGE_SIZE + 1)
+    ),
+    'dedupe (checksum)': ('SELECT * FROM videos WHERE checksum_md5 = ?', lambda i, rows: (checksum((i * 7919) % rows),)),
+    'job ativo (checksum)': (
+        "SELECT * FROM jobs WHERE checksum_md5 = ? AND status IN ('queued', 'running') ORDER BY created_at",
+        lambda i, rows: (checksum((i * 7919) % rows),)
+    )
+}
+
+
+def checksum(i):
+    return hashlib.md5(str(i).encode()).hexdigest()
+
+
+def cursor(i):
+    """Posição (created_at, id) do vídeo i, como em um cursor de /api/videos"""
+    return adapt_datetime_iso(START + timedelta(seconds=37 * i)), f'video-{i:08d}'
+
+
+def populate(rows):
+    """Insere `rows` vídeos (e um job concluído por vídeo) com datas e filtros variados"""
+    filters = list(AVAILABLE_FILTERS)
+    videos = [
+        (f'video-{i:08d}', f'clip_{i}.mp4', '.mp4', 'video/mp4', 1_000_000 + i, 10.0, 30.0, 1280, 720,
+         filters[i % len(filters)], START + timedelta(seconds=37 * i), f'videos/original/{i}.mp4',
+         f'videos/processed/{i}.mp4', checksum(i))
+        for i in range(rows)
+    ]
+    conn = _get_db_conn()
+    conn.executemany('''
+        INSERT INTO videos (
+            id, original_name, original_ext, mime_type, size_bytes, duration_sec, fps, width, height,
+            filter, created_at, path_original, path_processed, checksum_md5
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', videos)
+    conn.executemany(
+        "INSERT INTO jobs (id, video_id, status, payload, checksum_md5) VALUES (?, ?, 'done', '{}', ?)",
+        [(f'job-{v[0]}', v[0], v[13]) for v in videos]
+    )
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+
+
+def set_indexes(indexes, enabled):
+    """Cria ou remove os índices (nome, SQL) do banco"""
+    conn = _get_db_conn()
+    for name, sql in indexes:
+        conn.execute(sql if enabled else f'DROP INDEX {name}')
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+
+
+def time_query(sql, params, repeat, rows, pooled=True):
+    """Retorna a mediana (ms) de `repeat` execuções, incluindo obter a conexão: do pool ou, com pooled=False, uma nova"""
+    samples = []
+    for i in range(repeat):
+        args = params(i, rows) if callable(params) else params
+        started = time.perf_counter()
+        if pooled:
+            conn = _get_db_conn()
+        else:
+            conn = sqlite3.connect(app.config['DATABASE'], detect_types=sqlite3.PARSE_DECLTYPES)
+            conn.row_factory = sqlite3.Row
+        conn.execute(sql, args).fetchall()
+        conn.close()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run_benchmark(rows, repeat):
+    """Popula o banco e imprime a tabela de latências"""
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config['DATABASE'] = os.path.join(tmp, 'bench.db')
+        init_database()
+        started = time.perf_counter()
+        populate(rows)
+        print(f"{rows} vídeos inseridos em {time.perf_counter() - started:.1f}s, mediana de {repeat} execuções\n")
+
+        print(f"{'Consulta':<28}{'Sem índices':>14}{'Com índices':>14}{'Ganho':>10}")
+        print('-' * 66)
+        conn = _get_db_conn()
+        indexes = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchall()
+        conn.close()
+        set_indexes(indexes, False)
+        baseline = {name: time_query(sql, params, repeat, rows) for name, (sql, params) in QUERIES.items()}
+        set_indexes(indexes, True)
+        for name, (sql, params) in QUERIES.items():
+            indexed = time_query(sql, params, repeat, rows)
+            print(f"{name:<28}{baseline[name]:>11.3f} ms{indexed:>11.3f} ms{baseline[name] / indexed:>9.1f}x")
+
+        print(f"\n{'Consulta':<28}{'Conexão nova':>14}{'Pool':>14}{'Ganho':>10}")
+        print('-' * 66)
+        for name in ('lista (página 1)', 'dedupe (checksum)'):
+            sql, params = QUERIES[name]
+            fresh = time_query(sql, params, repeat, rows, pooled=False)
+            pooled = time_query(sql, params, repeat, rows)
+            print(f"{name:<28}{fresh:>11.3f} ms{pooled:>11.3f} ms{fresh / pooled:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    run_benchmark(args.rows, args.repeat)
@@ -0,0 +1,27 @@
+"""
+Configuração do gunicorn para o servidor de processamento
+Com o gunicorn o bloco __main__ de server.py não roda: estes hooks fazem a mesma inicialização
+(diretórios, banco, workers da fila e manutenção do armazenamento) uma única vez, no processo
+mestre, e param os workers da fila quando o gunicorn encerra
+
+Uso (a partir da pasta server):
+    gunicorn -c gunicorn.conf.py server:app
+"""
+
+from server import check_media_delivery, init_database, setup_directories, start_job_workers, stop_job_workers
+
+bind = '0.0.0.0:5000'
+workers = 4
+
+
+def on_starting(arbiter):
+    """Antes de criar os workers HTTP: prepara diretórios e banco e inicia a fila e a manutenção"""
+    setup_directories()
+    init_database()
+    check_media_delivery(standalone=False)
+    start_job_workers()
+
+
+def on_exit(arbiter):
+    """Ao encerrar o gunicorn: para os workers da fila (jobs interrompidos voltam à fila)"""
+    stop_job_workers()
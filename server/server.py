@@ -8,17 +8,32 @@ import os
 import uuid
 import json
 import hashlib
+import mimetypes
 import shutil
 import time
-from datetime import datetime
+import atexit
+import queue
+import re
+import subprocess
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from flask import Flask, request, jsonify, render_template, url_for, send_from_directory, send_file
+from stat import S_ISREG
+from urllib.parse import quote
+from flask import Flask, Request, Response, request, jsonify, render_template, url_for, send_file
 from flask_cors import CORS
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.http import is_resource_modified
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import wrap_file
+from jinja2 import TemplateNotFound
 import sqlite3
 import cv2
 import numpy as np
-from moviepy.editor import VideoFileClip
 from PIL import Image
 import logging
 import base64
@@ -54,17 +69,341 @@ CORS(app)
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB
 app.config['MEDIA_ROOT'] = Path('media').resolve()
 app.config['UPLOAD_FOLDER'] = app.config['MEDIA_ROOT'] / 'incoming'
+app.config['UPLOAD_BUFFER_SIZE'] = 1024 * 1024  # Buffer de escrita dos uploads (gravações de 1MB)
+app.config['MAX_UPLOAD_SIZE'] = 500 * 1024 * 1024  # Tamanho máximo de um upload em partes
+app.config['UPLOAD_CHUNK_SIZE'] = 8 * 1024 * 1024  # Tamanho padrão das partes (uploads retomáveis)
+app.config['MAX_CHUNK_SIZE'] = 64 * 1024 * 1024  # Maior parte aceita em um único PUT
+app.config['UPLOAD_SESSION_TTL'] = 24 * 3600  # Sessões de upload sem atividade expiram (segundos)
 app.config['DATABASE'] = Path('database/videos.db').resolve()
+app.config['DB_POOL_SIZE'] = 8  # Conexões SQLite mantidas abertas por processo
 app.config['SECRET_KEY'] = 'your-secret-key-here'
+app.config['MEDIA_CACHE_MAX_AGE'] = 365 * 24 * 3600  # Cache HTTP dos arquivos em videos/ (imutáveis depois de gravados)
+app.config['MEDIA_DELIVERY'] = 'app'  # Entrega de /media: 'app', 'file-wrapper' (gunicorn), 'x-accel' (nginx) ou 'x-sendfile' (Apache/lighttpd)
+app.config['MEDIA_ACCEL_PREFIX'] = '/protected-media/'  # Location internal do nginx que aponta para MEDIA_ROOT (modo x-accel)
+app.config['JOB_WORKERS'] = 2  # Processos que consomem a fila de processamento
+app.config['JOB_POLL_INTERVAL'] = 1.0  # Segundos entre consultas à fila quando ociosa
+app.config['JOB_MAX_ATTEMPTS'] = 3  # Tentativas de um job interrompido (ex.: worker morto) antes de falhar
+app.config['JOB_SUPERVISE_INTERVAL'] = 5.0  # Segundos entre verificações de workers mortos
+app.config['PIPELINE_QUEUE_SIZE'] = 2  # Lotes em trânsito entre os estágios do pipeline
+app.config['PIPELINE_BATCH_SIZE'] = 4  # Frames por lote filtrado de uma vez
+app.config['SEGMENT_WORKERS'] = None  # Processos por vídeo no modo segmentado (None: núcleos / JOB_WORKERS)
+app.config['PARALLEL_MIN_FRAMES'] = 900  # Vídeos mais curtos são processados em um único processo
+app.config['THUMBNAIL_SOURCE'] = 'original'  # Frames dos thumbnails: 'original' ou 'processed' (filtro principal)
+app.config['THUMBNAIL_WIDTH'] = 320  # Largura dos thumbnails armazenados (origem dos redimensionamentos)
+app.config['THUMB_CACHE_QUOTA'] = 512 * 1024 * 1024  # 512MB de thumbnails redimensionados (LRU)
+app.config['BATCH_MAX_ITEMS'] = 100  # Arquivos ou referências por envio em lote
+app.config['BATCH_MAX_IDS'] = 500  # Ids por consulta em lote
+app.config['GALLERY_PAGE_SIZE'] = 24  # Vídeos por página da galeria web
+app.config['VIDEO_CACHE_SIZE'] = 1024  # Registros de /api/video/<id> no cache em memória (LRU)
+app.config['VIDEO_CACHE_TTL'] = 60  # Segundos até uma entrada do cache de vídeos expirar
+app.config['VIDEO_CACHE_URL'] = None  # Ex.: 'redis://localhost:6379/0' para um cache compartilhado entre processos
+app.config['SPRITE_FRAMES'] = 0  # Frames da sprite sheet de pré-visualização (0 desativa)
+app.config['SPRITE_TILE_WIDTH'] = 160  # Largura de cada frame na sprite sheet
+app.config['SPRITE_COLUMNS'] = 10  # Frames por linha da sprite sheet
+app.config['MAX_RENDITIONS'] = 6  # Filtros por upload (uma versão processada por filtro)
+app.config['HLS_OUTPUT'] = False  # Também grava cada versão em segmentos HLS (playlist + .ts) durante o processamento
+app.config['HLS_SEGMENT_SEC'] = 6  # Duração dos segmentos HLS (segundos)
+app.config['RENDITION_CACHE_QUOTA'] = 20 * 1024 * 1024 * 1024  # 20GB de versões processadas (extras saem por LRU)
+app.config['MAINTENANCE_INTERVAL'] = 300  # Segundos entre passadas da manutenção do armazenamento (0 desativa)
+app.config['MAINTENANCE_IO_RATE'] = 50 * 1024 * 1024  # Bytes/s que a manutenção pode apagar (0 sem limite)
+app.config['MAINTENANCE_FILE_RATE'] = 200  # Arquivos/s que a manutenção pode apagar (0 sem limite)
+app.config['TRASH_RETENTION'] = 7 * 24 * 3600  # Vídeos removidos ficam na lixeira por 7 dias
+app.config['ORPHAN_GRACE'] = 3600  # Temporários e diretórios sem registro são removidos após 1h parados
+app.config['STORAGE_QUOTA'] = 0  # Limite de disco do MEDIA_ROOT em bytes (0 desativa)
+app.config['STORAGE_EVICTION'] = ['trash', 'thumbnails', 'renditions']  # Ordem das políticas da cota ('videos' remove os mais antigos)
 
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm', 'flv'}
 AVAILABLE_FILTERS = ['grayscale', 'blur', 'edge', 'pixelate', 'sepia', 'negative']
+mimetypes.add_type('application/vnd.apple.mpegurl', '.m3u8')
+mimetypes.add_type('video/mp2t', '.ts')
+
+# PRAGMAs aplicados a cada conexão nova (o modo WAL é persistente e definido em init_database)
+DB_PRAGMAS = [
+    'PRAGMA synchronous = NORMAL',  # Seguro com WAL; o fsync fica para os checkpoints
+    'PRAGMA busy_timeout = 5000',  # Espera até 5s por locks de escrita de outros processos
+    'PRAGMA cache_size = -16000',  # 16MB de cache de páginas por conexão
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA mmap_size = 268435456'  # Leituras via mmap (256MB)
+]
+
+# Limites superiores (segundos) dos baldes do histograma de tempos de processamento: de 0.1s a ~1.5h,
+# com 4 baldes por oitava (os percentis saem com erro de no máximo ~19%)
+PROCESSING_TIME_BUCKETS = [round(0.1 * 2 ** (k / 4), 4) for k in range(64)]
+_PROCESSING_BUCKET_SQL = (
+    'COALESCE((SELECT MIN(bucket) FROM stats_buckets WHERE upper_sec >= {value}), '
+    + str(len(PROCESSING_TIME_BUCKETS)) + ')'
+)
+
+# Migrações do esquema: a lista N é aplicada uma única vez, quando PRAGMA user_version < N
+SCHEMA_MIGRATIONS = [
+    [
+        'CREATE INDEX IF NOT EXISTS idx_videos_checksum ON videos (checksum_md5)',
+        'CREATE INDEX IF NOT EXISTS idx_videos_created ON videos (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_videos_filter_created ON videos (filter, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_checksum ON jobs (checksum_md5, status)',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_video ON jobs (video_id, status)',
+        'CREATE INDEX IF NOT EXISTS idx_uploads_updated ON uploads (updated_at)'
+    ],
+    [
+        # Paginação por cursor em (created_at, id)
+        'DROP INDEX IF EXISTS idx_videos_created',
+        'CREATE INDEX IF NOT EXISTS idx_videos_created_id ON videos (created_at, id)',
+        # Totais da listagem por filtro ('' = todos): um vídeo conta para o filtro principal e para
+        # os filtros das suas versões, e os triggers mantêm os totais a cada escrita
+        '''CREATE TABLE IF NOT EXISTS video_counts (
+            filter TEXT PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0
+        )''',
+        '''INSERT OR REPLACE INTO video_counts (filter, total)
+            SELECT '', COUNT(*) FROM videos''',
+        '''INSERT OR REPLACE INTO video_counts (filter, total)
+            SELECT filter, COUNT(*) FROM (
+                SELECT id, filter FROM videos WHERE filter IS NOT NULL
+                UNION
+                SELECT r.video_id, r.filter FROM renditions r JOIN videos v ON v.id = r.video_id
+            ) GROUP BY filter''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_videos_count_insert AFTER INSERT ON videos BEGIN
+            INSERT INTO video_counts (filter, total)
+                SELECT filter, 1 FROM (
+                    SELECT '' AS filter UNION SELECT NEW.filter
+                    UNION SELECT filter FROM renditions WHERE video_id = NEW.id
+                ) WHERE filter IS NOT NULL
+                ON CONFLICT (filter) DO UPDATE SET total = total + 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_videos_count_delete AFTER DELETE ON videos BEGIN
+            UPDATE video_counts SET total = total - 1
+                WHERE filter = '' OR filter = OLD.filter
+                    OR filter IN (SELECT filter FROM renditions WHERE video_id = OLD.id);
+        END''',
+        # BEFORE INSERT: o INSERT OR REPLACE não dispara o trigger de DELETE na linha substituída
+        '''CREATE TRIGGER IF NOT EXISTS trg_renditions_count_insert BEFORE INSERT ON renditions BEGIN
+            INSERT INTO video_counts (filter, total)
+                SELECT NEW.filter, 1
+                WHERE EXISTS (SELECT 1 FROM videos WHERE id = NEW.video_id AND filter IS NOT NEW.filter)
+                    AND NOT EXISTS (SELECT 1 FROM renditions WHERE video_id = NEW.video_id AND filter = NEW.filter)
+                ON CONFLICT (filter) DO UPDATE SET total = total + 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_renditions_count_delete AFTER DELETE ON renditions BEGIN
+            UPDATE video_counts SET total = total - 1
+                WHERE filter = OLD.filter
+                    AND EXISTS (SELECT 1 FROM videos WHERE id = OLD.video_id AND filter IS NOT OLD.filter);
+        END'''
+    ],
+    [
+        # Estatísticas agregadas de /api/stats, mantidas por triggers na mesma transação das escritas.
+        # Colunas de vídeos são somadas pelo filtro principal e as de versões pelo filtro da versão;
+        # a linha '' acumula os totais
+        '''CREATE TABLE IF NOT EXISTS video_stats (
+            filter TEXT PRIMARY KEY,
+            videos INTEGER NOT NULL DEFAULT 0,
+            size_bytes INTEGER NOT NULL DEFAULT 0,
+            duration_sec REAL NOT NULL DEFAULT 0,
+            processing_time_sec REAL NOT NULL DEFAULT 0,
+            renditions INTEGER NOT NULL DEFAULT 0,
+            rendition_bytes INTEGER NOT NULL DEFAULT 0
+        )''',
+        # Histograma dos tempos de processamento (percentis); o balde N vai até upper_sec do balde N
+        # e o balde len(PROCESSING_TIME_BUCKETS) recebe o que passar do último limite
+        '''CREATE TABLE IF NOT EXISTS stats_buckets (
+            bucket INTEGER PRIMARY KEY,
+            upper_sec REAL NOT NULL
+        )''',
+        'INSERT OR REPLACE INTO stats_buckets (bucket, upper_sec) VALUES '
+        + ', '.join(f'({bucket}, {upper_sec!r})' for bucket, upper_sec in enumerate(PROCESSING_TIME_BUCKETS)),
+        '''CREATE TABLE IF NOT EXISTS processing_histogram (
+            filter TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (filter, bucket)
+        )''',
+        '''INSERT OR REPLACE INTO video_stats (filter, videos, size_bytes, duration_sec, processing_time_sec)
+            SELECT filter, COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(duration_sec), 0),
+                   COALESCE(SUM(processing_time_sec), 0)
+            FROM (
+                SELECT '' AS filter, size_bytes, duration_sec, processing_time_sec FROM videos
+                UNION ALL
+                SELECT filter, size_bytes, duration_sec, processing_time_sec FROM videos WHERE filter IS NOT NULL
+            ) GROUP BY filter''',
+        '''INSERT INTO video_stats (filter, renditions, rendition_bytes)
+            SELECT filter, COUNT(*), COALESCE(SUM(size_bytes), 0)
+            FROM (
+                SELECT '' AS filter, size_bytes FROM renditions
+                UNION ALL
+                SELECT filter, size_bytes FROM renditions
+            ) WHERE true GROUP BY filter
+            ON CONFLICT (filter) DO UPDATE SET renditions = excluded.renditions,
+                rendition_bytes = excluded.rendition_bytes''',
+        f'''INSERT OR REPLACE INTO processing_histogram (filter, bucket, count)
+            SELECT filter, bucket, COUNT(*)
+            FROM (
+                SELECT '' AS filter, {_PROCESSING_BUCKET_SQL.format(value='processing_time_sec')} AS bucket
+                FROM videos WHERE processing_time_sec IS NOT NULL
+                UNION ALL
+                SELECT filter, {_PROCESSING_BUCKET_SQL.format(value='processing_time_sec')}
+                FROM videos WHERE processing_time_sec IS NOT NULL AND filter IS NOT NULL
+            ) GROUP BY filter, bucket''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_videos_stats_insert AFTER INSERT ON videos BEGIN
+            INSERT INTO video_stats (filter, videos, size_bytes, duration_sec, processing_time_sec)
+                SELECT filter, 1, COALESCE(NEW.size_bytes, 0), COALESCE(NEW.duration_sec, 0),
+                       COALESCE(NEW.processing_time_sec, 0)
+                FROM (SELECT '' AS filter UNION SELECT NEW.filter) WHERE filter IS NOT NULL
+                ON CONFLICT (filter) DO UPDATE SET videos = videos + 1,
+                    size_bytes = size_bytes + excluded.size_bytes,
+                    duration_sec = duration_sec + excluded.duration_sec,
+                    processing_time_sec = processing_time_sec + excluded.processing_time_sec;
+            INSERT INTO processing_histogram (filter, bucket, count)
+                SELECT filter, {_PROCESSING_BUCKET_SQL.format(value='NEW.processing_time_sec')}, 1
+                FROM (SELECT '' AS filter UNION SELECT NEW.filter)
+                WHERE filter IS NOT NULL AND NEW.processing_time_sec IS NOT NULL
+                ON CONFLICT (filter, bucket) DO UPDATE SET count = count + 1;
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_videos_stats_delete AFTER DELETE ON videos BEGIN
+            UPDATE video_stats SET videos = videos - 1,
+                size_bytes = size_bytes - COALESCE(OLD.size_bytes, 0),
+                duration_sec = duration_sec - COALESCE(OLD.duration_sec, 0),
+                processing_time_sec = processing_time_sec - COALESCE(OLD.processing_time_sec, 0)
+                WHERE filter = '' OR filter = OLD.filter;
+            UPDATE processing_histogram SET count = count - 1
+                WHERE (filter = '' OR filter = OLD.filter) AND OLD.processing_time_sec IS NOT NULL
+                    AND bucket = {_PROCESSING_BUCKET_SQL.format(value='OLD.processing_time_sec')};
+        END''',
+        # BEFORE INSERT: desconta a linha que um INSERT OR REPLACE vai substituir
+        '''CREATE TRIGGER IF NOT EXISTS trg_renditions_stats_insert BEFORE INSERT ON renditions BEGIN
+            UPDATE video_stats SET renditions = renditions - 1,
+                rendition_bytes = rendition_bytes - COALESCE(
+                    (SELECT size_bytes FROM renditions WHERE video_id = NEW.video_id AND filter = NEW.filter), 0)
+                WHERE (filter = '' OR filter = NEW.filter)
+                    AND EXISTS (SELECT 1 FROM renditions WHERE video_id = NEW.video_id AND filter = NEW.filter);
+            INSERT INTO video_stats (filter, renditions, rendition_bytes)
+                SELECT filter, 1, COALESCE(NEW.size_bytes, 0)
+                FROM (SELECT '' AS filter UNION SELECT NEW.filter) WHERE filter IS NOT NULL
+                ON CONFLICT (filter) DO UPDATE SET renditions = renditions + 1,
+                    rendition_bytes = rendition_bytes + excluded.rendition_bytes;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_renditions_stats_delete AFTER DELETE ON renditions BEGIN
+            UPDATE video_stats SET renditions = renditions - 1,
+                rendition_bytes = rendition_bytes - COALESCE(OLD.size_bytes, 0)
+                WHERE filter = '' OR filter = OLD.filter;
+        END'''
+    ],
+    [
+        # Versões das tabelas para invalidar caches de respostas (galeria): qualquer escrita incrementa
+        '''CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )''',
+        "INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('videos', 0)",
+        *(f'''CREATE TRIGGER IF NOT EXISTS trg_videos_version_{event.lower()} AFTER {event} ON videos BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'videos';
+        END''' for event in ('INSERT', 'UPDATE', 'DELETE'))
+    ],
+    [
+        # Busca textual em original_name (/api/search). Índice FTS5 de conteúdo externo: o texto fica
+        # só em videos e o índice usa o rowid de videos, que um VACUUM pode renumerar (videos não
+        # tem INTEGER PRIMARY KEY); check_search_index reconstrói o índice na inicialização
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+            original_name,
+            content = 'videos',
+            content_rowid = 'rowid',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )''',
+        "INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')",
+        '''CREATE TRIGGER IF NOT EXISTS trg_videos_fts_insert AFTER INSERT ON videos BEGIN
+            INSERT INTO videos_fts (rowid, original_name) VALUES (NEW.rowid, NEW.original_name);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_videos_fts_delete AFTER DELETE ON videos BEGIN
+            INSERT INTO videos_fts (videos_fts, rowid, original_name) VALUES ('delete', OLD.rowid, OLD.original_name);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_videos_fts_update AFTER UPDATE OF original_name ON videos BEGIN
+            INSERT INTO videos_fts (videos_fts, rowid, original_name) VALUES ('delete', OLD.rowid, OLD.original_name);
+            INSERT INTO videos_fts (rowid, original_name) VALUES (NEW.rowid, NEW.original_name);
+        END'''
+    ],
+    [
+        # Versão de cada vídeo em cache_versions ('video:<id>') para o video_cache: muda a cada escrita no
+        # vídeo ou em suas versões, feita por qualquer processo (o last_accessed do LRU não conta).
+        # A linha some com o vídeo, e uma versão ausente nunca coincide com a de uma entrada em cache
+        "INSERT OR IGNORE INTO cache_versions (name, version) SELECT 'video:' || id, 1 FROM videos",
+        '''CREATE TRIGGER IF NOT EXISTS trg_video_version_insert AFTER INSERT ON videos BEGIN
+            INSERT OR REPLACE INTO cache_versions (name, version) VALUES ('video:' || NEW.id, 1);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_video_version_update AFTER UPDATE ON videos BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'video:' || NEW.id;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_video_version_delete AFTER DELETE ON videos BEGIN
+            DELETE FROM cache_versions WHERE name = 'video:' || OLD.id;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_rendition_version_insert AFTER INSERT ON renditions BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'video:' || NEW.video_id;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_rendition_version_update
+            AFTER UPDATE OF path, size_bytes, stream_path ON renditions BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'video:' || NEW.video_id;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_rendition_version_delete AFTER DELETE ON renditions BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'video:' || OLD.video_id;
+        END'''
+    ]
+]
+
+# Máximo de vídeos por página em /api/videos e /api/search
+MAX_PAGE_SIZE = 100
+
+# Facetas de /api/search: resolução pelo menor lado (limite inferior, superior exclusivo) e
+# faixas de duração (limite superior exclusivo em segundos; a última não tem limite)
+SEARCH_RESOLUTIONS = {'sd': (0, 720), 'hd': (720, 1080), 'fullhd': (1080, 2160), '4k': (2160, None)}
+SEARCH_DURATIONS = {'short': 60, 'medium': 600, 'long': None}
+PROBE_FIELDS = ('duration_sec', 'fps', 'frame_count', 'width', 'height', 'codec')  # Metadados guardados na tabela probes
 
 # --- FUNÇÕES AUXILIARES ---
+class PooledConnection(sqlite3.Connection):
+    """Conexão do pool do processo: close() desfaz a transação pendente e devolve a conexão"""
+    
+    pool = None
+    pooled = False
+    
+    def close(self):
+        if self.pooled:
+            return
+        if self.in_transaction:
+            self.rollback()
+        self.pooled = True
+        try:
+            self.pool.put_nowait(self)
+        except queue.Full:
+            super().close()
+
+_db_pool = None
+_db_pool_key = None
+_db_pool_lock = threading.Lock()
+
 def _get_db_conn():
-    """Cria e retorna uma conexão com o banco de dados."""
-    conn = sqlite3.connect(app.config['DATABASE'], detect_types=sqlite3.PARSE_DECLTYPES)
+    """Retorna uma conexão do pool do processo (criada com os PRAGMAs de DB_PRAGMAS se o pool estiver vazio)
+    
+    As conexões são reutilizadas entre requisições; chamar close() as devolve ao pool. O pool
+    é recriado após um fork e se o caminho do banco mudar.
+    """
+    global _db_pool, _db_pool_key
+    key = (os.getpid(), str(app.config['DATABASE']))
+    if _db_pool_key != key:
+        with _db_pool_lock:
+            if _db_pool_key != key:
+                _db_pool = queue.LifoQueue(maxsize=app.config['DB_POOL_SIZE'])
+                _db_pool_key = key
+    try:
+        conn = _db_pool.get_nowait()
+        conn.pooled = False
+        return conn
+    except queue.Empty:
+        pass
+    
+    conn = sqlite3.connect(app.config['DATABASE'], detect_types=sqlite3.PARSE_DECLTYPES,
+                           check_same_thread=False, factory=PooledConnection)
     conn.row_factory = sqlite3.Row
+    conn.pool = _db_pool
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 def setup_directories():
@@ -82,8 +421,9 @@ def setup_directories():
         Path(dir_path).mkdir(parents=True, exist_ok=True)
 
 def init_database():
-    """Inicializa o banco de dados"""
+    """Inicializa o banco de dados (tabelas, modo WAL e migrações pendentes)"""
     conn = _get_db_conn()
+    conn.execute('PRAGMA journal_mode = WAL')
     conn.execute('''
         CREATE TABLE IF NOT EXISTS videos (
             id TEXT PRIMARY KEY,
@@ -102,13 +442,113 @@ def init_database():
             checksum_md5 TEXT,
             processing_time_sec REAL,
             thumbnail_path TEXT,
-            preview_gif_path TEXT
+            preview_gif_path TEXT,
+            sprite_path TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            video_id TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            payload TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            checksum_md5 TEXT,
+            attempts INTEGER DEFAULT 0,
+            worker_pid INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS renditions (
+            video_id TEXT NOT NULL,
+            filter TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size_bytes INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_accessed TIMESTAMP,
+            stream_path TEXT,
+            PRIMARY KEY (video_id, filter)
+        )
+    ''')
+    _ensure_column(conn, 'renditions', 'last_accessed', 'TIMESTAMP')
+    _ensure_column(conn, 'renditions', 'stream_path', 'TEXT')
+    _ensure_column(conn, 'videos', 'sprite_path', 'TEXT')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_renditions_filter ON renditions (filter)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_renditions_accessed ON renditions (last_accessed)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS uploads (
+            id TEXT PRIMARY KEY,
+            original_name TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            chunk_size INTEGER NOT NULL,
+            total_chunks INTEGER NOT NULL,
+            filters TEXT NOT NULL,
+            checksum_md5 TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS upload_chunks (
+            upload_id TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            PRIMARY KEY (upload_id, chunk_index)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS probes (
+            checksum_md5 TEXT PRIMARY KEY,
+            duration_sec REAL,
+            fps REAL,
+            frame_count INTEGER,
+            width INTEGER,
+            height INTEGER,
+            codec TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
     conn.commit()
+    _migrate(conn)
+    check_search_index(conn)
     conn.close()
     logger.info("Database initialized successfully")
 
+def _migrate(conn):
+    """Aplica as migrações de SCHEMA_MIGRATIONS ainda não registradas em PRAGMA user_version"""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, statements in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+        conn.execute('BEGIN IMMEDIATE')
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute(f'PRAGMA user_version = {number}')
+        conn.commit()
+        logger.info(f"Database migrated to schema version {number}")
+
+def check_search_index(conn):
+    """Reconstrói o índice de busca (videos_fts) se ele não corresponder mais a videos
+    
+    O índice guarda o rowid implícito de videos, que um VACUUM (ou um dump e restauração) pode
+    renumerar; o integrity-check do FTS5 compara o índice com o conteúdo de videos.
+    """
+    try:
+        conn.execute("INSERT INTO videos_fts (videos_fts, rank) VALUES ('integrity-check', 1)")
+    except sqlite3.DatabaseError as e:
+        logger.warning(f"Search index out of sync with videos ({e}), rebuilding")
+        conn.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+    conn.commit()
+
+def _ensure_column(conn, table, column, definition):
+    """Adiciona uma coluna ausente em bancos criados por versões anteriores"""
+    columns = {row['name'] for row in conn.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
 def allowed_file(filename):
     """Verifica se a extensão do arquivo é permitida"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -117,435 +557,3355 @@ def calculate_md5(filepath):
     """Calcula MD5 checksum de um arquivo"""
     hash_md5 = hashlib.md5()
     with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
             hash_md5.update(chunk)
     return hash_md5.hexdigest()
 
-def get_video_metadata(filepath):
-    """Extrai metadados do vídeo"""
+class HashingUpload:
+    """Arquivo de upload gravado direto em UPLOAD_FOLDER com o MD5 calculado na mesma passada
+    
+    É o stream dos arquivos de formulário (ver StreamingRequest): cada bloco recebido entra
+    no hash e é gravado por um buffer grande, então o checksum fica pronto assim que o último
+    byte chega e o arquivo vai para o destino final com um rename, sem nenhuma releitura.
+    Se não for movido, o arquivo é apagado quando o request é encerrado.
+    """
+    
+    def __init__(self, directory, buffer_size):
+        self.path = Path(directory) / f"{uuid.uuid4().hex}.part"
+        self.size = 0
+        self._md5 = hashlib.md5()
+        self._file = open(self.path, 'w+b', buffering=buffer_size)
+    
+    def write(self, data):
+        self._md5.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+    
+    def hexdigest(self):
+        """MD5 do conteúdo recebido"""
+        return self._md5.hexdigest()
+    
+    def move_to(self, destination):
+        """Fecha o arquivo e o move para `destination` (rename no mesmo sistema de arquivos)"""
+        self._file.close()
+        shutil.move(str(self.path), str(destination))
+        self.path = None
+    
+    def close(self):
+        self._file.close()
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+            self.path = None
+    
+    def __getattr__(self, name):
+        # read, seek, tell... são delegados ao arquivo em disco
+        return getattr(self._file, name)
+
+class StreamingRequest(Request):
+    """Request cujos arquivos enviados são gravados e hasheados enquanto chegam"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingUpload(app.config['UPLOAD_FOLDER'], app.config['UPLOAD_BUFFER_SIZE'])
+
+app.request_class = StreamingRequest
+
+def _probe_opencv(filepath):
+    """Lê os metadados do container com o OpenCV, sem decodificar frames"""
+    cap = cv2.VideoCapture(str(filepath))
+    try:
+        if not cap.isOpened():
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        return {
+            'duration_sec': frame_count / fps if fps > 0 else 0,
+            'fps': fps,
+            'frame_count': frame_count,
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'codec': fourcc.to_bytes(4, 'little').decode('ascii', 'ignore').strip('\x00 ') or None
+        }
+    finally:
+        cap.release()
+
+def _probe_moviepy(filepath):
+    """Fallback para containers que o OpenCV não descreve (inicia um subprocesso do ffmpeg)"""
+    from moviepy.editor import VideoFileClip
+    clip = VideoFileClip(str(filepath))
     try:
-        clip = VideoFileClip(str(filepath))
-        metadata = {
+        return {
             'duration_sec': clip.duration,
             'fps': clip.fps,
+            'frame_count': int(round(clip.duration * clip.fps)),
             'width': clip.w,
             'height': clip.h,
-            'size_bytes': os.path.getsize(str(filepath))
+            'codec': None
         }
+    finally:
         clip.close()
-        return metadata
-    except Exception as e:
-        logger.warning(f"MoviePy failed, trying OpenCV: {e}")
+
+def get_video_metadata(filepath, checksum=None):
+    """Extrai metadados do vídeo com uma única sonda leve
+    
+    Com `checksum`, o resultado fica na tabela `probes` e é reutilizado por todos os estágios
+    seguintes e por reprocessamentos do mesmo conteúdo. O MoviePy só é carregado quando o
+    OpenCV não consegue descrever o container.
+    """
+    size_bytes = os.path.getsize(str(filepath))
+    conn = _get_db_conn() if checksum else None
+    try:
+        if conn is not None:
+            row = conn.execute('SELECT * FROM probes WHERE checksum_md5 = ?', (checksum,)).fetchone()
+            if row:
+                return {**{key: row[key] for key in PROBE_FIELDS}, 'size_bytes': size_bytes}
+        
+        metadata = None
         try:
-            cap = cv2.VideoCapture(str(filepath))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-            metadata = {
-                'duration_sec': frame_count / fps if fps > 0 else 0,
-                'fps': fps,
-                'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-                'size_bytes': os.path.getsize(str(filepath))
-            }
-            cap.release()
-            return metadata
-        except Exception as e2:
-            logger.error(f"Failed to get metadata: {e2}")
-            return {
-                'duration_sec': 0,
-                'fps': 0,
-                'width': 0,
-                'height': 0,
-                'size_bytes': os.path.getsize(str(filepath))
-            }
+            metadata = _probe_opencv(filepath)
+        except Exception as e:
+            logger.warning(f"OpenCV probe failed: {e}")
+        
+        if not metadata or metadata['fps'] <= 0 or metadata['width'] <= 0:
+            logger.warning(f"OpenCV could not probe {Path(filepath).name}, trying MoviePy")
+            try:
+                metadata = _probe_moviepy(filepath)
+            except Exception as e:
+                logger.error(f"Failed to get metadata: {e}")
+                return {**dict.fromkeys(PROBE_FIELDS, 0), 'codec': None, 'size_bytes': size_bytes}
+        
+        if conn is not None:
+            conn.execute(
+                f"INSERT OR REPLACE INTO probes (checksum_md5, {', '.join(PROBE_FIELDS)}, created_at) "
+                f"VALUES (?, {', '.join('?' * len(PROBE_FIELDS))}, ?)",
+                (checksum, *(metadata[key] for key in PROBE_FIELDS), datetime.now())
+            )
+            conn.commit()
+        return {**metadata, 'size_bytes': size_bytes}
+    finally:
+        if conn is not None:
+            conn.close()
 
-def create_directory_structure(video_id):
-    """Cria estrutura de diretórios para um vídeo"""
-    now = datetime.now()
-    base_path = app.config['MEDIA_ROOT'] / 'videos' / now.strftime('%Y/%m/%d') / video_id
-    dirs = {
+def _ffmpeg_exe():
+    """Retorna o executável do ffmpeg distribuído com o MoviePy (None se indisponível)"""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+def probe_keyframes(filepath, fps):
+    """Lista os índices de frame dos keyframes (lista vazia se o ffmpeg não estiver disponível)"""
+    ffmpeg = _ffmpeg_exe()
+    if not ffmpeg or fps <= 0:
+        return []
+    try:
+        # -skip_frame nokey decodifica apenas os keyframes, então a varredura é rápida
+        result = subprocess.run(
+            [ffmpeg, '-hide_banner', '-nostats', '-skip_frame', 'nokey', '-i', str(filepath),
+             '-map', '0:v:0', '-vf', 'showinfo', '-fps_mode', 'passthrough', '-f', 'null', '-'],
+            capture_output=True, text=True, timeout=120
+        )
+        times = re.findall(r'pts_time:\s*([0-9.]+)', result.stderr)
+        return sorted({int(round(float(t) * fps)) for t in times})
+    except Exception as e:
+        logger.warning(f"Keyframe probe failed: {e}")
+        return []
+
+def _video_dirs(base_path):
+    """Retorna os diretórios de um vídeo a partir do diretório base"""
+    return {
         'base': base_path,
         'original': base_path / 'original',
         'processed': base_path / 'processed',
         'thumbs': base_path / 'thumbs'
     }
+
+def create_directory_structure(video_id):
+    """Cria estrutura de diretórios para um vídeo"""
+    now = datetime.now()
+    base_path = app.config['MEDIA_ROOT'] / 'videos' / now.strftime('%Y/%m/%d') / video_id
+    dirs = _video_dirs(base_path)
     for path in dirs.values():
         path.mkdir(parents=True, exist_ok=True)
     return dirs
 
-def generate_thumbnails(video_path, output_dir, num_frames=5):
-    """Gera thumbnails do vídeo"""
+def _relative_media_path(path):
+    """Converte um caminho absoluto em caminho relativo ao MEDIA_ROOT (com '/')"""
+    return str(Path(path).relative_to(app.config['MEDIA_ROOT'])).replace('\\', '/')
+
+def _pack_cursor(values):
+    """Serializa a posição de paginação (lista JSON) em um cursor opaco"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+def _unpack_cursor(cursor):
+    """Inverso de _pack_cursor; retorna None se o cursor for inválido"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+def _encode_cursor(video):
+    """Gera o cursor opaco de paginação a partir de (created_at, id) do último vídeo da página"""
+    created_at = video['created_at']
+    if isinstance(created_at, datetime):
+        # Mesmo formato gravado no banco, para a comparação (created_at, id) < cursor
+        created_at = adapt_datetime_iso(created_at)
+    return _pack_cursor([created_at, video['id']])
+
+def _decode_cursor(cursor):
+    """Decodifica um cursor de _encode_cursor; retorna None se ele for inválido"""
+    values = _unpack_cursor(cursor)
+    if not values or len(values) != 2 or not all(isinstance(value, str) for value in values):
+        return None
+    return tuple(values)
+
+def _with_media_urls(video, base_url):
+    """Converte os caminhos relativos de um registro de vídeo em URLs absolutas"""
+    for key in ('path_original', 'path_processed', 'thumbnail_path', 'preview_gif_path', 'sprite_path'):
+        video[key] = f"{base_url}/media/{video[key]}" if video.get(key) else None
+    return video
+
+def _rendition_entry(row, base_url):
+    """Versão processada (linha de renditions) com URLs absolutas"""
+    return {'filter': row['filter'], 'path': f"{base_url}/media/{row['path']}",
+            'stream': f"{base_url}/media/{row['stream_path']}" if row['stream_path'] else None,
+            'size_bytes': row['size_bytes'], 'created_at': row['created_at']}
+
+def _video_renditions(conn, video_id, base_url):
+    """Lista as versões processadas de um vídeo (uma por filtro) com URLs absolutas"""
+    return [
+        _rendition_entry(row, base_url)
+        for row in conn.execute(
+            'SELECT * FROM renditions WHERE video_id = ? ORDER BY rowid', (video_id,)
+        ).fetchall()
+    ]
+
+def _video_info(conn, video, base_url):
+    """Registro do vídeo com URLs absolutas e a lista de versões (corpo de /api/video/<id>)"""
+    info = _with_media_urls(dict(video), base_url)
+    info['renditions'] = _video_renditions(conn, video['id'], base_url)
+    return info
+
+def thumbnail_indices(total_frames, num_frames=5):
+    """Índices dos frames usados como thumbnails (distribuídos uniformemente no vídeo)"""
+    if total_frames <= 0:
+        return []
+    return sorted({int(i) for i in np.linspace(0, total_frames - 1, num_frames, dtype=int)})
+
+def _thumbnail_frame(frame, new_width=None):
+    """Redimensiona um frame para thumbnail mantendo a proporção"""
+    new_width = new_width or app.config['THUMBNAIL_WIDTH']
+    height, width = frame.shape[:2]
+    new_height = int(height * (new_width / width))
+    return cv2.resize(frame, (new_width, new_height))
+
+def save_thumbnails(frames, output_dir):
+    """Grava os thumbnails e o preview GIF; retorna os caminhos relativos ao MEDIA_ROOT"""
+    thumbnails = []
+    for i, frame in enumerate(frames):
+        thumb_path = output_dir / f"frame_{i+1:04d}.jpg"
+        cv2.imwrite(str(thumb_path), frame)
+        thumbnails.append(str(thumb_path))
+    
+    # Gerar preview GIF
+    if thumbnails:
+        try:
+            preview_gif_path = output_dir / "preview.gif"
+            images = [Image.open(thumb) for thumb in thumbnails[:3]]
+            images[0].save(
+                str(preview_gif_path),
+                save_all=True,
+                append_images=images[1:],
+                duration=500,
+                loop=0
+            )
+            # Retornar caminhos relativos ao MEDIA_ROOT
+            thumb_rel = Path(thumbnails[0]).relative_to(app.config['MEDIA_ROOT'])
+            gif_rel = preview_gif_path.relative_to(app.config['MEDIA_ROOT'])
+            return str(thumb_rel).replace('\\', '/'), str(gif_rel).replace('\\', '/')
+        except Exception as e:
+            logger.error(f"Error creating GIF: {e}")
+            thumb_rel = Path(thumbnails[0]).relative_to(app.config['MEDIA_ROOT'])
+            return str(thumb_rel).replace('\\', '/'), None
+    
+    return None, None
+
+def save_sprite_sheet(frames, fps, output_dir, columns):
+    """Monta a sprite sheet (frames em grade numa única imagem) e o seu índice JSON
+    
+    `frames` mapeia índice do frame -> frame reduzido. O índice traz a posição de cada tile
+    na imagem e o tempo do frame no vídeo; retorna o caminho do índice relativo ao MEDIA_ROOT.
+    """
+    if not frames:
+        return None
+    indices = sorted(frames)
+    tile_height, tile_width = frames[indices[0]].shape[:2]
+    columns = min(columns, len(indices))
+    rows = -(-len(indices) // columns)
+    
+    sheet = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+    tiles = []
+    for i, index in enumerate(indices):
+        x, y = (i % columns) * tile_width, (i // columns) * tile_height
+        tile = frames[index]
+        if tile.ndim == 2:
+            tile = cv2.cvtColor(tile, cv2.COLOR_GRAY2BGR)
+        sheet[y:y + tile_height, x:x + tile_width] = tile
+        tiles.append({'frame': index, 'time': round(index / fps, 3) if fps > 0 else 0, 'x': x, 'y': y})
+    
+    cv2.imwrite(str(output_dir / 'sprite.jpg'), sheet, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    index_path = output_dir / 'sprite.json'
+    index_path.write_text(json.dumps({
+        'image': 'sprite.jpg',
+        'tile_width': tile_width,
+        'tile_height': tile_height,
+        'columns': columns,
+        'rows': rows,
+        'frames': tiles
+    }), encoding='utf-8')
+    return _relative_media_path(index_path)
+
+def generate_thumbnails(video_path, output_dir, num_frames=5, total_frames=None):
+    """Gera thumbnails do vídeo com seeks no original (fallback quando não há FrameTap)
+    
+    `total_frames` vem da sonda de metadados, quando disponível.
+    """
     try:
         cap = cv2.VideoCapture(str(video_path))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        if total_frames <= 0:
-            cap.release()
-            return None, None
-        
-        thumbnails = []
-        frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
+        if total_frames is None:
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         
-        for i, frame_idx in enumerate(frame_indices):
+        frames = []
+        for frame_idx in thumbnail_indices(total_frames, num_frames):
             cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
             ret, frame = cap.read()
             
             if ret:
-                # Redimensionar para thumbnail
-                height, width = frame.shape[:2]
-                new_width = 320
-                new_height = int(height * (new_width / width))
-                resized = cv2.resize(frame, (new_width, new_height))
-                
-                # Salvar thumbnail
-                thumb_path = output_dir / f"frame_{i+1:04d}.jpg"
-                cv2.imwrite(str(thumb_path), resized)
-                thumbnails.append(str(thumb_path))
+                frames.append(_thumbnail_frame(frame))
         
         cap.release()
-        
-        # Gerar preview GIF
-        if thumbnails:
-            try:
-                preview_gif_path = output_dir / "preview.gif"
-                images = [Image.open(thumb) for thumb in thumbnails[:3]]
-                images[0].save(
-                    str(preview_gif_path),
-                    save_all=True,
-                    append_images=images[1:],
-                    duration=500,
-                    loop=0
-                )
-                # Retornar caminhos relativos ao MEDIA_ROOT
-                thumb_rel = Path(thumbnails[0]).relative_to(app.config['MEDIA_ROOT'])
-                gif_rel = preview_gif_path.relative_to(app.config['MEDIA_ROOT'])
-                return str(thumb_rel).replace('\\', '/'), str(gif_rel).replace('\\', '/')
-            except Exception as e:
-                logger.error(f"Error creating GIF: {e}")
-                if thumbnails:
-                    thumb_rel = Path(thumbnails[0]).relative_to(app.config['MEDIA_ROOT'])
-                    return str(thumb_rel).replace('\\', '/'), None
+        return save_thumbnails(frames, output_dir)
         
     except Exception as e:
         logger.error(f"Error generating thumbnails: {e}")
     
     return None, None
 
-class VideoProcessor:
-    """Classe para processar vídeos com diferentes filtros"""
+class FrameTap:
+    """Copia, reduzidos, os frames em índices escolhidos enquanto o pipeline os processa
     
-    @staticmethod
-    def process_frame(frame, filter_name):
-        """Aplica filtro em um frame"""
-        if filter_name == 'grayscale':
-            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        elif filter_name == 'blur':
-            return cv2.GaussianBlur(frame, (15, 15), 0)
-        elif filter_name == 'edge':
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            edges = cv2.Canny(gray, 50, 150)
-            return cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
-        elif filter_name == 'pixelate':
-            h, w = frame.shape[:2]
-            temp = cv2.resize(frame, (w//10, h//10), interpolation=cv2.INTER_LINEAR)
-            return cv2.resize(temp, (w, h), interpolation=cv2.INTER_NEAREST)
-        elif filter_name == 'sepia':
-            kernel = np.array([[0.272, 0.534, 0.131],
-                              [0.349, 0.686, 0.168],
-                              [0.393, 0.769, 0.189]])
-            return cv2.transform(frame, kernel)
-        elif filter_name == 'negative':
-            return cv2.bitwise_not(frame)
-        return frame
+    Permite gerar thumbnails e o preview GIF da própria passada de processamento, sem reabrir
+    o vídeo nem fazer seeks. `source` é None para capturar do original decodificado ou o nome
+    de um filtro para capturar da versão processada.
+    """
     
-    @staticmethod
-    def process_video(input_path, output_path, filter_name):
-        """Processa vídeo completo com filtro"""
+    def __init__(self, indices, source=None, width=None):
+        self.indices = sorted(set(indices))
+        self.source = source
+        self.width = width or app.config['THUMBNAIL_WIDTH']
+        self.frames = {}
+    
+    def for_range(self, start, end):
+        """Tap com os índices de [start, end) (um por segmento no modo paralelo)"""
+        return FrameTap([i for i in self.indices if start <= i < end], self.source, self.width)
+    
+    def capture(self, frames, count, first_index):
+        """Copia os frames pedidos de um lote cujo primeiro frame é `first_index`"""
+        for index in self.indices:
+            if first_index <= index < first_index + count:
+                self.frames[index] = _thumbnail_frame(frames[index - first_index], self.width)
+    
+    def ordered_frames(self):
+        """Frames capturados na ordem do vídeo"""
+        return [self.frames[index] for index in sorted(self.frames)]
+
+class ThumbnailCache:
+    """Cache em disco dos thumbnails renderizados sob demanda, limitado por uma cota (LRU)
+    
+    Cada render é um arquivo em `media/cache/thumbs/<video_id>/`; acertos atualizam o mtime
+    do arquivo, que serve de ordem LRU quando a cota (THUMB_CACHE_QUOTA) é ultrapassada.
+    """
+    
+    FORMATS = {
+        'jpg': ('.jpg', 'image/jpeg', [cv2.IMWRITE_JPEG_QUALITY, 85]),
+        'webp': ('.webp', 'image/webp', [cv2.IMWRITE_WEBP_QUALITY, 80]),
+        'png': ('.png', 'image/png', [])
+    }
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.size_bytes = None
+    
+    @property
+    def directory(self):
+        return app.config['MEDIA_ROOT'] / 'cache' / 'thumbs'
+    
+    def path(self, video_id, frame, width, fmt):
+        """Caminho do render em cache para (vídeo, frame, largura, formato)"""
+        return self.directory / video_id / f"{frame}_{width}{self.FORMATS[fmt][0]}"
+    
+    def get(self, path):
+        """Retorna o caminho se o render estiver em cache, marcando o acesso"""
         try:
-            cap = cv2.VideoCapture(str(input_path))
-            
-            # Obter propriedades do vídeo
-            fps = int(cap.get(cv2.CAP_PROP_FPS))
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            
-            # Configurar codec
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            
-            # Criar writer
-            if filter_name == 'grayscale':
-                out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height), False)
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+    
+    def put(self, path, image, fmt):
+        """Codifica e grava um render (escrita atômica) e aplica a cota"""
+        extension, _, params = self.FORMATS[fmt]
+        ok, encoded = cv2.imencode(extension, image, params)
+        if not ok:
+            raise RuntimeError(f'Failed to encode thumbnail as {fmt}')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{uuid.uuid4().hex}{extension}")
+        temp_path.write_bytes(encoded.tobytes())
+        os.replace(temp_path, path)
+        
+        with self.lock:
+            if self.size_bytes is None:
+                self.size_bytes = sum(f.stat().st_size for f in self.directory.rglob('*') if f.is_file())
             else:
-                out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height), True)
-            
-            if not out.isOpened():
-                logger.error("Failed to open video writer")
-                cap.release()
-                return False
-            
-            frame_count = 0
-            
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                processed_frame = VideoProcessor.process_frame(frame, filter_name)
-                out.write(processed_frame)
-                frame_count += 1
-                
-                if frame_count % 100 == 0 and total_frames > 0:
-                    progress = (frame_count / total_frames) * 100
-                    logger.info(f"Processed {frame_count}/{total_frames} frames ({progress:.1f}%)")
-            
-            cap.release()
-            out.release()
-            
-            logger.info(f"Video processed successfully: {frame_count} frames")
-            return True
-            
+                self.size_bytes += len(encoded)
+            if self.size_bytes > app.config['THUMB_CACHE_QUOTA']:
+                self._evict(keep=path)
+        return path
+    
+    def _evict(self, keep=None, free_bytes=0):
+        """Remove os renders menos usados até voltar à cota (recontando o disco)
+        
+        Com `free_bytes`, libera também essa quantidade além da cota (STORAGE_QUOTA).
+        Retorna os bytes removidos.
+        """
+        files = []
+        for f in self.directory.rglob('*'):
+            try:
+                if f.is_file():
+                    stat = f.stat()
+                    files.append((stat.st_mtime, stat.st_size, f))
+            except FileNotFoundError:
+                continue
+        self.size_bytes = sum(size for _, size, _ in files)
+        target = min(app.config['THUMB_CACHE_QUOTA'], self.size_bytes - free_bytes)
+        evicted = freed = 0
+        for _, size, f in sorted(files):
+            if self.size_bytes <= target:
+                break
+            if f == keep:
+                continue
+            f.unlink(missing_ok=True)
+            self.size_bytes -= size
+            freed += size
+            evicted += 1
+        logger.info(f"Evicted {evicted} cached thumbnail(s); cache now {self.size_bytes / (1024 * 1024):.1f}MB")
+        return freed
+    
+    def trim(self, free_bytes):
+        """Libera até `free_bytes` dos renders menos usados; retorna os bytes removidos"""
+        with self.lock:
+            return self._evict(free_bytes=free_bytes)
+    
+    def invalidate(self, video_id):
+        """Descarta os renders de um vídeo (ex.: vídeo removido)"""
+        shutil.rmtree(self.directory / video_id, ignore_errors=True)
+        with self.lock:
+            self.size_bytes = None
+
+thumbnail_cache = ThumbnailCache()
+
+class RenderCache:
+    """Cache em memória de respostas renderizadas, válido enquanto a versão dos dados não muda
+    
+    A versão vem de cache_versions (incrementada por triggers a cada escrita na tabela); quando
+    ela muda, todas as entradas são descartadas. Acima de max_entries sai a menos usada (LRU).
+    """
+    
+    def __init__(self, max_entries):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.version = None
+        self.entries = OrderedDict()
+    
+    def get(self, version, key):
+        with self.lock:
+            if version != self.version:
+                return None
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+    
+    def put(self, version, key, value):
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+gallery_cache = RenderCache(max_entries=32)
+
+class MemoryCacheBackend:
+    """Backend local do VideoCache: LRU em memória com expiração por entrada"""
+    
+    def __init__(self, max_entries):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+class RedisCacheBackend:
+    """Backend compartilhado do VideoCache (Redis): vários processos do servidor e os workers veem
+    as mesmas entradas e invalidações; a expiração fica a cargo do próprio Redis (SETEX)
+    
+    Falhas de conexão não derrubam a requisição: a leitura vira miss e a escrita é ignorada.
+    """
+    
+    PREFIX = 'video-processor:video:'
+    
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+    
+    def get(self, key):
+        try:
+            raw = self.client.get(self.PREFIX + key)
         except Exception as e:
-            logger.error(f"Error processing video: {e}")
-            return False
+            logger.warning(f"Video cache backend unavailable: {e}")
+            return None
+        return json.loads(raw) if raw else None
+    
+    def set(self, key, value, ttl):
+        try:
+            self.client.setex(self.PREFIX + key, ttl, json.dumps(value))
+        except Exception as e:
+            logger.warning(f"Video cache backend unavailable: {e}")
+    
+    def delete(self, key):
+        try:
+            self.client.delete(self.PREFIX + key)
+        except Exception as e:
+            logger.warning(f"Video cache backend unavailable: {e}")
 
-# --- ROTAS DA API ---
-@app.route('/')
-def index():
-    """Página inicial"""
-    return jsonify({
-        'status': 'online',
-        'service': 'Video Processing Server',
-        'version': '1.0.2',
-        'endpoints': {
-            'upload': '/api/upload',
-            'videos': '/api/videos',
-            'video': '/api/video/<uuid>',
-            'gallery': '/gallery',
-            'health': '/api/health'
-        }
-    })
+class VideoCache:
+    """Cache read-through das respostas de /api/video/<id>, com TTL e invalidação explícita
+    
+    Cada entrada guarda o corpo JSON pronto (URLs absolutas já montadas), seu ETag e a versão do
+    vídeo em cache_versions lida antes de montá-lo. O backend é criado no primeiro uso: Redis se
+    VIDEO_CACHE_URL estiver definido, senão LRU em memória (VIDEO_CACHE_SIZE entradas). Como a
+    versão é mantida por triggers, escritas feitas por outros processos (workers, manutenção)
+    invalidam também as entradas em memória deste processo: a leitura compara as versões.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def _backend(self):
+        if self.backend is None:
+            with self.lock:
+                if self.backend is None:
+                    if app.config['VIDEO_CACHE_URL']:
+                        self.backend = RedisCacheBackend(app.config['VIDEO_CACHE_URL'])
+                    else:
+                        self.backend = MemoryCacheBackend(app.config['VIDEO_CACHE_SIZE'])
+        return self.backend
+    
+    def get(self, video_id, base_url, version):
+        """Retorna (corpo, etag) em cache para o vídeo na versão atual (ver video_version), ou None"""
+        backend = self._backend()
+        entry = backend.get(video_id)
+        if entry is not None and entry.get('version') != version:
+            # Registro alterado por outro processo depois de entrar no cache
+            backend.delete(video_id)
+            entry = None
+        hit = entry is not None and entry['base_url'] == base_url
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return (entry['body'], entry['etag']) if hit else None
+    
+    def put(self, video_id, base_url, info, version):
+        """Serializa e guarda o registro do vídeo (com versões); retorna (corpo, etag)
+        
+        `version` deve ser lida antes de montar `info`: uma escrita no meio deixa a entrada
+        com versão antiga, descartada na próxima leitura.
+        """
+        body = app.json.dumps({'success': True, 'video': info})
+        etag = hashlib.md5(body.encode()).hexdigest()
+        self._backend().set(video_id, {'base_url': base_url, 'body': body, 'etag': etag, 'version': version},
+                            app.config['VIDEO_CACHE_TTL'])
+        return body, etag
+    
+    @staticmethod
+    def video_version(conn, video_id):
+        """Versão atual do vídeo em cache_versions (0 se o vídeo não existir)"""
+        row = conn.execute('SELECT version FROM cache_versions WHERE name = ?', (f'video:{video_id}',)).fetchone()
+        return row['version'] if row else 0
+    
+    def invalidate(self, video_id):
+        """Descarta a entrada do vídeo (registro ou versões alterados)"""
+        self._backend().delete(video_id)
+        with self.lock:
+            self.invalidations += 1
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'redis' if isinstance(self.backend, RedisCacheBackend) else 'memory',
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+            }
 
-@app.route('/api/health')
-def health_check():
-    """Health check endpoint"""
+video_cache = VideoCache()
+
+_PIPELINE_END = object()
+
+class FramePipeline:
+    """Pipeline de estágios em threads ligados por filas limitadas
+    
+    O estágio de origem é um iterável; cada estágio seguinte recebe os itens da fila de
+    entrada e repassa o resultado a todos os estágios conectados a ele. As filas limitadas
+    mantêm a memória constante e deixam decode, filtro e encode rodarem sobrepostos
+    (OpenCV libera o GIL durante o trabalho pesado).
+    """
+    
+    def __init__(self, queue_size=16, item_size=None):
+        self.queue_size = queue_size
+        self.item_size = item_size or (lambda item: 1)
+        self.stages = []
+        self.stop_event = threading.Event()
+        self.error = None
+    
+    def add_source(self, name, iterable):
+        """Adiciona o estágio de origem (ex.: decodificação)"""
+        stage = {'name': name, 'source': iterable, 'input': None, 'outputs': [],
+                 'frames': 0, 'busy_sec': 0.0}
+        self.stages.append(stage)
+        return stage
+    
+    def add_stage(self, name, work, upstream):
+        """Adiciona um estágio que consome a saída de `upstream`; retorne None para não repassar"""
+        input_queue = queue.Queue(maxsize=self.queue_size)
+        upstream['outputs'].append(input_queue)
+        stage = {'name': name, 'work': work, 'input': input_queue, 'outputs': [],
+                 'frames': 0, 'busy_sec': 0.0}
+        self.stages.append(stage)
+        return stage
+    
+    def _put(self, output_queue, item):
+        """Coloca um item na fila sem travar caso o pipeline seja abortado"""
+        while not self.stop_event.is_set():
+            try:
+                output_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _get(self, input_queue):
+        """Retira um item da fila sem travar caso o pipeline seja abortado"""
+        while not self.stop_event.is_set():
+            try:
+                return input_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _PIPELINE_END
+    
+    def acquire(self, pool):
+        """Obtém um buffer livre de um pool (fila de buffers); None se o pipeline for abortado"""
+        buffer = self._get(pool)
+        return None if buffer is _PIPELINE_END else buffer
+    
+    def _run_stage(self, stage):
+        """Loop de um estágio: mede apenas o tempo de trabalho, sem a espera nas filas"""
+        try:
+            if stage['input'] is None:
+                items = iter(stage['source'])
+            while not self.stop_event.is_set():
+                if stage['input'] is None:
+                    started = time.perf_counter()
+                    item = next(items, _PIPELINE_END)
+                    if item is _PIPELINE_END:
+                        break
+                    size = self.item_size(item)
+                else:
+                    item = self._get(stage['input'])
+                    if item is _PIPELINE_END:
+                        break
+                    size = self.item_size(item)
+                    started = time.perf_counter()
+                    item = stage['work'](item)
+                stage['busy_sec'] += time.perf_counter() - started
+                stage['frames'] += size
+                if item is not None:
+                    for output_queue in stage['outputs']:
+                        self._put(output_queue, item)
+        except Exception as e:
+            logger.error(f"Pipeline stage '{stage['name']}' failed: {e}", exc_info=True)
+            self.error = self.error or e
+            self.stop_event.set()
+        finally:
+            for output_queue in stage['outputs']:
+                self._put(output_queue, _PIPELINE_END)
+    
+    def run(self):
+        """Executa todos os estágios até o fim da origem e retorna as estatísticas por estágio"""
+        started = time.perf_counter()
+        threads = [threading.Thread(target=self._run_stage, args=(stage,), daemon=True,
+                                    name=f"pipeline-{stage['name']}")
+                   for stage in self.stages]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_sec = time.perf_counter() - started
+        
+        if self.error is not None:
+            raise self.error
+        
+        stats = {'wall_sec': round(wall_sec, 3), 'stages': {}}
+        for stage in self.stages:
+            stats['stages'][stage['name']] = {
+                'frames': stage['frames'],
+                'busy_sec': round(stage['busy_sec'], 3),
+                'fps': round(stage['frames'] / stage['busy_sec'], 1) if stage['busy_sec'] > 0 else None
+            }
+        frames = self.stages[0]['frames'] if self.stages else 0
+        stats['frames'] = frames
+        stats['fps'] = round(frames / wall_sec, 1) if wall_sec > 0 else None
+        stats['bottleneck'] = max(self.stages, key=lambda s: s['busy_sec'])['name'] if self.stages else None
+        return stats
+
+class FilterChain:
+    """Cadeia de filtros (ex.: 'blur,pixelate') compilada em um plano de execução
+    
+    Filtros pontuais consecutivos (grayscale, sepia, negative) são compostos em uma única
+    transformação afim por pixel: uma tabela de consulta (cv2.LUT, ou bitwise_not para a
+    inversão) quando o grupo atua canal a canal, ou uma matriz de cor (cv2.transform). Assim cada
+    frame é percorrido uma vez por grupo, e não uma vez por filtro. Dois passos só são fundidos
+    quando a saída intermediária não satura em [0, 255] (negative comuta com a saturação e
+    sempre pode ser fundido), de modo que o resultado difere no máximo pelo arredondamento.
+    """
+    
+    MAX_LENGTH = 8
+    POINT_FILTERS = ('grayscale', 'sepia', 'negative')
+    GRAY_WEIGHTS = np.array([[0.114, 0.587, 0.299]])  # B, G, R (BT.601, como o cvtColor)
+    
+    def __init__(self, names, input_channels=3):
+        self.names = list(names)
+        self.name = ','.join(self.names)
+        self.slug = '+'.join(self.names)
+        self.input_channels = input_channels
+        self.steps, self.output_channels = self._plan()
+    
+    @classmethod
+    def parse(cls, spec, input_channels=3):
+        """Cria a cadeia a partir de 'filtro1,filtro2,...' (ou lista), validando cada nome
+        
+        `input_channels` (3 ou 1) é o número de canais dos frames de entrada; os vídeos decodificados
+        são sempre BGR, e 1 serve para aplicar a cadeia sobre a saída de um grayscale.
+        """
+        if isinstance(spec, FilterChain):
+            return spec
+        if isinstance(spec, str):
+            names = spec.split(',')
+        elif isinstance(spec, (list, tuple)) and all(isinstance(name, str) for name in spec):
+            names = list(spec)
+        else:
+            raise ValueError(f'invalid filter spec {spec!r}')
+        names = [name.strip() for name in names if name.strip()]
+        
+        if not names:
+            raise ValueError('empty filter chain')
+        if len(names) > cls.MAX_LENGTH:
+            raise ValueError(f'filter chain longer than {cls.MAX_LENGTH} steps')
+        unknown = [name for name in names if name not in AVAILABLE_FILTERS]
+        if unknown:
+            raise ValueError(f'unknown filter {", ".join(unknown)}')
+        return cls(names, input_channels)
+    
+    def __repr__(self):
+        return f"FilterChain({self.name!r})"
+    
+    @classmethod
+    def _point_map(cls, name, channels):
+        """Retorna (A, b) do filtro pontual `name` para uma entrada com `channels` canais"""
+        if name == 'negative':
+            return -np.eye(channels), np.full(channels, 255.0)
+        if name == 'sepia':
+            kernel = FrameBatchFilter.SEPIA_KERNEL.astype(np.float64)
+            return (kernel if channels == 3 else kernel.sum(axis=1, keepdims=True)), np.zeros(3)
+        # grayscale
+        return (cls.GRAY_WEIGHTS if channels == 3 else np.eye(1)), np.zeros(1)
+    
+    @staticmethod
+    def _in_range(matrix, offset):
+        """Indica se A·x + b fica em [0, 255] para qualquer x em [0, 255] (sem saturação)"""
+        high = offset + np.clip(matrix, 0, None).sum(axis=1) * 255
+        low = offset + np.clip(matrix, None, 0).sum(axis=1) * 255
+        return low.min() >= -0.5 and high.max() <= 255.5
+    
+    def _plan(self):
+        """Agrupa os passos da cadeia; retorna (passos, canais da saída final)"""
+        steps = []
+        channels = self.input_channels
+        group = None
+        
+        for name in self.names:
+            if name in self.POINT_FILTERS:
+                matrix, offset = self._point_map(name, channels)
+                if group is not None and (name == 'negative' or self._in_range(group['A'], group['b'])):
+                    group['A'] = matrix @ group['A']
+                    group['b'] = matrix @ group['b'] + offset
+                    group['names'].append(name)
+                else:
+                    self._emit(group, steps)
+                    group = {'names': [name], 'in': channels, 'A': matrix, 'b': offset}
+                channels = matrix.shape[0]
+            else:
+                self._emit(group, steps)
+                group = None
+                output = 3 if name == 'edge' else channels
+                steps.append({'kind': 'filter', 'names': [name], 'in': channels, 'out': output})
+                channels = output
+        
+        self._emit(group, steps)
+        return steps, channels
+    
+    @classmethod
+    def _compose(cls, names, channels):
+        """Compõe os filtros pontuais `names` em um único grupo (A, b)"""
+        group = {'names': list(names), 'in': channels, 'A': np.eye(channels), 'b': np.zeros(channels)}
+        for name in names:
+            matrix, offset = cls._point_map(name, group['A'].shape[0])
+            group['A'] = matrix @ group['A']
+            group['b'] = matrix @ group['b'] + offset
+        return group
+    
+    @classmethod
+    def _emit(cls, group, steps):
+        """Converte um grupo de filtros pontuais no passo mais barato equivalente"""
+        if group is None or not group['names']:
+            return
+        names = group['names']
+        matrix, offset = group['A'], group['b']
+        channels_in, channels_out = group['in'], matrix.shape[0]
+        step = {'names': names, 'in': channels_in, 'out': channels_out}
+        
+        if len(names) == 1 and channels_in == 3:
+            # Filtro isolado: usa a implementação original (resultado idêntico)
+            step['kind'] = 'filter'
+        elif channels_in == 3 and channels_out == 1:
+            # Uma matriz 3→1 custa bem mais que o cvtColor: separa o grupo na última conversão
+            # para cinza (prefixo 3→3 fundido, cvtColor e o restante canal a canal)
+            channels = 3
+            split = 0
+            for index, name in enumerate(names):
+                if name == 'grayscale' and channels == 3:
+                    split = index
+                channels = cls._point_map(name, channels)[0].shape[0]
+            cls._emit(cls._compose(names[:split], 3), steps)
+            steps.append({'kind': 'filter', 'names': ['grayscale'], 'in': 3, 'out': 1})
+            cls._emit(cls._compose(names[split + 1:], 1), steps)
+            return
+        elif (channels_in == channels_out and np.allclose(matrix, matrix[0, 0] * np.eye(channels_in))
+              and np.allclose(offset, offset[0])):
+            gain, bias = matrix[0, 0], offset[0]
+            if np.isclose(gain, 1) and np.isclose(bias, 0):
+                return  # Identidade (ex.: negative,negative)
+            if np.isclose(gain, -1) and np.isclose(bias, 255):
+                step['kind'] = 'invert'  # Inversão pura: bitwise_not é mais rápido que a LUT
+            else:
+                step['kind'] = 'lut'
+                step['table'] = np.clip(np.round(gain * np.arange(256) + bias), 0, 255).astype(np.uint8)
+        else:
+            step['kind'] = 'affine'
+            step['matrix'] = np.hstack([matrix, offset[:, None]]).astype(np.float32)
+        steps.append(step)
+
+class FrameBatchFilter:
+    """Aplica um filtro (ou cadeia de filtros) a pilhas de frames N×H×W×C reaproveitando buffers
+    
+    Passos pontuais (grayscale, sepia, negative e os grupos fundidos pelo FilterChain) tratam o
+    lote inteiro como uma única imagem (N·H)×W e rodam em uma só chamada ao OpenCV, que usa
+    aritmética inteira/ponto fixo para uint8 (o negativo é uma subtração do numpy no buffer).
+    Filtros espaciais (blur, edge, pixelate) rodam frame a frame, mas escrevem direto no buffer de
+    saída e reaproveitam os intermediários.
+    """
+    
+    SEPIA_KERNEL = np.array([[0.272, 0.534, 0.131],
+                             [0.349, 0.686, 0.168],
+                             [0.393, 0.769, 0.189]], dtype=np.float32)
+    
+    def __init__(self, filter_name, frame_size, batch_size, input_channels=3):
+        height, width = frame_size[:2]
+        self.chain = FilterChain.parse(filter_name, input_channels)
+        self.filter_name = self.chain.name
+        self.height = height
+        self.width = width
+        self.batch_size = batch_size
+        self.output_shape = self._frame_shape(self.chain.output_channels)
+        
+        # Cada passo, exceto o último, escreve em um buffer intermediário próprio
+        self.steps = []
+        for index, planned in enumerate(self.chain.steps):
+            step = dict(planned)
+            if index < len(self.chain.steps) - 1:
+                step['buffer'] = np.empty((batch_size,) + self._frame_shape(step['out']), np.uint8)
+            if step['kind'] == 'filter' and step['names'][0] == 'edge':
+                step['gray'] = np.empty((height, width), np.uint8)
+                step['edges'] = np.empty((height, width), np.uint8)
+            elif step['kind'] == 'filter' and step['names'][0] == 'pixelate':
+                small = (max(height // 10, 1), max(width // 10, 1))
+                step['small'] = np.empty(small + self._frame_shape(step['in'])[2:], np.uint8)
+            self.steps.append(step)
+    
+    def _frame_shape(self, channels):
+        """Formato de um frame com o número de canais dado"""
+        return (self.height, self.width) if channels == 1 else (self.height, self.width, 3)
+    
+    def _rows(self, frames):
+        """Visão do lote como uma única imagem (N·H)×W"""
+        return frames.reshape((len(frames) * self.height,) + frames.shape[2:])
+    
+    def allocate_input(self):
+        """Aloca um buffer de entrada para um lote completo"""
+        return np.empty((self.batch_size,) + self._frame_shape(self.chain.input_channels), np.uint8)
+    
+    def allocate_output(self):
+        """Aloca um buffer de saída para um lote completo"""
+        return np.empty((self.batch_size,) + self.output_shape, np.uint8)
+    
+    def apply(self, frames, out):
+        """Filtra `frames` (N×H×W×3, ou N×H×W com input_channels=1) escrevendo em `out`; retorna a visão out[:N]"""
+        count = len(frames)
+        out = out[:count]
+        if not self.steps:
+            np.copyto(out, frames)
+            return out
+        
+        source = frames
+        for step in self.steps:
+            target = step['buffer'][:count] if 'buffer' in step else out
+            self._apply_step(step, source, target)
+            source = target
+        return out
+    
+    def _apply_step(self, step, frames, out):
+        """Executa um passo do plano sobre o lote"""
+        if step['kind'] == 'lut':
+            cv2.LUT(self._rows(frames), step['table'], dst=self._rows(out))
+            return
+        if step['kind'] == 'affine':
+            cv2.transform(self._rows(frames), step['matrix'], dst=self._rows(out))
+            return
+        if step['kind'] == 'invert':
+            np.subtract(255, frames, out=out)
+            return
+        
+        filter_name = step['names'][0]
+        if filter_name == 'grayscale':
+            cv2.cvtColor(self._rows(frames), cv2.COLOR_BGR2GRAY, dst=self._rows(out))
+        elif filter_name == 'sepia':
+            cv2.transform(self._rows(frames), self.SEPIA_KERNEL, dst=self._rows(out))
+        elif filter_name == 'negative':
+            # Subtração direta no buffer: mais rápida que o bitwise_not do OpenCV sobre o lote
+            np.subtract(255, frames, out=out)
+        elif filter_name == 'blur':
+            for i in range(len(frames)):
+                cv2.GaussianBlur(frames[i], (15, 15), 0, dst=out[i])
+        elif filter_name == 'edge':
+            for i in range(len(frames)):
+                gray = frames[i]
+                if step['in'] == 3:
+                    gray = cv2.cvtColor(frames[i], cv2.COLOR_BGR2GRAY, dst=step['gray'])
+                cv2.Canny(gray, 50, 150, edges=step['edges'])
+                cv2.cvtColor(step['edges'], cv2.COLOR_GRAY2BGR, dst=out[i])
+        elif filter_name == 'pixelate':
+            small = step['small']
+            for i in range(len(frames)):
+                cv2.resize(frames[i], (small.shape[1], small.shape[0]), dst=small,
+                           interpolation=cv2.INTER_LINEAR)
+                cv2.resize(small, (self.width, self.height), dst=out[i], interpolation=cv2.INTER_NEAREST)
+
+class HlsWriter:
+    """Saída HLS com a interface do cv2.VideoWriter: envia os frames crus ao ffmpeg por um pipe
+    
+    O ffmpeg codifica em H.264 com um keyframe a cada `segment_sec` e grava segmentos .ts de
+    duração fixa, reescrevendo a playlist (tipo EVENT) a cada segmento concluído, então a
+    reprodução pode começar antes do fim do processamento. `name` prefixa a playlist e os
+    segmentos, e `start_sec` desloca os timestamps (partes paralelas do mesmo vídeo).
+    """
+    
+    def __init__(self, hls_dir, fps, width, height, is_color, segment_sec, name='index', start_sec=0.0):
+        self.process = None
+        ffmpeg = _ffmpeg_exe()
+        if not ffmpeg:
+            logger.error("ffmpeg not available; cannot write HLS output")
+            return
+        hls_dir.mkdir(parents=True, exist_ok=True)
+        self.process = subprocess.Popen([
+            ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24' if is_color else 'gray',
+            '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+            '-vf', 'crop=trunc(iw/2)*2:trunc(ih/2)*2',
+            '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+            '-force_key_frames', f'expr:gte(t,n_forced*{segment_sec})',
+            '-output_ts_offset', f'{start_sec:.6f}',
+            '-f', 'hls', '-hls_time', str(segment_sec), '-hls_playlist_type', 'event',
+            '-hls_segment_filename', str(hls_dir / f'{name}_%05d.ts'),
+            str(hls_dir / f'{name}.m3u8')
+        ], stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    
+    def isOpened(self):
+        return self.process is not None and self.process.poll() is None
+    
+    def write(self, frame):
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            raise RuntimeError(f"HLS encoder exited: {self.process.stderr.read().decode(errors='replace').strip()}")
+    
+    def release(self):
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        error = self.process.stderr.read().decode(errors='replace').strip()
+        if self.process.wait() != 0:
+            logger.error(f"HLS encoder failed: {error}")
+
+class TeeWriter:
+    """Repassa cada frame a vários writers (ex.: o arquivo da versão e a saída HLS)"""
+    
+    def __init__(self, *writers):
+        self.writers = writers
+    
+    def isOpened(self):
+        return all(writer.isOpened() for writer in self.writers)
+    
+    def write(self, frame):
+        for writer in self.writers:
+            writer.write(frame)
+    
+    def release(self):
+        for writer in self.writers:
+            writer.release()
+
+class VideoProcessor:
+    """Classe para processar vídeos com diferentes filtros"""
+    
+    @staticmethod
+    def process_frame(frame, filter_name):
+        """Aplica filtro em um frame"""
+        if filter_name == 'grayscale':
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        elif filter_name == 'blur':
+            return cv2.GaussianBlur(frame, (15, 15), 0)
+        elif filter_name == 'edge':
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            edges = cv2.Canny(gray, 50, 150)
+            return cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
+        elif filter_name == 'pixelate':
+            h, w = frame.shape[:2]
+            temp = cv2.resize(frame, (w//10, h//10), interpolation=cv2.INTER_LINEAR)
+            return cv2.resize(temp, (w, h), interpolation=cv2.INTER_NEAREST)
+        elif filter_name == 'sepia':
+            return cv2.transform(frame, FrameBatchFilter.SEPIA_KERNEL)
+        elif filter_name == 'negative':
+            return cv2.bitwise_not(frame)
+        return frame
+    
+    @staticmethod
+    def process_batch(frames, filter_name, out=None):
+        """Aplica o filtro a uma pilha N×H×W×C de frames (ver FrameBatchFilter)"""
+        batch_filter = FrameBatchFilter(filter_name, frames.shape[1:3], len(frames))
+        if out is None:
+            out = batch_filter.allocate_output()
+        return batch_filter.apply(frames, out)
+    
+    @staticmethod
+    def _read_frames(cap):
+        """Gera os frames decodificados de um VideoCapture"""
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    
+    @staticmethod
+    def _read_into(cap, buffer, limit):
+        """Decodifica até `limit` frames direto nas posições do buffer; retorna quantos leu"""
+        for i in range(limit):
+            ret, frame = cap.read(buffer[i])
+            if not ret:
+                return i
+            if not np.may_share_memory(frame, buffer):
+                # O decoder alocou outro array (ex.: dimensões diferentes das informadas)
+                buffer[i] = frame
+        return limit
+    
+    @staticmethod
+    def _run_filter_pipeline(cap, writers, width, height, max_frames=None,
+                             on_encoded=None, queue_size=None, batch_size=None,
+                             taps=(), first_frame=0):
+        """Executa o pipeline decode -> filtro -> encode em lotes de frames
+        
+        `writers` mapeia cada filtro (ou cadeia) para o seu VideoWriter: cada lote é
+        decodificado uma única vez e repassado a um par de estágios filtro/encode por saída.
+        Os lotes circulam entre pools de buffers pré-alocados: o decode escreve direto no
+        buffer de entrada, o filtro no de saída, e cada buffer volta ao pool assim que o
+        último estágio que o usa termina, então nenhum frame é alocado durante o processamento.
+        Cada FrameTap em `taps` recebe os frames pedidos (numerados a partir de `first_frame`)
+        do decode ou do encode da saída indicada em `tap.source`.
+        """
+        queue_size = queue_size or app.config['PIPELINE_QUEUE_SIZE']
+        batch_size = batch_size or app.config['PIPELINE_BATCH_SIZE']
+        batch_filters = {name: FrameBatchFilter(name, (height, width), batch_size) for name in writers}
+        
+        # Cada pool cobre a fila entre os estágios mais o lote em uso em cada ponta
+        free_inputs = queue.Queue()
+        free_outputs = {name: queue.Queue() for name in writers}
+        for _ in range(queue_size + 2):
+            free_inputs.put(next(iter(batch_filters.values())).allocate_input())
+            for name, batch_filter in batch_filters.items():
+                free_outputs[name].put(batch_filter.allocate_output())
+        
+        # O lote decodificado só volta ao pool depois que todos os filtros o leram
+        readers = {}
+        readers_lock = threading.Lock()
+        
+        def release_input(frames):
+            with readers_lock:
+                readers[id(frames)] -= 1
+                done = readers[id(frames)] == 0
+            if done:
+                free_inputs.put(frames)
+        
+        pipeline = FramePipeline(queue_size, item_size=lambda batch: batch[1])
+        
+        decode_taps = [tap for tap in taps if tap.source is None]
+        
+        def decode():
+            remaining = max_frames
+            position = first_frame
+            while remaining is None or remaining > 0:
+                buffer = pipeline.acquire(free_inputs)
+                if buffer is None:
+                    return
+                limit = batch_size if remaining is None else min(batch_size, remaining)
+                count = VideoProcessor._read_into(cap, buffer, limit)
+                for tap in decode_taps:
+                    tap.capture(buffer, count, position)
+                position += count
+                if count:
+                    with readers_lock:
+                        readers[id(buffer)] = len(writers)
+                    yield buffer, count
+                if count < limit:
+                    return
+                if remaining is not None:
+                    remaining -= count
+        
+        def make_filter(name):
+            def apply_filter(batch):
+                frames, count = batch
+                output = pipeline.acquire(free_outputs[name])
+                if output is None:
+                    return None
+                batch_filters[name].apply(frames[:count], output)
+                release_input(frames)
+                return output, count
+            return apply_filter
+        
+        def make_encoder(name, report):
+            position = first_frame
+            output_taps = [tap for tap in taps if tap.source == name]
+            
+            def encode(batch):
+                nonlocal position
+                frames, count = batch
+                for i in range(count):
+                    writers[name].write(frames[i])
+                for tap in output_taps:
+                    tap.capture(frames, count, position)
+                position += count
+                free_outputs[name].put(frames)
+                if report and on_encoded is not None:
+                    on_encoded(count)
+            return encode
+        
+        decode_stage = pipeline.add_source('decode', decode())
+        for index, name in enumerate(writers):
+            suffix = f":{name}" if len(writers) > 1 else ''
+            filter_stage = pipeline.add_stage(f"filter{suffix}", make_filter(name), decode_stage)
+            pipeline.add_stage(f"encode{suffix}", make_encoder(name, index == 0), filter_stage)
+        return pipeline.run()
+    
+    @staticmethod
+    def process_video(input_path, output_path, filter_name, stats=None):
+        """Processa vídeo completo com filtro (ver process_renditions)"""
+        return VideoProcessor.process_renditions(input_path, {filter_name: output_path}, stats)
+    
+    @staticmethod
+    def process_renditions(input_path, outputs, stats=None, probe=None, taps=(), hls_segment_sec=None):
+        """Gera uma versão do vídeo por filtro a partir de uma única decodificação
+        
+        `outputs` mapeia filtro (ou cadeia) -> caminho de saída. Decode, filtros e encodes
+        rodam como estágios de um FramePipeline; se `stats` for um dict, ele recebe a vazão
+        de cada estágio para identificar o gargalo. `probe` são os metadados já lidos por
+        get_video_metadata (evita consultar o container de novo) e `taps` os FrameTaps que
+        capturam frames (thumbnails, sprite sheet) durante a mesma passada. Com
+        `hls_segment_sec`, cada versão também é gravada em segmentos HLS em `hls/`.
+        """
+        cap = None
+        writers = {}
+        try:
+            cap = cv2.VideoCapture(str(input_path))
+            
+            # Obter propriedades do vídeo
+            fps, width, height, total_frames = VideoProcessor._stream_properties(cap, probe)
+            
+            # Criar um writer por saída
+            for filter_name, output_path in outputs.items():
+                hls = (VideoProcessor.hls_dir(output_path), hls_segment_sec) if hls_segment_sec else None
+                writers[filter_name] = VideoProcessor._open_writer(output_path, filter_name, fps, width, height, hls)
+                if not writers[filter_name].isOpened():
+                    logger.error(f"Failed to open video writer for {output_path}")
+                    return False
+            
+            frame_count = 0
+            
+            def log_progress(count):
+                nonlocal frame_count
+                frame_count += count
+                
+                if frame_count // 100 > (frame_count - count) // 100 and total_frames > 0:
+                    progress = (frame_count / total_frames) * 100
+                    logger.info(f"Processed {frame_count}/{total_frames} frames ({progress:.1f}%)")
+            
+            pipeline_stats = VideoProcessor._run_filter_pipeline(
+                cap, writers, width, height, on_encoded=log_progress, taps=taps
+            )
+            
+            if stats is not None:
+                stats.update(pipeline_stats)
+            
+            stage_summary = ', '.join(
+                f"{name} {stage['fps']} fps" for name, stage in pipeline_stats['stages'].items()
+            )
+            logger.info(f"Video processed successfully: {frame_count} frames x {len(writers)} "
+                        f"output(s) ({stage_summary}; bottleneck: {pipeline_stats['bottleneck']})")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error processing video: {e}")
+            return False
+        finally:
+            if cap is not None:
+                cap.release()
+            for writer in writers.values():
+                writer.release()
+    
+    @staticmethod
+    def _stream_properties(cap, probe=None):
+        """Retorna (fps, largura, altura, total de frames) da sonda ou, sem ela, da captura"""
+        if probe and probe['fps'] > 0:
+            return int(probe['fps']), probe['width'], probe['height'], probe['frame_count']
+        return (int(cap.get(cv2.CAP_PROP_FPS)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    
+    @staticmethod
+    def _open_writer(output_path, filter_name, fps, width, height, hls=None):
+        """Cria o VideoWriter de saída (monocromático quando a cadeia termina em um canal)
+        
+        Com `hls` (argumentos do HlsWriter: diretório, duração dos segmentos e, opcionalmente,
+        nome e deslocamento), os frames também são gravados como segmentos HLS.
+        """
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        is_color = FilterChain.parse(filter_name).output_channels == 3
+        writer = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height), is_color)
+        if not hls:
+            return writer
+        hls_dir, segment_sec, *extra = hls
+        return TeeWriter(writer, HlsWriter(hls_dir, fps, width, height, is_color, segment_sec, *extra))
+    
+    @staticmethod
+    def hls_dir(output_path):
+        """Diretório dos segmentos HLS de uma versão (ao lado do arquivo processado)"""
+        return Path(output_path).parent / 'hls'
+    
+    @staticmethod
+    def _merge_hls_parts(hls_dir, parts, complete):
+        """Junta as playlists das partes paralelas em index.m3u8, na ordem do vídeo
+        
+        Chamado a cada parte concluída, expõe os segmentos prontos enquanto o job ainda roda;
+        `complete` fecha a playlist (#EXT-X-ENDLIST) e remove as playlists das partes.
+        """
+        entries = []
+        target_duration = 1
+        for i, part in enumerate(parts):
+            if i > 0:
+                entries.append('#EXT-X-DISCONTINUITY')
+            for line in (hls_dir / f"{part}.m3u8").read_text(encoding='utf-8').splitlines():
+                if line.startswith('#EXT-X-TARGETDURATION:'):
+                    target_duration = max(target_duration, int(line.split(':')[1]))
+                elif line.startswith('#EXTINF:') or (line and not line.startswith('#')):
+                    entries.append(line)
+        header = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{target_duration}',
+                  '#EXT-X-MEDIA-SEQUENCE:0', '#EXT-X-PLAYLIST-TYPE:EVENT']
+        footer = ['#EXT-X-ENDLIST'] if complete else []
+        
+        temp_path = hls_dir / f".index_{uuid.uuid4().hex}.m3u8"
+        temp_path.write_text('\n'.join(header + entries + footer) + '\n', encoding='utf-8')
+        os.replace(temp_path, hls_dir / 'index.m3u8')
+        if complete:
+            for part in parts:
+                (hls_dir / f"{part}.m3u8").unlink(missing_ok=True)
+    
+    @staticmethod
+    def plan_segments(total_frames, num_segments, keyframes=(), align=1):
+        """Divide [0, total_frames) em segmentos, cortando no keyframe mais próximo quando conhecido
+        
+        Com `align` > 1 os cortes caem em múltiplos de `align` frames, nos keyframes que também
+        são múltiplos quando há o bastante deles: com saída HLS, `align` é a duração de um
+        segmento HLS e cada parte termina com um segmento completo, em vez de um segmento curto
+        antes da próxima.
+        """
+        if align > 1:
+            aligned = [k for k in keyframes if k > 0 and k % align == 0]
+            keyframes = aligned if len(aligned) >= num_segments - 1 else range(align, total_frames, align)
+        bounds = [0]
+        for i in range(1, num_segments):
+            cut = total_frames * i // num_segments
+            if keyframes:
+                cut = min(keyframes, key=lambda k: abs(k - cut))
+            if bounds[-1] < cut < total_frames:
+                bounds.append(cut)
+        bounds.append(total_frames)
+        return list(zip(bounds[:-1], bounds[1:]))
+    
+    @staticmethod
+    def _process_segment(input_path, segment_paths, start, end, queue_size, batch_size, probe=None, taps=(),
+                         hls_segment_sec=None, hls_dirs=None):
+        """Processa os frames [start, end) em um arquivo por filtro (executado no pool de processos)
+        
+        Os frames capturados por `taps` voltam ao processo principal em `stats['captures']`.
+        Com `hls_segment_sec`, cada filtro também grava a parte `part_<start>` da sua playlist
+        HLS no diretório indicado em `hls_dirs`.
+        """
+        cap = cv2.VideoCapture(str(input_path))
+        writers = {}
+        try:
+            fps, width, height, _ = VideoProcessor._stream_properties(cap, probe)
+            if start > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            
+            for filter_name, segment_path in segment_paths.items():
+                hls = None
+                if hls_segment_sec:
+                    hls = (Path(hls_dirs[filter_name]), hls_segment_sec, f"part_{start:08d}", start / fps)
+                writers[filter_name] = VideoProcessor._open_writer(segment_path, filter_name, fps, width, height, hls)
+                if not writers[filter_name].isOpened():
+                    raise RuntimeError(f"Failed to open writer for {segment_path}")
+            
+            stats = VideoProcessor._run_filter_pipeline(
+                cap, writers, width, height, max_frames=end - start,
+                queue_size=queue_size, batch_size=batch_size, taps=taps, first_frame=start
+            )
+            stats['captures'] = [tap.frames for tap in taps]
+            return stats
+        finally:
+            cap.release()
+            for writer in writers.values():
+                writer.release()
+    
+    @staticmethod
+    def _concat_segments(segment_paths, output_path):
+        """Concatena os segmentos em ordem; usa o demuxer concat do ffmpeg (sem reencode) se disponível"""
+        ffmpeg = _ffmpeg_exe()
+        if ffmpeg:
+            list_path = Path(segment_paths[0]).parent / 'segments.txt'
+            list_path.write_text(
+                ''.join(f"file '{Path(p).resolve().as_posix()}'\n" for p in segment_paths),
+                encoding='utf-8'
+            )
+            result = subprocess.run(
+                [ffmpeg, '-hide_banner', '-loglevel', 'error', '-y', '-f', 'concat', '-safe', '0',
+                 '-i', str(list_path), '-c', 'copy', str(output_path)],
+                capture_output=True, text=True
+            )
+            if result.returncode == 0:
+                return True
+            logger.warning(f"ffmpeg concat failed, re-encoding with OpenCV: {result.stderr.strip()}")
+        
+        out = None
+        for segment_path in segment_paths:
+            cap = cv2.VideoCapture(str(segment_path))
+            if out is None:
+                fps = int(cap.get(cv2.CAP_PROP_FPS))
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                out = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+            for frame in VideoProcessor._read_frames(cap):
+                out.write(frame)
+            cap.release()
+        if out is not None:
+            out.release()
+        return out is not None
+    
+    @staticmethod
+    def process_video_parallel(input_path, output_path, filter_name, workers, stats=None):
+        """Processa um vídeo em segmentos paralelos (ver process_renditions_parallel)"""
+        return VideoProcessor.process_renditions_parallel(input_path, {filter_name: output_path},
+                                                          workers, stats)
+    
+    @staticmethod
+    def process_renditions_parallel(input_path, outputs, workers, stats=None, probe=None, taps=(),
+                                    hls_segment_sec=None):
+        """Gera as versões do vídeo dividindo-o em segmentos filtrados em paralelo por um pool de processos
+        
+        Os cortes são alinhados aos keyframes (quando o ffmpeg está disponível) para que cada
+        processo comece a decodificar exatamente no início do seu segmento; cada segmento é
+        decodificado uma vez e gera um arquivo por filtro. Os segmentos são concatenados na
+        ordem original, preservando a sequência de frames e os timestamps. Com saída HLS, cada
+        segmento grava a sua parte da playlist, publicada em index.m3u8 assim que as partes
+        anteriores também terminam; os cortes caem em múltiplos da duração dos segmentos HLS.
+        """
+        started = time.perf_counter()
+        segment_dir = Path(next(iter(outputs.values()))).parent.parent / f".segments_{uuid.uuid4().hex}"
+        try:
+            if probe is None:
+                probe = get_video_metadata(input_path)
+            total_frames = probe['frame_count']
+            
+            if total_frames <= 0 or workers <= 1:
+                return VideoProcessor.process_renditions(input_path, outputs, stats, probe, taps, hls_segment_sec)
+            
+            keyframes = probe_keyframes(input_path, probe['fps'])
+            align = max(1, round(hls_segment_sec * probe['fps'])) if hls_segment_sec else 1
+            segments = VideoProcessor.plan_segments(total_frames, workers, keyframes, align)
+            segment_dir.mkdir(parents=True)
+            segment_paths = [
+                {name: str(segment_dir / f"{FilterChain.parse(name).slug}_{i:04d}.mp4") for name in outputs}
+                for i in range(len(segments))
+            ]
+            
+            logger.info(f"Processing {total_frames} frames in {len(segments)} segments "
+                        f"({'keyframe-aligned' if keyframes else 'uniform'} cuts)")
+            
+            hls_dirs = {name: str(VideoProcessor.hls_dir(path)) for name, path in outputs.items()}
+            hls_parts = [f"part_{start:08d}" for start, _ in segments]
+            
+            ctx = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(workers, len(segments)), mp_context=ctx) as pool:
+                futures = [
+                    pool.submit(VideoProcessor._process_segment, str(input_path), paths,
+                                start, end, app.config['PIPELINE_QUEUE_SIZE'],
+                                app.config['PIPELINE_BATCH_SIZE'], probe,
+                                [tap.for_range(start, end) for tap in taps],
+                                hls_segment_sec, hls_dirs)
+                    for paths, (start, end) in zip(segment_paths, segments)
+                ]
+                segment_stats = []
+                for i, future in enumerate(futures):
+                    segment_stats.append(future.result())
+                    if hls_segment_sec:
+                        for hls_dir in hls_dirs.values():
+                            VideoProcessor._merge_hls_parts(Path(hls_dir), hls_parts[:i + 1],
+                                                            complete=i == len(futures) - 1)
+            
+            for segment in segment_stats:
+                for tap, frames in zip(taps, segment.pop('captures')):
+                    tap.frames.update(frames)
+            
+            for name, output_path in outputs.items():
+                if not VideoProcessor._concat_segments([paths[name] for paths in segment_paths], output_path):
+                    raise RuntimeError(f'Failed to concatenate segments for {name}')
+            
+            wall_sec = time.perf_counter() - started
+            frame_count = sum(s['frames'] for s in segment_stats)
+            if stats is not None:
+                stats.update({
+                    'mode': 'segments',
+                    'segments': [{'start': start, 'end': end, **s}
+                                 for (start, end), s in zip(segments, segment_stats)],
+                    'frames': frame_count,
+                    'wall_sec': round(wall_sec, 3),
+                    'fps': round(frame_count / wall_sec, 1) if wall_sec > 0 else None
+                })
+            
+            logger.info(f"Video processed successfully: {frame_count} frames x {len(outputs)} "
+                        f"output(s) in {len(segments)} segments ({wall_sec:.2f}s)")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error processing video in segments: {e}", exc_info=True)
+            return False
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+# --- FILA DE PROCESSAMENTO ---
+# Os jobs ficam na tabela `jobs` do SQLite, então sobrevivem a reinícios do servidor.
+# Cada worker é um processo separado que reserva o job mais antigo com BEGIN IMMEDIATE,
+# garantindo que dois workers nunca processem o mesmo job.
+_job_workers = []
+_job_stop_event = None
+_job_workers_pid = None  # Processo que iniciou os workers (servidores WSGI com fork herdam a lista)
+_job_workers_lock = threading.Lock()  # Entre o supervisor e stop_job_workers
+
+class StopSignal:
+    """Sinal de parada compartilhado entre os processos do pool (mesma interface do Event)
+    
+    O multiprocessing.Event usa uma Condition: um processo morto no meio de um wait()
+    (segfault, OOM killer) deixa a Condition inconsistente e o set() seguinte trava para sempre.
+    Aqui o sinal é um byte em memória compartilhada consultado em intervalos curtos.
+    """
+    
+    def __init__(self, ctx, poll_interval=0.1):
+        self._flag = ctx.RawValue('b', 0)
+        self.poll_interval = poll_interval
+    
+    def set(self):
+        self._flag.value = 1
+    
+    def is_set(self):
+        return bool(self._flag.value)
+    
+    def wait(self, timeout=None):
+        """Espera o sinal por até `timeout` segundos; retorna se ele foi dado"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_set():
+            delay = self.poll_interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(delay)
+        return True
+
+def enqueue_job(conn, video_id, checksum, payload):
+    """Insere um job na fila e retorna seu ID (o commit fica a cargo do chamador)"""
+    job_id = str(uuid.uuid4())
+    conn.execute('''
+        INSERT INTO jobs (id, video_id, status, payload, checksum_md5, created_at)
+        VALUES (?, ?, 'queued', ?, ?, ?)
+    ''', (job_id, video_id, json.dumps(payload), checksum, datetime.now()))
+    return job_id
+
+def request_renditions(conn, video, filters):
+    """Resolve os filtros pedidos para um vídeo já armazenado usando o cache de versões
+    
+    O cache é endereçado pelo conteúdo: (checksum do original, filtro). Versões já geradas
+    têm o último acesso atualizado (LRU) e são devolvidas direto; as que faltam são
+    enfileiradas em um job que reaproveita o original armazenado, sem novo upload. Filtros
+    que já estão na fila para o mesmo vídeo não são enfileirados de novo: a consulta à fila e
+    a inserção do job ficam em uma transação BEGIN IMMEDIATE, então dois pedidos simultâneos
+    não enfileiram o mesmo filtro duas vezes.
+    Retorna (filtros em cache, ID do job que gera os demais ou None); o commit fica a
+    cargo do chamador.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    placeholders = ', '.join('?' * len(filters))
+    hits = {row['filter'] for row in conn.execute(
+        f'SELECT filter FROM renditions WHERE video_id = ? AND filter IN ({placeholders})',
+        (video['id'], *filters)
+    ).fetchall()}
+    if hits:
+        conn.execute(
+            f"UPDATE renditions SET last_accessed = ? WHERE video_id = ? AND filter IN ({', '.join('?' * len(hits))})",
+            (datetime.now(), video['id'], *hits)
+        )
+    
+    misses = [name for name in filters if name not in hits]
+    job_id = None
+    for job in conn.execute(
+        "SELECT id, payload FROM jobs WHERE video_id = ? AND status IN ('queued', 'running') ORDER BY created_at",
+        (video['id'],)
+    ).fetchall():
+        payload = json.loads(job['payload'])
+        pending = set(payload.get('filters') or [payload['filter']])
+        if pending & set(misses):
+            job_id = job_id or job['id']
+            misses = [name for name in misses if name not in pending]
+    
+    if misses:
+        job_id = enqueue_job(conn, video['id'], video['checksum_md5'], {
+            'filter': misses[0],
+            'filters': misses,
+            'renditions_only': True,
+            'original_name': video['original_name'],
+            'extension': video['original_ext'],
+            'base_path': Path(video['path_original']).parent.parent.as_posix(),
+            'original_path': video['path_original']
+        })
+    return [name for name in filters if name in hits], job_id
+
+def evict_renditions(conn, keep_video_id=None, quota=None, throttle=None):
+    """Remove as versões menos acessadas até o cache caber em RENDITION_CACHE_QUOTA
+    
+    A versão principal de cada vídeo (path_processed) nunca é removida, nem as do vídeo
+    `keep_video_id` (recém-geradas). `quota` substitui a cota configurada e, com `throttle`
+    (IOThrottle da manutenção), os arquivos são apagados no ritmo dele.
+    Retorna a lista de (video_id, filtro) removidos.
+    """
+    if quota is None:
+        quota = app.config['RENDITION_CACHE_QUOTA']
+    total = conn.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM renditions').fetchone()[0]
+    if total <= quota:
+        return []
+    
+    evicted = []
+    candidates = conn.execute('''
+        SELECT r.video_id, r.filter, r.path, r.size_bytes
+        FROM renditions r JOIN videos v ON v.id = r.video_id
+        WHERE r.path != v.path_processed AND r.video_id IS NOT ?
+        ORDER BY r.last_accessed
+    ''', (keep_video_id,)).fetchall()
+    
+    for row in candidates:
+        if total <= quota or (throttle is not None and throttle.stopped):
+            break
+        rendition_dir = (app.config['MEDIA_ROOT'] / row['path']).parent
+        if throttle is None:
+            shutil.rmtree(rendition_dir, ignore_errors=True)
+        else:
+            remove_tree(rendition_dir, throttle)
+        conn.execute('DELETE FROM renditions WHERE video_id = ? AND filter = ?', (row['video_id'], row['filter']))
+        total -= row['size_bytes'] or 0
+        evicted.append((row['video_id'], row['filter']))
+    conn.commit()
+    for video_id in {video_id for video_id, _ in evicted}:
+        video_cache.invalidate(video_id)
+    
+    if evicted:
+        logger.info(f"Evicted {len(evicted)} cached rendition(s); cache now {total / (1024 * 1024):.1f}MB")
+    return evicted
+
+def claim_next_job():
+    """Reserva atomicamente o job mais antigo da fila"""
+    conn = _get_db_conn()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        job = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+        ).fetchone()
+        if job:
+            conn.execute('''
+                UPDATE jobs SET status = 'running', started_at = ?, worker_pid = ?,
+                                attempts = attempts + 1
+                WHERE id = ?
+            ''', (datetime.now(), os.getpid(), job['id']))
+        conn.commit()
+        return job
+    finally:
+        conn.close()
+
+def run_job(job):
+    """Executa um job: metadados, filtros, thumbnails e registro no banco"""
+    start_time = time.time()
+    payload = json.loads(job['payload'])
+    video_id = job['video_id']
+    filters = payload.get('filters') or [payload['filter']]
+    filter_name = filters[0]
+    renditions_only = payload.get('renditions_only', False)
+    dirs = _video_dirs(app.config['MEDIA_ROOT'] / payload['base_path'])
+    original_path = app.config['MEDIA_ROOT'] / payload['original_path']
+    outputs = {}
+    conn = None
+    
+    try:
+        logger.info(f"Job {job['id']} started for video {video_id} ({', '.join(filters)})")
+        
+        # Obter metadados (uma única sonda, reaproveitada pelos estágios seguintes)
+        metadata = get_video_metadata(original_path, job['checksum_md5'])
+        
+        # Processar vídeo: uma saída por filtro, todas a partir da mesma decodificação
+        for name in filters:
+            filter_dir = dirs['processed'] / FilterChain.parse(name).slug
+            filter_dir.mkdir(parents=True, exist_ok=True)
+            outputs[name] = filter_dir / f"video.{payload['extension']}"
+        
+        # Thumbnails e sprite sheet (somente no primeiro processamento) são capturados na mesma passada
+        taps = []
+        if not renditions_only:
+            source = filter_name if app.config['THUMBNAIL_SOURCE'] == 'processed' else None
+            thumb_tap = FrameTap(thumbnail_indices(metadata['frame_count']), source)
+            taps.append(thumb_tap)
+            if app.config['SPRITE_FRAMES'] > 0:
+                sprite_tap = FrameTap(thumbnail_indices(metadata['frame_count'], app.config['SPRITE_FRAMES']),
+                                      source, app.config['SPRITE_TILE_WIDTH'])
+                taps.append(sprite_tap)
+        
+        # Vídeos longos são divididos em segmentos processados em paralelo
+        pipeline_stats = {}
+        hls_segment_sec = app.config['HLS_SEGMENT_SEC'] if app.config['HLS_OUTPUT'] else None
+        # Cada um dos JOB_WORKERS jobs simultâneos fica com sua parte dos núcleos
+        segment_workers = (app.config['SEGMENT_WORKERS']
+                           or max(1, (os.cpu_count() or 1) // app.config['JOB_WORKERS']))
+        if segment_workers > 1 and metadata['frame_count'] >= app.config['PARALLEL_MIN_FRAMES']:
+            processed = VideoProcessor.process_renditions_parallel(
+                original_path, outputs, segment_workers, stats=pipeline_stats,
+                probe=metadata, taps=taps, hls_segment_sec=hls_segment_sec
+            )
+        else:
+            processed = VideoProcessor.process_renditions(original_path, outputs, stats=pipeline_stats,
+                                                          probe=metadata, taps=taps,
+                                                          hls_segment_sec=hls_segment_sec)
+        if not processed:
+            raise RuntimeError('Failed to process video')
+        
+        if not renditions_only:
+            if thumb_tap.frames:
+                thumbnail_path, preview_gif_path = save_thumbnails(thumb_tap.ordered_frames(), dirs['thumbs'])
+            else:
+                # A contagem de frames do container não bateu com o stream: usar seeks
+                thumbnail_path, preview_gif_path = generate_thumbnails(original_path, dirs['thumbs'])
+            sprite_path = None
+            if app.config['SPRITE_FRAMES'] > 0:
+                sprite_path = save_sprite_sheet(sprite_tap.frames, metadata['fps'], dirs['thumbs'],
+                                                app.config['SPRITE_COLUMNS'])
+        
+        processing_time = time.time() - start_time
+        
+        # Registrar o vídeo, suas versões e concluir o job na mesma transação
+        conn = _get_db_conn()
+        if not renditions_only:
+            conn.execute('''
+                INSERT INTO videos (
+                    id, original_name, original_ext, mime_type, size_bytes,
+                    duration_sec, fps, width, height, filter, created_at,
+                    path_original, path_processed, checksum_md5, processing_time_sec,
+                    thumbnail_path, preview_gif_path, sprite_path
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                video_id, payload['original_name'], payload['extension'], f"video/{payload['extension']}",
+                metadata['size_bytes'], metadata['duration_sec'], metadata['fps'],
+                metadata['width'], metadata['height'], filter_name, datetime.now(),
+                payload['original_path'], _relative_media_path(outputs[filter_name]),
+                job['checksum_md5'], processing_time, thumbnail_path, preview_gif_path, sprite_path
+            ))
+        now = datetime.now()
+        renditions = []
+        for name, path in outputs.items():
+            # O tamanho inclui os segmentos HLS, que ficam no mesmo diretório da versão
+            playlist = VideoProcessor.hls_dir(path) / 'index.m3u8'
+            size_bytes = sum(f.stat().st_size for f in path.parent.rglob('*') if f.is_file())
+            stream_path = _relative_media_path(playlist) if playlist.exists() else None
+            renditions.append((video_id, name, _relative_media_path(path), size_bytes, now, now, stream_path))
+        conn.executemany(
+            '''INSERT OR REPLACE INTO renditions (video_id, filter, path, size_bytes, created_at, last_accessed, stream_path)
+               VALUES (?, ?, ?, ?, ?, ?, ?)''',
+            renditions
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'done', finished_at = ?, result = ? WHERE id = ?",
+            (datetime.now(), json.dumps({
+                'processing_time_sec': processing_time,
+                'pipeline': pipeline_stats
+            }), job['id'])
+        )
+        conn.commit()
+        
+        # Manter as versões extras dentro da cota de disco
+        evict_renditions(conn, keep_video_id=video_id)
+        video_cache.invalidate(video_id)
+        
+        logger.info(f"Video {video_id} processed successfully in {processing_time:.2f}s")
+    
+    except Exception as e:
+        logger.error(f"Job {job['id']} failed: {e}", exc_info=True)
+        if renditions_only:
+            # O original e as versões anteriores continuam válidos
+            for path in outputs.values():
+                shutil.rmtree(path.parent, ignore_errors=True)
+        else:
+            shutil.rmtree(dirs['base'], ignore_errors=True)
+        if conn is None:
+            conn = _get_db_conn()
+        else:
+            # Descarta o registro parcial antes de marcar a falha
+            conn.rollback()
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ?",
+            (datetime.now(), str(e), job['id'])
+        )
+        conn.commit()
+    
+    finally:
+        if conn is not None:
+            conn.close()
+
+def process_next_job():
+    """Processa o próximo job da fila; retorna False se a fila estiver vazia"""
+    job = claim_next_job()
+    if job is None:
+        return False
+    run_job(job)
+    return True
+
+def job_worker_loop(stop_event):
+    """Loop de cada processo worker: consome a fila até receber o sinal de parada"""
+    logger.info(f"Job worker started (pid {os.getpid()})")
+    try:
+        while not stop_event.is_set():
+            if not process_next_job():
+                stop_event.wait(app.config['JOB_POLL_INTERVAL'])
+    except KeyboardInterrupt:
+        pass
+    logger.info(f"Job worker stopped (pid {os.getpid()})")
+
+def release_running_jobs(conn, worker_pid=None):
+    """Devolve à fila os jobs 'running' (todos ou só os de um worker) e retorna (requeued, failed)
+    
+    Um job que já consumiu JOB_MAX_ATTEMPTS tentativas falha em vez de voltar à fila, para que
+    um vídeo que derruba o worker (ex.: segfault no OpenCV) não seja reprocessado para sempre.
+    """
+    where = "status = 'running'"
+    params = ()
+    if worker_pid is not None:
+        where += ' AND worker_pid = ?'
+        params = (worker_pid,)
+    failed = conn.execute(
+        f"""UPDATE jobs SET status = 'failed', finished_at = ?, worker_pid = NULL,
+               error = 'Job interrupted ' || attempts || ' times (worker stopped or crashed)'
+            WHERE {where} AND attempts >= ?""",
+        (datetime.now(), *params, app.config['JOB_MAX_ATTEMPTS'])
+    ).rowcount
+    requeued = conn.execute(
+        f"UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE {where}", params
+    ).rowcount
+    conn.commit()
+    return requeued, failed
+
+def recover_stale_jobs():
+    """Devolve à fila jobs que ficaram 'running' após uma parada do servidor"""
+    conn = _get_db_conn()
+    try:
+        recovered, failed = release_running_jobs(conn)
+    finally:
+        conn.close()
+    if recovered:
+        logger.warning(f"Requeued {recovered} interrupted jobs")
+    if failed:
+        logger.error(f"Failed {failed} jobs that reached JOB_MAX_ATTEMPTS")
+
+def _start_worker_process(ctx, target, name):
+    """Cria e inicia um processo do pool (worker da fila ou manutenção)"""
+    worker = ctx.Process(target=target, args=(_job_stop_event,), name=name)
+    worker.start()
+    return worker
+
+def supervise_job_workers(ctx, stop_event):
+    """Thread do processo principal que recria workers mortos
+    
+    Um worker que morre sem passar pelo except de run_job (segfault, OOM killer) deixaria seu
+    job 'running' até o próximo reinício; aqui o job é devolvido à fila (ou falha, se já usou
+    JOB_MAX_ATTEMPTS tentativas) e o processo é substituído.
+    """
+    while not stop_event.wait(app.config['JOB_SUPERVISE_INTERVAL']):
+        with _job_workers_lock:
+            if stop_event.is_set():
+                return
+            for i, worker in enumerate(_job_workers):
+                if worker.is_alive():
+                    continue
+                logger.error(f"{worker.name} (pid {worker.pid}) exited with code {worker.exitcode}, restarting")
+                conn = _get_db_conn()
+                try:
+                    requeued, failed = release_running_jobs(conn, worker.pid)
+                finally:
+                    conn.close()
+                if requeued or failed:
+                    logger.warning(f"Jobs of pid {worker.pid}: {requeued} requeued, {failed} failed")
+                target = maintenance_loop if worker.name == 'maintenance' else job_worker_loop
+                _job_workers[i] = _start_worker_process(ctx, target, worker.name)
+
+def start_job_workers():
+    """Inicia o pool de processos que consomem a fila de jobs e a thread que o supervisiona"""
+    global _job_stop_event, _job_workers_pid
+    recover_stale_jobs()
+    
+    # 'spawn' evita herdar conexões SQLite e threads do processo do Flask.
+    # Os workers não são daemon para poderem criar seus próprios subprocessos.
+    ctx = multiprocessing.get_context('spawn')
+    _job_stop_event = StopSignal(ctx)
+    _job_workers_pid = os.getpid()
+    for i in range(app.config['JOB_WORKERS']):
+        _job_workers.append(_start_worker_process(ctx, job_worker_loop, f"job-worker-{i + 1}"))
+    logger.info(f"Started {len(_job_workers)} job workers")
+    
+    # A manutenção do armazenamento usa o mesmo evento de parada
+    if app.config['MAINTENANCE_INTERVAL'] > 0:
+        _job_workers.append(_start_worker_process(ctx, maintenance_loop, 'maintenance'))
+    
+    threading.Thread(target=supervise_job_workers, args=(ctx, _job_stop_event),
+                     name='job-supervisor', daemon=True).start()
+    atexit.register(stop_job_workers)
+
+def stop_job_workers(timeout=10):
+    """Sinaliza parada aos workers e aguarda o término (jobs interrompidos voltam à fila)"""
+    if _job_workers_pid != os.getpid():
+        # Processo filho de um fork (ex.: worker do gunicorn): os workers não são dele
+        return
+    if _job_stop_event is not None:
+        _job_stop_event.set()
+    with _job_workers_lock:
+        for worker in _job_workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+        _job_workers.clear()
+
+# --- MANUTENÇÃO DO ARMAZENAMENTO ---
+# Um processo de baixa prioridade acorda a cada MAINTENANCE_INTERVAL segundos para esvaziar a
+# lixeira (TRASH_RETENTION), apagar temporários e diretórios sem registro no banco e aplicar
+# STORAGE_QUOTA. As remoções passam por um IOThrottle para não disputar o disco com os workers.
+
+class IOThrottle:
+    """Limita o ritmo das remoções da manutenção (MAINTENANCE_IO_RATE e MAINTENANCE_FILE_RATE)
+    
+    Cada arquivo reserva seu custo (bytes e 1 arquivo) em uma linha do tempo; se a reserva
+    estiver à frente do relógio, a chamada espera a diferença. A espera usa o evento de parada,
+    então um pedido de parada interrompe a manutenção em vez de atrasar o encerramento.
+    Taxas 0 desativam o respectivo limite.
+    """
+    
+    def __init__(self, bytes_per_sec=0, files_per_sec=0, stop_event=None):
+        self.bytes_per_sec = bytes_per_sec
+        self.files_per_sec = files_per_sec
+        self.stop_event = stop_event
+        self.stopped = False
+        self.next_at = time.monotonic()
+    
+    def consume(self, size_bytes=0, files=1):
+        """Aguarda a vez de uma operação; retorna False se a parada foi pedida"""
+        if self.stop_event is not None and self.stop_event.is_set():
+            self.stopped = True
+        if self.stopped:
+            return False
+        
+        now = time.monotonic()
+        start = max(self.next_at, now)
+        cost = max(files / self.files_per_sec if self.files_per_sec else 0,
+                   size_bytes / self.bytes_per_sec if self.bytes_per_sec else 0)
+        self.next_at = start + cost
+        if start > now:
+            if self.stop_event is not None:
+                self.stopped = self.stop_event.wait(start - now)
+            else:
+                time.sleep(start - now)
+        return not self.stopped
+
+def _tree_size(path):
+    """Soma o tamanho dos arquivos sob `path` (0 se não existir)"""
+    total = 0
+    for root, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                continue
+    return total
+
+def remove_tree(path, throttle):
+    """Apaga um arquivo ou diretório arquivo a arquivo, no ritmo do throttle
+    
+    Retorna os bytes liberados; se a parada for pedida no meio, o restante fica para a
+    próxima passada.
+    """
+    path = Path(path)
+    if not path.is_dir() or path.is_symlink():
+        try:
+            size = path.lstat().st_size
+        except FileNotFoundError:
+            return 0
+        if not throttle.consume(size):
+            return 0
+        path.unlink(missing_ok=True)
+        return size
+    
+    freed = 0
+    for root, dirnames, filenames in os.walk(path, topdown=False):
+        for name in filenames + [d for d in dirnames if os.path.islink(os.path.join(root, d))]:
+            file_path = os.path.join(root, name)
+            try:
+                size = os.lstat(file_path).st_size
+            except FileNotFoundError:
+                continue
+            if not throttle.consume(size):
+                return freed
+            try:
+                os.unlink(file_path)
+            except FileNotFoundError:
+                continue
+            freed += size
+        try:
+            os.rmdir(root)
+        except OSError:
+            pass
+    return freed
+
+def move_to_trash(conn, video_id, path_original):
+    """Move o diretório de um vídeo para a lixeira e remove seus registros (com commit)
+    
+    O mtime do diretório na lixeira passa a marcar a remoção, que é o que conta para
+    TRASH_RETENTION. Retorna o diretório na lixeira ou None se não havia arquivos.
+    """
+    original_path = app.config['MEDIA_ROOT'] / path_original
+    trash_dir = None
+    if original_path.exists():
+        video_dir = original_path.parent.parent
+        trash_dir = app.config['MEDIA_ROOT'] / 'trash' / video_id
+        shutil.move(str(video_dir), str(trash_dir))
+        os.utime(trash_dir)
+    
+    conn.execute('DELETE FROM videos WHERE id = ?', (video_id,))
+    conn.execute('DELETE FROM renditions WHERE video_id = ?', (video_id,))
+    conn.commit()
+    thumbnail_cache.invalidate(video_id)
+    video_cache.invalidate(video_id)
+    return trash_dir
+
+def purge_trash(throttle, retention=None, free_bytes=0):
+    """Apaga da lixeira os vídeos removidos há mais de `retention` segundos (TRASH_RETENTION)
+    
+    Com `free_bytes` (cota de armazenamento), continua pelos mais antigos ainda dentro da
+    retenção até liberar esse total. Retorna os bytes liberados.
+    """
+    if retention is None:
+        retention = app.config['TRASH_RETENTION']
+    cutoff = time.time() - retention
+    entries = []
+    for path in (app.config['MEDIA_ROOT'] / 'trash').iterdir():
+        try:
+            entries.append((path.lstat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    
+    freed = purged = 0
+    for mtime, path in sorted(entries):
+        if (mtime >= cutoff and freed >= free_bytes) or throttle.stopped:
+            break
+        freed += remove_tree(path, throttle)
+        purged += 1
+    if purged:
+        logger.info(f"Purged {purged} trash item(s), freed {freed / (1024 * 1024):.1f}MB")
+    return freed
+
+def _orphan_candidates(base, cutoff):
+    """Entradas de `base` sem alteração desde `cutoff` (mtime), como (nome, caminho)"""
+    candidates = []
+    for path in base.iterdir():
+        try:
+            if path.lstat().st_mtime < cutoff:
+                candidates.append((path.name, path))
+        except FileNotFoundError:
+            continue
+    return candidates
+
+def remove_orphans(conn, throttle):
+    """Remove o que ficou no disco sem registro no banco, parado há mais de ORPHAN_GRACE segundos
+    
+    - incoming/: partes (.part), temporários (_temp.) e arquivos (.upload) que não pertencem
+      a uma sessão ativa (uploads interrompidos);
+    - videos/AAAA/MM/DD/<id>: diretórios sem vídeo e sem job ativo vão para a lixeira;
+    - processed/<filtro> de vídeos existentes sem linha em renditions (e sem job ativo);
+    - diretórios de data vazios.
+    Retorna os bytes liberados (diretórios enviados à lixeira não contam).
+    """
+    cutoff = time.time() - app.config['ORPHAN_GRACE']
+    freed = 0
+    
+    _expire_upload_sessions(conn)
+    sessions = {row['id'] for row in conn.execute('SELECT id FROM uploads')}
+    for name, path in _orphan_candidates(app.config['UPLOAD_FOLDER'], cutoff):
+        if name.endswith('.upload') and name[:-len('.upload')] in sessions:
+            continue
+        freed += remove_tree(path, throttle)
+    
+    active = {row['video_id'] for row in conn.execute(
+        "SELECT DISTINCT video_id FROM jobs WHERE status IN ('queued', 'running')"
+    )}
+    videos_root = app.config['MEDIA_ROOT'] / 'videos'
+    today = datetime.now().strftime('%Y/%m/%d')
+    moved = 0
+    for day_dir in sorted(videos_root.glob('*/*/*')):
+        if throttle.stopped:
+            break
+        if not day_dir.is_dir():
+            continue
+        entries = [(path.name, path) for path in day_dir.iterdir() if path.name not in active]
+        for start in range(0, len(entries), 500):
+            batch = dict(entries[start:start + 500])
+            placeholders = ', '.join('?' * len(batch))
+            known = {row['id'] for row in conn.execute(
+                f'SELECT id FROM videos WHERE id IN ({placeholders})', tuple(batch)
+            )}
+            renditions = {}
+            for row in conn.execute(
+                f'SELECT video_id, path FROM renditions WHERE video_id IN ({placeholders})', tuple(batch)
+            ):
+                renditions.setdefault(row['video_id'], set()).add(Path(row['path']).parent.name)
+            
+            for video_id, path in batch.items():
+                if throttle.stopped:
+                    break
+                if video_id not in known:
+                    try:
+                        if path.lstat().st_mtime >= cutoff:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    trash_dir = app.config['MEDIA_ROOT'] / 'trash' / video_id
+                    if trash_dir.exists():
+                        trash_dir = trash_dir.with_name(f"{video_id}.{uuid.uuid4().hex[:8]}")
+                    shutil.move(str(path), str(trash_dir))
+                    os.utime(trash_dir)
+                    moved += 1
+                    continue
+                processed = path / 'processed'
+                if not processed.is_dir():
+                    continue
+                for slug, rendition_dir in _orphan_candidates(processed, cutoff):
+                    if slug not in renditions.get(video_id, set()):
+                        freed += remove_tree(rendition_dir, throttle)
+        
+        # Diretórios de data vazios (o do dia atual ainda recebe uploads)
+        if day_dir.relative_to(videos_root).as_posix() != today:
+            for directory in (day_dir, day_dir.parent, day_dir.parent.parent):
+                try:
+                    if any(directory.iterdir()):
+                        break
+                    directory.rmdir()
+                except OSError:
+                    # Um upload gravou no diretório entre a verificação e a remoção
+                    continue
+    
+    if moved:
+        logger.warning(f"Moved {moved} orphaned video directories to trash")
+    if freed:
+        logger.info(f"Removed orphaned files, freed {freed / (1024 * 1024):.1f}MB")
+    return freed
+
+def storage_usage(conn):
+    """Uso estimado do MEDIA_ROOT para STORAGE_QUOTA
+    
+    Originais e versões vêm dos contadores de video_stats (sem percorrer videos/); lixeira,
+    uploads em andamento e thumbnails redimensionados são medidos no disco.
+    """
+    row = conn.execute("SELECT size_bytes, rendition_bytes FROM video_stats WHERE filter = ''").fetchone()
+    usage = {
+        'original_bytes': row['size_bytes'] if row else 0,
+        'rendition_bytes': row['rendition_bytes'] if row else 0,
+        'trash_bytes': _tree_size(app.config['MEDIA_ROOT'] / 'trash'),
+        'incoming_bytes': _tree_size(app.config['UPLOAD_FOLDER']),
+        'thumbnail_cache_bytes': _tree_size(thumbnail_cache.directory)
+    }
+    usage['total_bytes'] = sum(usage.values())
+    return usage
+
+def enforce_storage_quota(conn, throttle):
+    """Aplica STORAGE_QUOTA seguindo as políticas de STORAGE_EVICTION, em ordem
+    
+    - 'trash': esvazia a lixeira antes do fim da retenção (mais antigos primeiro);
+    - 'thumbnails': reduz o cache de thumbnails redimensionados (LRU);
+    - 'renditions': remove versões extras por LRU (nunca a principal);
+    - 'videos': remove por completo os vídeos mais antigos (destrutiva, fora do padrão).
+    Retorna os bytes liberados.
+    """
+    quota = app.config['STORAGE_QUOTA']
+    if not quota:
+        return 0
+    excess = storage_usage(conn)['total_bytes'] - quota
+    freed = 0
+    
+    for policy in app.config['STORAGE_EVICTION']:
+        needed = excess - freed
+        if needed <= 0 or throttle.stopped:
+            break
+        if policy == 'trash':
+            freed += purge_trash(throttle, free_bytes=needed)
+        elif policy == 'thumbnails':
+            freed += thumbnail_cache.trim(needed)
+        elif policy == 'renditions':
+            total = conn.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM renditions').fetchone()[0]
+            evict_renditions(conn, quota=max(total - needed, 0), throttle=throttle)
+            freed += total - conn.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM renditions').fetchone()[0]
+        elif policy == 'videos':
+            for video in conn.execute('''
+                SELECT v.id, v.path_original FROM videos v
+                WHERE NOT EXISTS (SELECT 1 FROM jobs j WHERE j.video_id = v.id AND j.status IN ('queued', 'running'))
+                ORDER BY v.created_at, v.id
+            ''').fetchall():
+                if excess - freed <= 0 or throttle.stopped:
+                    break
+                logger.warning(f"Storage quota exceeded: deleting video {video['id']}")
+                trash_dir = move_to_trash(conn, video['id'], video['path_original'])
+                if trash_dir is not None:
+                    freed += remove_tree(trash_dir, throttle)
+        else:
+            logger.warning(f"Unknown storage eviction policy: {policy}")
+    
+    if excess - freed > 0:
+        logger.warning(f"Storage quota still exceeded by {(excess - freed) / (1024 * 1024):.1f}MB")
+    return freed
+
+def run_maintenance(stop_event=None):
+    """Uma passada completa da manutenção; retorna os bytes liberados por etapa"""
+    throttle = IOThrottle(app.config['MAINTENANCE_IO_RATE'], app.config['MAINTENANCE_FILE_RATE'], stop_event)
+    conn = _get_db_conn()
+    try:
+        return {
+            'trash': purge_trash(throttle),
+            'orphans': remove_orphans(conn, throttle),
+            'quota': enforce_storage_quota(conn, throttle)
+        }
+    finally:
+        conn.close()
+
+def maintenance_loop(stop_event):
+    """Loop do processo de manutenção: uma passada a cada MAINTENANCE_INTERVAL segundos"""
+    if hasattr(os, 'nice'):
+        # Prioridade menor que a dos workers (o escalonador de E/S do Linux também a considera)
+        os.nice(10)
+    logger.info(f"Maintenance worker started (pid {os.getpid()})")
+    try:
+        while not stop_event.wait(app.config['MAINTENANCE_INTERVAL']):
+            try:
+                run_maintenance(stop_event)
+            except Exception as e:
+                logger.error(f"Maintenance pass failed: {e}", exc_info=True)
+    except KeyboardInterrupt:
+        pass
+    logger.info(f"Maintenance worker stopped (pid {os.getpid()})")
+
+def _job_to_dict(job, base_url):
+    """Serializa um job para a API"""
+    data = {
+        'id': job['id'],
+        'video_id': job['video_id'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'error': job['error'],
+        'status_url': f"{base_url}/api/jobs/{job['id']}"
+    }
+    if job['result']:
+        data.update(json.loads(job['result']))
+    return data
+
+def _job_streams(job, base_url):
+    """Playlists HLS já publicadas por um job em andamento (filtro -> URL)"""
+    payload = json.loads(job['payload'])
+    processed = app.config['MEDIA_ROOT'] / payload['base_path'] / 'processed'
+    streams = {}
+    for name in payload.get('filters') or [payload['filter']]:
+        output_path = processed / FilterChain.parse(name).slug / f"video.{payload['extension']}"
+        playlist = VideoProcessor.hls_dir(output_path) / 'index.m3u8'
+        if playlist.exists():
+            streams[name] = f"{base_url}/media/{_relative_media_path(playlist)}"
+    return streams
+
+def _discard_upload(file, temp_path=None):
+    """Descarta o arquivo recebido (duplicata ou erro)"""
+    file.close()
+    if temp_path is not None and temp_path.exists():
+        os.remove(temp_path)
+
+def _received_file(file, original_name):
+    """Checksum do arquivo de formulário e como movê-lo: retorna (checksum, move_to, caminho temporário ou None)"""
+    if isinstance(file.stream, HashingUpload):
+        # Arquivo já gravado em UPLOAD_FOLDER e hasheado durante o recebimento
+        return file.stream.hexdigest(), file.stream.move_to, None
+    
+    temp_path = app.config['UPLOAD_FOLDER'] / f"{uuid.uuid4()}_temp.{original_name.rsplit('.', 1)[1].lower()}"
+    file.save(str(temp_path))
+    return calculate_md5(temp_path), lambda destination: shutil.move(str(temp_path), str(destination)), temp_path
+
+def _upload_session_path(upload_id):
+    """Arquivo que recebe as partes de uma sessão de upload retomável"""
+    return app.config['UPLOAD_FOLDER'] / f"{upload_id}.upload"
+
+def _chunk_ranges(indexes):
+    """Compacta índices ordenados de partes em intervalos [início, fim]"""
+    ranges = []
+    for index in indexes:
+        if ranges and ranges[-1][1] == index - 1:
+            ranges[-1][1] = index
+        else:
+            ranges.append([index, index])
+    return ranges
+
+def _expire_upload_sessions(conn):
+    """Remove sessões de upload sem atividade há mais de UPLOAD_SESSION_TTL segundos"""
+    cutoff = datetime.fromtimestamp(time.time() - app.config['UPLOAD_SESSION_TTL'])
+    expired = [row['id'] for row in conn.execute(
+        'SELECT id FROM uploads WHERE updated_at < ?', (cutoff,)
+    ).fetchall()]
+    for upload_id in expired:
+        _upload_session_path(upload_id).unlink(missing_ok=True)
+        conn.execute('DELETE FROM upload_chunks WHERE upload_id = ?', (upload_id,))
+        conn.execute('DELETE FROM uploads WHERE id = ?', (upload_id,))
+    if expired:
+        conn.commit()
+        logger.info(f"Expired {len(expired)} stale upload session(s)")
+
+def _requested_filters(filter_specs=None):
+    """Lê e valida os filtros pedidos (campos `filter` do formulário por padrão); retorna (filtros, resposta de erro)"""
+    if filter_specs is None:
+        filter_specs = request.form.getlist('filter')
+    filter_specs = filter_specs or ['grayscale']
+    try:
+        filters = list(dict.fromkeys(FilterChain.parse(spec).name for spec in filter_specs))
+    except ValueError as e:
+        return None, (jsonify({'error': f'Invalid filter ({e}). Available: {", ".join(AVAILABLE_FILTERS)}, '
+                                        f'or a comma-separated chain such as "blur,pixelate"'}), 400)
+    
+    if len(filters) > app.config['MAX_RENDITIONS']:
+        return None, (jsonify({'error': f"Too many filters (max {app.config['MAX_RENDITIONS']} per upload)"}), 400)
+    return filters, None
+
+def _json_filters(data):
+    """Filtros de um corpo JSON (`filters` ou `filter`: nome, cadeia ou lista deles); retorna (filtros, resposta de erro)"""
+    specs = data.get('filters') or data.get('filter') or []
+    if isinstance(specs, str):
+        specs = [specs]
+    if not isinstance(specs, list) or not all(isinstance(spec, str) for spec in specs):
+        return None, (jsonify({'error': 'Invalid filter (expected a filter name, a comma-separated chain '
+                                        'or a list of them)'}), 400)
+    return _requested_filters(specs)
+
+def _renditions_response(conn, video, filters):
+    """Responde a um pedido de versões de um vídeo armazenado: 200 se tudo estiver em cache, senão 202"""
+    cached, job_id = request_renditions(conn, video, filters)
+    conn.commit()
+    base_url = request.host_url.rstrip('/')
+    
+    if job_id is None:
+        version = video_cache.video_version(conn, video['id'])
+        info = _video_info(conn, video, base_url)
+        conn.close()
+        video_cache.put(video['id'], base_url, info, version)
+        logger.info(f"Cache hit for video {video['id']} ({', '.join(filters)})")
+        return jsonify({
+            'success': True,
+            'video_id': video['id'],
+            'filters': filters,
+            'cached': cached,
+            'status': 'done',
+            'info': info
+        }), 200
+    
+    status = conn.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()['status']
+    conn.close()
+    # As versões pedidas vão mudar o registro quando o job terminar
+    video_cache.invalidate(video['id'])
+    logger.info(f"Video {video['id']} reused from cache; missing renditions in job {job_id}")
+    return _accepted_response(job_id, video['id'], filters, status, cached=cached)
+
+def _accepted_response(job_id, video_id, filters, status, **extra):
+    """Resposta 202 apontando para o job que processa o vídeo"""
+    status_url = f"{request.host_url.rstrip('/')}/api/jobs/{job_id}"
+    response = jsonify({
+        'success': True,
+        'job_id': job_id,
+        'video_id': video_id,
+        'filters': filters,
+        **extra,
+        'status': status,
+        'status_url': status_url
+    })
+    response.headers['Location'] = status_url
+    return response, 202
+
+def _known_content_response(conn, checksum, filters):
+    """Resposta para um checksum já conhecido pelo servidor, ou None se o conteúdo for novo
+    
+    Conteúdo armazenado reaproveita o original e o cache de versões; conteúdo ainda na primeira
+    passagem pela fila aponta para o job em andamento. A conexão é fechada quando há resposta.
+    """
+    stored = conn.execute('SELECT * FROM videos WHERE checksum_md5 = ?', (checksum,)).fetchone()
+    if stored:
+        return _renditions_response(conn, stored, filters)
+    
+    pending = conn.execute(
+        "SELECT * FROM jobs WHERE checksum_md5 = ? AND status IN ('queued', 'running') ORDER BY created_at",
+        (checksum,)
+    ).fetchone()
+    if pending:
+        conn.close()
+        payload = json.loads(pending['payload'])
+        if set(filters) <= set(payload.get('filters') or [payload['filter']]):
+            return _accepted_response(pending['id'], pending['video_id'], filters, pending['status'])
+        return jsonify({'error': 'Video is still being processed; request other filters when it finishes',
+                        'existing_id': pending['video_id'], 'job_id': pending['id']}), 409
+    return None
+
+def _accept_upload(checksum, original_name, filters, move_to, discard):
+    """Registra um arquivo recebido por completo (upload simples ou em partes)
+    
+    Conteúdo já armazenado reaproveita o original e o cache de versões; conteúdo novo é
+    movido com `move_to(destino)` para a pasta do vídeo e enfileirado. `discard()` apaga o
+    arquivo recebido quando ele não é aproveitado.
+    """
+    video_id = str(uuid.uuid4())
+    extension = original_name.rsplit('.', 1)[1].lower()
+    
+    conn = _get_db_conn()
+    known = _known_content_response(conn, checksum, filters)
+    if known:
+        discard()
+        return known
+    
+    # Criar estrutura de diretórios e mover arquivo original
+    dirs = create_directory_structure(video_id)
+    original_path = dirs['original'] / f"video.{extension}"
+    move_to(original_path)
+    
+    # Enfileirar processamento
+    job_id = enqueue_job(conn, video_id, checksum, {
+        'filter': filters[0],
+        'filters': filters,
+        'original_name': original_name,
+        'extension': extension,
+        'base_path': _relative_media_path(dirs['base']),
+        'original_path': _relative_media_path(original_path)
+    })
+    conn.commit()
+    conn.close()
+    
+    logger.info(f"Video {video_id} queued as job {job_id} ({', '.join(filters)})")
+    return _accepted_response(job_id, video_id, filters, 'queued')
+
+# --- ROTAS DA API ---
+@app.route('/')
+def index():
+    """Página inicial"""
+    return jsonify({
+        'status': 'online',
+        'service': 'Video Processing Server',
+        'version': '1.0.2',
+        'endpoints': {
+            'upload': '/api/upload',
+            'preflight': '/api/upload/preflight',
+            'uploads': '/api/uploads',
+            'batch_upload': '/api/batch/upload',
+            'batch_videos': '/api/batch/videos?ids=<uuid>,<uuid>',
+            'videos': '/api/videos',
+            'stats': '/api/stats',
+            'search': '/api/search?q=<text>',
+            'video': '/api/video/<uuid>',
+            'renditions': '/api/video/<uuid>/renditions',
+            'job': '/api/jobs/<uuid>',
+            'thumbnail': '/thumb/<uuid>?w=<width>&fmt=<jpg|webp|png>',
+            'gallery': '/gallery',
+            'health': '/api/health'
+        }
+    })
+
+@app.route('/api/health')
+def health_check():
+    """Health check endpoint"""
+    try:
+        conn = _get_db_conn()
+        video_count = conn.execute('SELECT COUNT(*) FROM videos').fetchone()[0]
+        conn.close()
+        
+        total, used, free = shutil.disk_usage(app.config['MEDIA_ROOT'])
+        free_gb = free / (1024**3)
+        
+        return jsonify({
+            'status': 'healthy',
+            'videos_in_db': video_count,
+            'disk_free_gb': round(free_gb, 2),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Health check failed: {e}")
+        return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
+
+@app.route('/api/upload', methods=['POST'])
+def upload_video():
+    """Endpoint para upload de vídeo: salva o original e enfileira o processamento"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file provided'}), 400
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    if not allowed_file(file.filename):
+        return jsonify({'error': f'File type not allowed. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
+    
+    filters, error = _requested_filters()
+    if error:
+        return error
+    
+    original_name = secure_filename(file.filename)
+    temp_path = None
+    
+    try:
+        checksum, move_to, temp_path = _received_file(file, original_name)
+        return _accept_upload(checksum, original_name, filters, move_to,
+                              lambda: _discard_upload(file, temp_path))
+        
+    except Exception as e:
+        logger.error(f"Upload error: {e}", exc_info=True)
+        _discard_upload(file, temp_path)
+        return jsonify({'error': 'An internal error occurred during upload'}), 500
+
+@app.route('/api/upload/preflight', methods=['POST'])
+def upload_preflight():
+    """Consulta pelo checksum antes do upload: conteúdo conhecido é processado sem transferir bytes
+    
+    Corpo JSON: checksum (MD5) e filters (ou filter). Responde como o upload (200 em cache,
+    202 com o job) quando o servidor já tem o conteúdo, ou 404 quando o arquivo precisa ser enviado.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    checksum = str(data.get('checksum') or '').lower()
+    
+    if not re.fullmatch(r'[0-9a-f]{32}', checksum):
+        return jsonify({'error': 'Invalid checksum (expected an MD5 hex digest)'}), 400
+    
+    filters, error = _json_filters(data)
+    if error:
+        return error
+    
+    try:
+        conn = _get_db_conn()
+        known = _known_content_response(conn, checksum, filters)
+        if known:
+            logger.info(f"Preflight hit for {checksum}: upload skipped")
+            return known
+        
+        conn.close()
+        return jsonify({'known': False, 'message': 'Content not stored; upload required'}), 404
+        
+    except Exception as e:
+        logger.error(f"Preflight error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def _item_result(result):
+    """Converte a resposta de um item (como as de upload, preflight e versões) em uma entrada do lote"""
+    response, status = result
+    return {**response.get_json(), 'status_code': status}
+
+def _batch_file(file, filters):
+    """Registra um arquivo de um envio em lote como em /api/upload"""
+    original_name = secure_filename(file.filename or '')
+    if not original_name or not allowed_file(original_name):
+        _discard_upload(file)
+        return {'filename': file.filename, 'status_code': 400,
+                'error': f'File type not allowed. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'}
+    
+    temp_path = None
+    try:
+        checksum, move_to, temp_path = _received_file(file, original_name)
+        result = _item_result(_accept_upload(checksum, original_name, filters, move_to,
+                                             lambda: _discard_upload(file, temp_path)))
+    except Exception as e:
+        logger.error(f"Batch upload error for {original_name}: {e}", exc_info=True)
+        _discard_upload(file, temp_path)
+        result = {'error': 'An internal error occurred during upload', 'status_code': 500}
+    return {'filename': file.filename, **result}
+
+def _batch_reference(item):
+    """Trata uma referência de um envio em lote: checksum (como o preflight) ou video_id (novas versões)"""
+    if not isinstance(item, dict):
+        return {'error': 'Each item must be an object with checksum or video_id', 'status_code': 400}
+    
+    filters, error = _json_filters(item)
+    if error:
+        return _item_result(error)
+    
+    conn = _get_db_conn()
     try:
-        conn = _get_db_conn()
-        video_count = conn.execute('SELECT COUNT(*) FROM videos').fetchone()[0]
-        conn.close()
+        if item.get('video_id'):
+            video = conn.execute('SELECT * FROM videos WHERE id = ?', (item['video_id'],)).fetchone()
+            if not video:
+                conn.close()
+                return {'video_id': item['video_id'], 'error': 'Video not found', 'status_code': 404}
+            return _item_result(_renditions_response(conn, video, filters))
         
-        total, used, free = shutil.disk_usage(app.config['MEDIA_ROOT'])
-        free_gb = free / (1024**3)
+        checksum = str(item.get('checksum') or '').lower()
+        if not re.fullmatch(r'[0-9a-f]{32}', checksum):
+            conn.close()
+            return {'error': 'Invalid checksum (expected an MD5 hex digest)', 'status_code': 400}
+        
+        known = _known_content_response(conn, checksum, filters)
+        if known:
+            return {'checksum': checksum, **_item_result(known)}
+        conn.close()
+        return {'checksum': checksum, 'known': False, 'message': 'Content not stored; upload required',
+                'status_code': 404}
         
-        return jsonify({
-            'status': 'healthy',
-            'videos_in_db': video_count,
-            'disk_free_gb': round(free_gb, 2),
-            'timestamp': datetime.now().isoformat()
-        })
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
+        logger.error(f"Batch reference error: {e}")
+        conn.close()
+        return {'error': str(e), 'status_code': 500}
 
-@app.route('/api/upload', methods=['POST'])
-def upload_video():
-    """Endpoint para upload e processamento de vídeo"""
-    start_time = time.time()
+@app.route('/api/batch/upload', methods=['POST'])
+def batch_upload():
+    """Envia vários vídeos, ou referências a conteúdo já armazenado, em uma só requisição
     
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
+    multipart/form-data: vários campos `file` e os `filter` aplicados a todos eles.
+    JSON: {"items": [{"checksum": md5, "filters": [...]}, {"video_id": id, "filters": [...]}]}.
+    Cada item é tratado como em /api/upload, /api/upload/preflight ou /api/video/<id>/renditions;
+    `results` traz, na ordem do pedido, a resposta de cada item com o seu `status_code`.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        items = data.get('items') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'No items provided'}), 400
+        if len(items) > app.config['BATCH_MAX_ITEMS']:
+            return jsonify({'error': f"Too many items (max {app.config['BATCH_MAX_ITEMS']} per batch)"}), 400
+        results = [_batch_reference(item) for item in items]
+    else:
+        files = request.files.getlist('file')
+        if not files:
+            return jsonify({'error': 'No file provided'}), 400
+        if len(files) > app.config['BATCH_MAX_ITEMS']:
+            return jsonify({'error': f"Too many files (max {app.config['BATCH_MAX_ITEMS']} per batch)"}), 400
+        
+        filters, error = _requested_filters()
+        if error:
+            return error
+        results = [_batch_file(file, filters) for file in files]
     
-    file = request.files['file']
-    filter_name = request.form.get('filter', 'grayscale')
+    # unknown: checksum não armazenado, o arquivo precisa ser enviado
+    summary = {'cached': 0, 'queued': 0, 'unknown': 0, 'failed': 0}
+    for result in results:
+        summary['cached' if result['status_code'] == 200 else
+                'queued' if result['status_code'] == 202 else
+                'unknown' if result.get('known') is False else 'failed'] += 1
+    logger.info(f"Batch of {len(results)} item(s): {summary['queued']} queued, "
+                f"{summary['cached']} cached, {summary['failed']} failed")
     
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+    return jsonify({'success': True, 'count': len(results), 'summary': summary, 'results': results})
+
+@app.route('/api/uploads', methods=['POST'])
+def create_upload_session():
+    """Abre uma sessão de upload em partes (retomável)
     
-    if not allowed_file(file.filename):
+    Corpo JSON: filename, size, filters (ou filter), chunk_size e checksum (MD5) opcionais.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    filename = data.get('filename')
+    original_name = secure_filename(filename) if isinstance(filename, str) else ''
+    
+    if not original_name or not allowed_file(original_name):
         return jsonify({'error': f'File type not allowed. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
     
-    if filter_name not in AVAILABLE_FILTERS:
-        return jsonify({'error': f'Invalid filter. Available: {", ".join(AVAILABLE_FILTERS)}'}), 400
+    try:
+        size = int(data.get('size'))
+        chunk_size = int(data.get('chunk_size') or app.config['UPLOAD_CHUNK_SIZE'])
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid size or chunk_size'}), 400
     
-    video_id = str(uuid.uuid4())
-    original_name = secure_filename(file.filename)
-    extension = original_name.rsplit('.', 1)[1].lower()
-    temp_path = app.config['UPLOAD_FOLDER'] / f"{video_id}_temp.{extension}"
+    if size <= 0:
+        return jsonify({'error': 'Invalid size'}), 400
+    if size > app.config['MAX_UPLOAD_SIZE']:
+        return jsonify({'error': 'File too large'}), 413
+    
+    filters, error = _json_filters(data)
+    if error:
+        return error
+    
+    checksum = data.get('checksum')
+    if checksum is not None:
+        if not isinstance(checksum, str) or not re.fullmatch(r'[0-9a-fA-F]{32}', checksum):
+            return jsonify({'error': 'Invalid checksum (expected an MD5 hex digest)'}), 400
+        checksum = checksum.lower()
+    
+    chunk_size = min(max(chunk_size, 256 * 1024), app.config['MAX_CHUNK_SIZE'])
+    total_chunks = (size + chunk_size - 1) // chunk_size
+    upload_id = str(uuid.uuid4())
     
     try:
-        # Salvar arquivo temporário
-        file.save(str(temp_path))
+        conn = _get_db_conn()
+        _expire_upload_sessions(conn)
+        
+        # Arquivo pré-alocado: cada parte é gravada direto na sua posição
+        with open(_upload_session_path(upload_id), 'wb') as f:
+            f.truncate(size)
+        
+        conn.execute('''
+            INSERT INTO uploads (id, original_name, size_bytes, chunk_size, total_chunks, filters,
+                                 checksum_md5, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (upload_id, original_name, size, chunk_size, total_chunks, json.dumps(filters),
+              checksum, datetime.now(), datetime.now()))
+        conn.commit()
+        conn.close()
         
-        # Calcular checksum
-        checksum = calculate_md5(temp_path)
+        logger.info(f"Upload session {upload_id} opened: {original_name} ({size} bytes, {total_chunks} chunks)")
+        
+        upload_url = f"{request.host_url.rstrip('/')}/api/uploads/{upload_id}"
+        response = jsonify({
+            'success': True,
+            'upload_id': upload_id,
+            'chunk_size': chunk_size,
+            'total_chunks': total_chunks,
+            'upload_url': upload_url
+        })
+        response.headers['Location'] = upload_url
+        return response, 201
         
-        # Verificar duplicatas
+    except Exception as e:
+        logger.error(f"Error opening upload session: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """Recebe uma parte do upload (corpo bruto); reenviar a mesma parte a substitui"""
+    try:
         conn = _get_db_conn()
-        cursor = conn.cursor()
-        duplicate = cursor.execute('SELECT id FROM videos WHERE checksum_md5 = ?', (checksum,)).fetchone()
+        session = conn.execute('SELECT * FROM uploads WHERE id = ?', (upload_id,)).fetchone()
         
-        if duplicate:
+        if not session:
             conn.close()
-            os.remove(temp_path)
-            return jsonify({'error': 'Duplicate video detected', 'existing_id': duplicate[0]}), 409
+            return jsonify({'error': 'Upload session not found'}), 404
         
-        # Obter metadados
-        metadata = get_video_metadata(temp_path)
+        if not 0 <= index < session['total_chunks']:
+            conn.close()
+            return jsonify({'error': f"Chunk index out of range (0-{session['total_chunks'] - 1})"}), 400
         
-        # Criar estrutura de diretórios
-        dirs = create_directory_structure(video_id)
+        offset = index * session['chunk_size']
+        expected = min(session['chunk_size'], session['size_bytes'] - offset)
+        received = 0
         
-        # Mover arquivo original
-        original_path = dirs['original'] / f"video.{extension}"
-        shutil.move(str(temp_path), str(original_path))
+        # A parte só volta a constar como recebida depois de gravada por inteiro: um reenvio que
+        # falhe no meio (corpo curto ou longo, cliente desconectado) deixa-a pendente
+        conn.execute('DELETE FROM upload_chunks WHERE upload_id = ? AND chunk_index = ?', (upload_id, index))
+        conn.commit()
         
-        # Processar vídeo
-        filter_dir = dirs['processed'] / filter_name
-        filter_dir.mkdir(exist_ok=True)
-        processed_path = filter_dir / f"video.{extension}"
+        with open(_upload_session_path(upload_id), 'r+b', buffering=app.config['UPLOAD_BUFFER_SIZE']) as f:
+            f.seek(offset)
+            while True:
+                block = request.stream.read(app.config['UPLOAD_BUFFER_SIZE'])
+                if not block:
+                    break
+                received += len(block)
+                if received > expected:
+                    break
+                f.write(block)
         
-        if not VideoProcessor.process_video(original_path, processed_path, filter_name):
-            shutil.rmtree(dirs['base'])
+        if received != expected:
             conn.close()
-            return jsonify({'error': 'Failed to process video'}), 500
+            return jsonify({'error': f'Chunk {index} must have {expected} bytes, got {received}'}), 400
         
-        # Gerar thumbnails
-        thumbnail_path, preview_gif_path = generate_thumbnails(original_path, dirs['thumbs'])
+        conn.execute('INSERT OR REPLACE INTO upload_chunks (upload_id, chunk_index, size_bytes) VALUES (?, ?, ?)',
+                     (upload_id, index, received))
+        conn.execute('UPDATE uploads SET updated_at = ? WHERE id = ?', (datetime.now(), upload_id))
+        conn.commit()
+        received_chunks = conn.execute('SELECT COUNT(*) FROM upload_chunks WHERE upload_id = ?',
+                                       (upload_id,)).fetchone()[0]
+        conn.close()
         
-        # Calcular caminhos relativos
-        original_rel = str(original_path.relative_to(app.config['MEDIA_ROOT'])).replace('\\', '/')
-        processed_rel = str(processed_path.relative_to(app.config['MEDIA_ROOT'])).replace('\\', '/')
+        return jsonify({
+            'success': True,
+            'chunk': index,
+            'received_chunks': received_chunks,
+            'total_chunks': session['total_chunks']
+        })
         
-        processing_time = time.time() - start_time
+    except Exception as e:
+        logger.error(f"Error receiving chunk {index} of upload {upload_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload_session(upload_id):
+    """Consulta as partes já recebidas de uma sessão de upload"""
+    try:
+        conn = _get_db_conn()
+        session = conn.execute('SELECT * FROM uploads WHERE id = ?', (upload_id,)).fetchone()
+        
+        if not session:
+            conn.close()
+            return jsonify({'error': 'Upload session not found'}), 404
+        
+        received = [row[0] for row in conn.execute(
+            'SELECT chunk_index FROM upload_chunks WHERE upload_id = ? ORDER BY chunk_index', (upload_id,)
+        ).fetchall()]
+        conn.close()
+        
+        received_set = set(received)
+        return jsonify({
+            'success': True,
+            'upload_id': upload_id,
+            'filename': session['original_name'],
+            'size': session['size_bytes'],
+            'chunk_size': session['chunk_size'],
+            'total_chunks': session['total_chunks'],
+            'received_ranges': _chunk_ranges(received),
+            'missing_chunks': [i for i in range(session['total_chunks']) if i not in received_set],
+            'complete': len(received) == session['total_chunks']
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting upload session: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload_session(upload_id):
+    """Finaliza a sessão: confere as partes e o checksum e enfileira o vídeo como no upload simples"""
+    path = _upload_session_path(upload_id)
+    try:
+        conn = _get_db_conn()
+        session = conn.execute('SELECT * FROM uploads WHERE id = ?', (upload_id,)).fetchone()
+        
+        if not session:
+            conn.close()
+            return jsonify({'error': 'Upload session not found'}), 404
+        
+        received = conn.execute('SELECT COUNT(*) FROM upload_chunks WHERE upload_id = ?',
+                                (upload_id,)).fetchone()[0]
+        if received < session['total_chunks']:
+            conn.close()
+            return jsonify({'error': 'Upload incomplete',
+                            'received_chunks': received, 'total_chunks': session['total_chunks']}), 409
         
-        # Salvar no banco de dados
-        cursor.execute('''
-            INSERT INTO videos (
-                id, original_name, original_ext, mime_type, size_bytes,
-                duration_sec, fps, width, height, filter, created_at,
-                path_original, path_processed, checksum_md5, processing_time_sec,
-                thumbnail_path, preview_gif_path
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            video_id, original_name, extension, f'video/{extension}',
-            metadata['size_bytes'], metadata['duration_sec'], metadata['fps'],
-            metadata['width'], metadata['height'], filter_name, datetime.now(),
-            original_rel, processed_rel, checksum, processing_time,
-            thumbnail_path, preview_gif_path
-        ))
+        checksum = calculate_md5(path)
+        if session['checksum_md5'] and session['checksum_md5'].lower() != checksum:
+            # Conteúdo corrompido: as partes precisam ser reenviadas
+            conn.execute('DELETE FROM upload_chunks WHERE upload_id = ?', (upload_id,))
+            conn.commit()
+            conn.close()
+            return jsonify({'error': 'Checksum mismatch; chunks must be uploaded again'}), 422
         
+        # Encerrar a sessão antes de registrar o arquivo (uma segunda finalização recebe 404)
+        if conn.execute('DELETE FROM uploads WHERE id = ?', (upload_id,)).rowcount == 0:
+            conn.close()
+            return jsonify({'error': 'Upload session not found'}), 404
+        conn.execute('DELETE FROM upload_chunks WHERE upload_id = ?', (upload_id,))
         conn.commit()
         conn.close()
         
-        logger.info(f"Video {video_id} processed successfully in {processing_time:.2f}s")
+        logger.info(f"Upload session {upload_id} completed ({session['size_bytes']} bytes)")
+        return _accept_upload(checksum, session['original_name'], json.loads(session['filters']),
+                              lambda destination: shutil.move(str(path), str(destination)),
+                              lambda: path.unlink(missing_ok=True))
+        
+    except Exception as e:
+        logger.error(f"Error completing upload {upload_id}: {e}", exc_info=True)
+        return jsonify({'error': 'An internal error occurred during upload'}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Consulta o status de um job de processamento"""
+    try:
+        conn = _get_db_conn()
+        job = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        
+        if not job:
+            conn.close()
+            return jsonify({'error': 'Job not found'}), 404
         
-        # Preparar resposta com URLs absolutas
         base_url = request.host_url.rstrip('/')
         response_data = {
             'success': True,
-            'video_id': video_id,
-            'info': {
-                'id': video_id,
-                'original_name': original_name,
-                'filter': filter_name,
-                'processing_time_sec': processing_time,
-                'duration_sec': metadata['duration_sec'],
-                'size_bytes': metadata['size_bytes'],
-                'path_original': f"{base_url}/media/{original_rel}",
-                'path_processed': f"{base_url}/media/{processed_rel}",
-                'thumbnail_path': f"{base_url}/media/{thumbnail_path}" if thumbnail_path else None,
-                'preview_gif_path': f"{base_url}/media/{preview_gif_path}" if preview_gif_path else None
-            }
+            'job_id': job['id'],
+            'video_id': job['video_id'],
+            'status': job['status'],
+            'job': _job_to_dict(job, base_url)
         }
         
+        if job['status'] == 'queued':
+            response_data['queue_position'] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at <= ?",
+                (job['created_at'],)
+            ).fetchone()[0]
+        elif job['status'] == 'running' and app.config['HLS_OUTPUT']:
+            # Playlists HLS já publicadas: a reprodução começa antes do fim do job
+            response_data['streams'] = _job_streams(job, base_url)
+        elif job['status'] == 'done':
+            version = video_cache.video_version(conn, job['video_id'])
+            video = conn.execute('SELECT * FROM videos WHERE id = ?', (job['video_id'],)).fetchone()
+            if video:
+                # Renovar o cache com o registro atual (o job foi concluído por outro processo)
+                response_data['info'] = _video_info(conn, video, base_url)
+                video_cache.put(video['id'], base_url, response_data['info'], version)
+        
+        conn.close()
         return jsonify(response_data)
         
     except Exception as e:
-        logger.error(f"Upload error: {e}", exc_info=True)
-        if 'temp_path' in locals() and temp_path.exists():
-            os.remove(temp_path)
-        return jsonify({'error': 'An internal error occurred during upload'}), 500
+        logger.error(f"Error getting job status: {e}")
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/videos', methods=['GET'])
 def list_videos():
-    """Lista todos os vídeos processados"""
+    """Lista os vídeos processados, do mais recente ao mais antigo
+    
+    A paginação é por cursor: cada resposta traz `next_cursor`, que é passado em `cursor` para
+    obter a página seguinte. `page` continua aceito (paginação por OFFSET) por compatibilidade.
+    """
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page = request.args.get('page', type=int)
+        per_page = max(1, min(request.args.get('per_page', 20, type=int), MAX_PAGE_SIZE))
         filter_type = request.args.get('filter')
+        cursor = request.args.get('cursor')
+        
+        position = None
+        if cursor:
+            position = _decode_cursor(cursor)
+            if position is None:
+                return jsonify({'error': 'Invalid cursor'}), 400
         
         conn = _get_db_conn()
         
-        # Query base
-        query_base = 'FROM videos'
-        params = []
+        # Total mantido pelos triggers de video_counts ('' = todos os vídeos)
+        row = conn.execute('SELECT total FROM video_counts WHERE filter = ?', (filter_type or '',)).fetchone()
+        total_count = row['total'] if row else 0
         
+        conditions = []
+        params = []
         if filter_type:
-            query_base += ' WHERE filter = ?'
-            params.append(filter_type)
+            # "+filter" desliga o índice de filter: percorrer idx_videos_created_id em ordem e parar
+            # no LIMIT sai mais barato do que juntar e ordenar todos os vídeos do filtro
+            conditions.append('(+filter = ? OR id IN (SELECT video_id FROM renditions WHERE filter = ?))')
+            params.extend([filter_type, filter_type])
+        if position:
+            conditions.append('(created_at, id) < (?, ?)')
+            params.extend(position)
         
-        # Total count
-        total_count = conn.execute(f'SELECT COUNT(*) {query_base}', params).fetchone()[0]
+        query = 'SELECT * FROM videos'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        # Uma linha a mais indica se existe próxima página
+        query += ' ORDER BY created_at DESC, id DESC LIMIT ?'
+        params.append(per_page + 1)
+        if page and not position:
+            query += ' OFFSET ?'
+            params.append((max(page, 1) - 1) * per_page)
+        
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
         
-        # Get videos
-        query = f'SELECT * {query_base} ORDER BY created_at DESC LIMIT ? OFFSET ?'
-        params.extend([per_page, (page - 1) * per_page])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
         
         videos = []
         base_url = request.host_url.rstrip('/')
         
-        for row in conn.execute(query, params).fetchall():
-            video = dict(row)
+        for row in rows:
             # Adicionar URLs absolutas
-            video['path_original'] = f"{base_url}/media/{video['path_original']}" if video['path_original'] else None
-            video['path_processed'] = f"{base_url}/media/{video['path_processed']}" if video['path_processed'] else None
-            video['thumbnail_path'] = f"{base_url}/media/{video['thumbnail_path']}" if video['thumbnail_path'] else None
-            video['preview_gif_path'] = f"{base_url}/media/{video['preview_gif_path']}" if video['preview_gif_path'] else None
-            videos.append(video)
+            videos.append(_with_media_urls(dict(row), base_url))
+        
+        result = {
+            'success': True,
+            'count': len(videos),
+            'total': total_count,
+            'per_page': per_page,
+            'next_cursor': _encode_cursor(rows[-1]) if has_more else None,
+            'videos': videos
+        }
+        if page and not position:
+            result['page'] = max(page, 1)
+            result['total_pages'] = (total_count + per_page - 1) // per_page
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Error listing videos: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def _fts_query(text):
+    """Converte o texto digitado em uma consulta FTS5: todos os termos, cada um como prefixo"""
+    terms = re.findall(r'\w+', text)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def _search_conditions():
+    """FROM, condições SQL e parâmetros dos filtros de /api/search; levanta ValueError se algum for inválido
+    
+    Com texto, a busca parte do índice FTS5 (juntando videos pelo rowid); sem texto, de videos.
+    """
+    conditions = []
+    params = []
+    
+    text = request.args.get('q', '').strip()
+    source = 'videos_fts JOIN videos v ON v.rowid = videos_fts.rowid' if text else 'videos v'
+    if text:
+        match = _fts_query(text)
+        if not match:
+            raise ValueError('Query has no searchable terms')
+        conditions.append('videos_fts MATCH ?')
+        params.append(match)
+    
+    filter_type = request.args.get('filter')
+    if filter_type:
+        conditions.append('(v.filter = ? OR v.id IN (SELECT video_id FROM renditions WHERE filter = ?))')
+        params.extend([filter_type, filter_type])
+    
+    resolution = request.args.get('resolution')
+    if resolution:
+        if resolution not in SEARCH_RESOLUTIONS:
+            raise ValueError(f"Invalid resolution. Available: {', '.join(SEARCH_RESOLUTIONS)}")
+        low, high = SEARCH_RESOLUTIONS[resolution]
+        conditions.append('MIN(v.width, v.height) >= ?')
+        params.append(low)
+        if high is not None:
+            conditions.append('MIN(v.width, v.height) < ?')
+            params.append(high)
+    
+    for arg, operator in (('min_duration', '>='), ('max_duration', '<=')):
+        value = request.args.get(arg)
+        if value:
+            conditions.append(f'v.duration_sec {operator} ?')
+            params.append(float(value))
+    
+    for arg, operator in (('from', '>='), ('to', '<')):
+        value = request.args.get(arg)
+        if value:
+            moment = datetime.fromisoformat(value)
+            if arg == 'to' and len(value) == 10:
+                # Só a data: o dia inteiro entra no intervalo
+                moment += timedelta(days=1)
+            conditions.append(f'v.created_at {operator} ?')
+            params.append(adapt_datetime_iso(moment))
+    
+    return source, conditions, params
+
+def _search_facets(conn, source, where, params):
+    """Contagens por filtro principal, resolução, duração e mês sobre todo o resultado da busca"""
+    resolution_case = ' '.join(
+        f"WHEN MIN(v.width, v.height) >= {low} THEN '{name}'"
+        for name, (low, _) in sorted(SEARCH_RESOLUTIONS.items(), key=lambda item: -item[1][0])
+    )
+    duration_case = ' '.join(
+        f"WHEN v.duration_sec < {high} THEN '{name}'" for name, high in SEARCH_DURATIONS.items() if high is not None
+    )
+    last_duration = next(reversed(SEARCH_DURATIONS))
+    rows = conn.execute(f'''
+        SELECT v.filter,
+               CASE {resolution_case} ELSE NULL END AS resolution,
+               CASE {duration_case} ELSE '{last_duration}' END AS duration,
+               substr(v.created_at, 1, 7) AS month,
+               COUNT(*) AS total
+        FROM {source} {where}
+        GROUP BY 1, 2, 3, 4
+    ''', params).fetchall()
+    
+    facets = {'filter': {}, 'resolution': {}, 'duration': {}, 'month': {}}
+    for row in rows:
+        for facet in facets:
+            if row[facet] is not None:
+                facets[facet][row[facet]] = facets[facet].get(row[facet], 0) + row['total']
+    return facets
+
+@app.route('/api/search', methods=['GET'])
+def search_videos():
+    """Busca vídeos por nome (FTS5) com filtros por filtro, resolução, duração e data
+    
+    Parâmetros: q, filter, resolution (sd|hd|fullhd|4k), min_duration/max_duration (s),
+    from/to (datas ISO), per_page, cursor e facets=1 para incluir as contagens por faceta.
+    Os resultados vêm em ordem de inserção (mais recentes primeiro) e a paginação é por cursor
+    sobre o rowid, que o índice FTS5 percorre em ordem sem juntar e ordenar todos os resultados.
+    """
+    try:
+        per_page = max(1, min(request.args.get('per_page', 20, type=int), MAX_PAGE_SIZE))
+        cursor = request.args.get('cursor')
+        try:
+            source, conditions, params = _search_conditions()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
+        before = None
+        if cursor:
+            position = _unpack_cursor(cursor)
+            if not position or len(position) != 1 or not isinstance(position[0], int):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            before = position[0]
+        
+        # Com texto, ordenar e paginar pelo rowid do índice FTS5 (igual ao de videos)
+        key = 'videos_fts.rowid' if source.startswith('videos_fts') else 'v.rowid'
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        page_conditions = conditions + ([f'{key} < ?'] if before is not None else [])
+        query = f'SELECT v.rowid AS search_rowid, v.* FROM {source}'
+        if page_conditions:
+            query += ' WHERE ' + ' AND '.join(page_conditions)
+        query += f' ORDER BY {key} DESC LIMIT ?'
+        
+        conn = _get_db_conn()
+        rows = conn.execute(query, params + ([before] if before is not None else []) + [per_page + 1]).fetchall()
+        facets = None
+        if request.args.get('facets') in ('1', 'true'):
+            facets = _search_facets(conn, source, where, params)
         conn.close()
         
-        return jsonify({
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        base_url = request.host_url.rstrip('/')
+        
+        videos = []
+        for row in rows:
+            video = dict(row)
+            del video['search_rowid']
+            videos.append(_with_media_urls(video, base_url))
+        
+        result = {
             'success': True,
             'count': len(videos),
-            'total': total_count,
-            'page': page,
             'per_page': per_page,
-            'total_pages': (total_count + per_page - 1) // per_page,
+            'next_cursor': _pack_cursor([rows[-1]['search_rowid']]) if has_more else None,
             'videos': videos
+        }
+        if facets is not None:
+            result['facets'] = facets
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Error searching videos: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def _processing_percentiles(counts, percentiles=(50, 90, 95, 99)):
+    """Estima percentis do tempo de processamento a partir de {balde: contagem} do histograma
+    
+    Cada percentil é o limite superior do balde em que ele cai (o último balde, sem limite,
+    usa o limite inferior).
+    """
+    total = sum(counts.values())
+    if total <= 0:
+        return {f'p{p}': None for p in percentiles}
+    
+    result = {}
+    cumulative = 0
+    buckets = iter(sorted(counts.items()))
+    bucket = None
+    for p in percentiles:
+        target = total * p / 100
+        while cumulative < target:
+            bucket, count = next(buckets)
+            cumulative += count
+        upper = PROCESSING_TIME_BUCKETS[min(bucket, len(PROCESSING_TIME_BUCKETS) - 1)]
+        result[f'p{p}'] = upper
+    return result
+
+def _stats_entry(row, listed, histogram):
+    """Monta o bloco de /api/stats de um filtro (ou dos totais) a partir da linha de video_stats"""
+    videos = row['videos'] if row else 0
+    processing_time = row['processing_time_sec'] if row else 0
+    return {
+        'videos': videos,
+        'listed': listed,
+        'size_bytes': row['size_bytes'] if row else 0,
+        'duration_sec': round(row['duration_sec'], 3) if row else 0,
+        'renditions': row['renditions'] if row else 0,
+        'rendition_bytes': row['rendition_bytes'] if row else 0,
+        'processing_time': {
+            'total_sec': round(processing_time, 3),
+            'mean_sec': round(processing_time / videos, 3) if videos else None,
+            **_processing_percentiles(histogram)
+        }
+    }
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Estatísticas agregadas da biblioteca (totais, por filtro, percentis e armazenamento)
+    
+    Tudo vem das tabelas video_stats, video_counts e processing_histogram, mantidas por triggers,
+    então o custo não depende do número de vídeos.
+    """
+    try:
+        conn = _get_db_conn()
+        rows = {row['filter']: row for row in conn.execute('SELECT * FROM video_stats')}
+        listed = {row['filter']: row['total'] for row in conn.execute('SELECT filter, total FROM video_counts')}
+        histograms = {}
+        for row in conn.execute('SELECT filter, bucket, count FROM processing_histogram WHERE count > 0'):
+            histograms.setdefault(row['filter'], {})[row['bucket']] = row['count']
+        conn.close()
+        
+        totals = _stats_entry(rows.get(''), listed.get('', 0), histograms.get('', {}))
+        # As linhas dos filtros continuam nas tabelas com contagem zero depois que seus vídeos
+        # e versões são removidos; esses filtros ficam de fora
+        filters = {}
+        for name in sorted(set(rows) | set(listed)):
+            entry = _stats_entry(rows.get(name), listed.get(name, 0), histograms.get(name, {}))
+            if name and (entry['videos'] or entry['listed'] or entry['renditions']):
+                filters[name] = entry
+        
+        return jsonify({
+            'success': True,
+            'totals': totals,
+            'filters': filters,
+            'cache': {'video': video_cache.stats()},
+            'storage': {
+                'original_bytes': totals['size_bytes'],
+                'rendition_bytes': totals['rendition_bytes'],
+                'total_bytes': totals['size_bytes'] + totals['rendition_bytes']
+            }
         })
         
     except Exception as e:
-        logger.error(f"Error listing videos: {e}")
+        logger.error(f"Error getting stats: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/video/<video_id>', methods=['GET'])
 def get_video_info(video_id):
-    """Obtém informações de um vídeo específico"""
+    """Obtém informações de um vídeo específico (via video_cache, com ETag)"""
     try:
+        base_url = request.host_url.rstrip('/')
         conn = _get_db_conn()
-        video = conn.execute('SELECT * FROM videos WHERE id = ?', (video_id,)).fetchone()
+        # Uma consulta pela chave primária; escritas de qualquer processo mudam a versão
+        version = video_cache.video_version(conn, video_id)
+        cached = video_cache.get(video_id, base_url, version)
+        
+        if cached is None:
+            video = conn.execute('SELECT * FROM videos WHERE id = ?', (video_id,)).fetchone()
+            
+            if not video:
+                conn.close()
+                return jsonify({'error': 'Video not found'}), 404
+            
+            # Adicionar URLs absolutas
+            cached = video_cache.put(video_id, base_url, _video_info(conn, video, base_url), version)
         conn.close()
         
-        if not video:
-            return jsonify({'error': 'Video not found'}), 404
+        body, etag = cached
+        response = Response(mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        if not is_resource_modified(request.environ, etag=etag):
+            response.status_code = 304
+            return response
+        
+        response.set_data(body)
+        return response
         
-        video_dict = dict(video)
+    except Exception as e:
+        logger.error(f"Error getting video info: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/batch/videos', methods=['GET', 'POST'])
+def batch_video_info():
+    """Registros de vários vídeos em uma consulta (?ids=a,b,c ou JSON {"ids": [...]})
+    
+    Até BATCH_MAX_IDS ids. Vídeos ainda sem registro (na fila ou com erro) aparecem em `jobs`
+    com o job mais recente, e ids desconhecidos em `not_found`.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids') if isinstance(data, dict) else None
+    else:
+        ids = [video_id for video_id in request.args.get('ids', '').split(',') if video_id]
+    
+    if not isinstance(ids, list) or not ids or not all(isinstance(video_id, str) for video_id in ids):
+        return jsonify({'error': 'No ids provided'}), 400
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > app.config['BATCH_MAX_IDS']:
+        return jsonify({'error': f"Too many ids (max {app.config['BATCH_MAX_IDS']} per request)"}), 400
+    
+    try:
         base_url = request.host_url.rstrip('/')
+        placeholders = ', '.join('?' * len(ids))
+        
+        conn = _get_db_conn()
+        rows = {row['id']: row for row in conn.execute(f'SELECT * FROM videos WHERE id IN ({placeholders})', ids)}
+        renditions = {}
+        for row in conn.execute(
+            f'SELECT * FROM renditions WHERE video_id IN ({placeholders}) ORDER BY rowid', ids
+        ):
+            renditions.setdefault(row['video_id'], []).append(_rendition_entry(row, base_url))
+        
+        missing = [video_id for video_id in ids if video_id not in rows]
+        jobs = {}
+        if missing:
+            for job in conn.execute(
+                f"SELECT * FROM jobs WHERE video_id IN ({', '.join('?' * len(missing))}) ORDER BY created_at",
+                missing
+            ):
+                # O mais recente prevalece
+                jobs[job['video_id']] = {
+                    'job_id': job['id'],
+                    'status': job['status'],
+                    'error': job['error'],
+                    'status_url': f"{base_url}/api/jobs/{job['id']}"
+                }
+        conn.close()
         
-        # Adicionar URLs absolutas
-        video_dict['path_original'] = f"{base_url}/media/{video_dict['path_original']}" if video_dict['path_original'] else None
-        video_dict['path_processed'] = f"{base_url}/media/{video_dict['path_processed']}" if video_dict['path_processed'] else None
-        video_dict['thumbnail_path'] = f"{base_url}/media/{video_dict['thumbnail_path']}" if video_dict['thumbnail_path'] else None
-        video_dict['preview_gif_path'] = f"{base_url}/media/{video_dict['preview_gif_path']}" if video_dict['preview_gif_path'] else None
+        videos = []
+        for video_id in ids:
+            if video_id in rows:
+                video = _with_media_urls(dict(rows[video_id]), base_url)
+                video['renditions'] = renditions.get(video_id, [])
+                videos.append(video)
         
         return jsonify({
             'success': True,
-            'video': video_dict
+            'count': len(videos),
+            'videos': videos,
+            'jobs': jobs,
+            'not_found': [video_id for video_id in missing if video_id not in jobs]
         })
         
     except Exception as e:
-        logger.error(f"Error getting video info: {e}")
+        logger.error(f"Error in batch video lookup: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/video/<video_id>/renditions', methods=['POST'])
+def request_video_renditions(video_id):
+    """Pede novas versões de um vídeo já armazenado (sem reenviar o arquivo)"""
+    filters, error = _requested_filters()
+    if error:
+        return error
+    
+    try:
+        conn = _get_db_conn()
+        video = conn.execute('SELECT * FROM videos WHERE id = ?', (video_id,)).fetchone()
+        
+        if not video:
+            conn.close()
+            return jsonify({'error': 'Video not found'}), 404
+        
+        return _renditions_response(conn, video, filters)
+        
+    except Exception as e:
+        logger.error(f"Error requesting renditions: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/video/<video_id>', methods=['DELETE'])
@@ -559,16 +3919,7 @@ def delete_video(video_id):
             conn.close()
             return jsonify({'error': 'Video not found'}), 404
         
-        # Construir caminho completo
-        original_path = app.config['MEDIA_ROOT'] / result['path_original']
-        
-        if original_path.exists():
-            video_dir = original_path.parent.parent
-            trash_dir = app.config['MEDIA_ROOT'] / 'trash' / video_id
-            shutil.move(str(video_dir), str(trash_dir))
-        
-        conn.execute('DELETE FROM videos WHERE id = ?', (video_id,))
-        conn.commit()
+        move_to_trash(conn, video_id, result['path_original'])
         conn.close()
         
         logger.info(f"Video {video_id} moved to trash")
@@ -578,54 +3929,206 @@ def delete_video(video_id):
         logger.error(f"Error deleting video: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _cache_version(conn, name):
+    """Versão atual de uma tabela em cache_versions (muda a cada INSERT/UPDATE/DELETE nela)"""
+    row = conn.execute('SELECT version FROM cache_versions WHERE name = ?', (name,)).fetchone()
+    return row['version'] if row else 0
+
+_gallery_fallback = None
+
+def _gallery_template():
+    """Template da galeria: templates/gallery.html (gerado por create_templates.py) ou GALLERY_TEMPLATE"""
+    global _gallery_fallback
+    if _gallery_fallback is None:
+        try:
+            return app.jinja_env.get_template('gallery.html')
+        except TemplateNotFound:
+            _gallery_fallback = app.jinja_env.from_string(GALLERY_TEMPLATE)
+    return _gallery_fallback
+
 @app.route('/gallery')
 def gallery():
-    """Interface web para visualização de thumbnails"""
+    """Interface web para visualização de thumbnails, paginada por cursor (?cursor=)
+    
+    As páginas renderizadas ficam em gallery_cache até a próxima inserção ou remoção de vídeo,
+    e o ETag deriva da mesma versão: com o navegador já tendo a página, a resposta é um 304
+    sem consulta à tabela de vídeos nem renderização.
+    """
     try:
+        cursor = request.args.get('cursor', '')
+        position = None
+        if cursor:
+            position = _decode_cursor(cursor)
+            if position is None:
+                return "Error: invalid cursor", 400
+        
         conn = _get_db_conn()
-        videos = [dict(row) for row in conn.execute(
-            'SELECT * FROM videos ORDER BY created_at DESC LIMIT 50'
-        ).fetchall()]
-        total_size = conn.execute('SELECT SUM(size_bytes) FROM videos').fetchone()[0] or 0
-        conn.close()
+        version = _cache_version(conn, 'videos')
         
-        # Criar template HTML inline se não existir
-        template_dir = Path('templates')
-        template_dir.mkdir(exist_ok=True)
-        template_file = template_dir / 'gallery.html'
+        response = Response(mimetype='text/html')
+        response.set_etag(f"gallery-{version}-{hashlib.md5(cursor.encode()).hexdigest()[:12]}")
+        response.cache_control.no_cache = True
+        if not is_resource_modified(request.environ, etag=response.get_etag()[0]):
+            conn.close()
+            response.status_code = 304
+            return response
         
-        if not template_file.exists():
-            with open(template_file, 'w', encoding='utf-8') as f:
-                f.write(GALLERY_TEMPLATE)
+        html = gallery_cache.get(version, cursor)
+        if html is None:
+            per_page = app.config['GALLERY_PAGE_SIZE']
+            query = 'SELECT * FROM videos'
+            params = []
+            if position:
+                query += ' WHERE (created_at, id) < (?, ?)'
+                params.extend(position)
+            query += ' ORDER BY created_at DESC, id DESC LIMIT ?'
+            params.append(per_page + 1)
+            videos = [dict(row) for row in conn.execute(query, params).fetchall()]
+            stats = conn.execute("SELECT videos, size_bytes FROM video_stats WHERE filter = ''").fetchone()
+            
+            next_url = None
+            if len(videos) > per_page:
+                videos = videos[:per_page]
+                next_url = url_for('gallery', cursor=_encode_cursor(videos[-1]))
+            
+            html = render_template(_gallery_template(),
+                                   videos=videos,
+                                   total_videos=stats['videos'] if stats else 0,
+                                   total_size_mb=(stats['size_bytes'] if stats else 0) / (1024 * 1024),
+                                   first_url=url_for('gallery') if cursor else None,
+                                   next_url=next_url)
+            gallery_cache.put(version, cursor, html)
+        conn.close()
         
-        return render_template('gallery.html',
-                             videos=videos,
-                             total_size_mb=total_size / (1024 * 1024))
+        response.set_data(html)
+        return response
         
     except Exception as e:
         logger.error(f"Error loading gallery: {e}")
         return f"Error: {e}", 500
 
-@app.route('/media/<path:filepath>')
-def serve_media(filepath):
-    """Serve arquivos de mídia"""
+@app.route('/thumb/<video_id>')
+def serve_thumbnail(video_id):
+    """Thumbnail redimensionado sob demanda (?w=largura&fmt=jpg|webp|png&frame=1..5)
+    
+    O render é feito no primeiro acesso a partir do thumbnail armazenado (sem ampliar além
+    da largura dele) e fica no cache em disco para os acessos seguintes.
+    """
+    width = request.args.get('w', type=int)
+    fmt = request.args.get('fmt', 'jpg').lower()
+    frame = request.args.get('frame', 1, type=int)
+    if fmt not in ThumbnailCache.FORMATS:
+        return jsonify({'error': f"Invalid format. Available: {', '.join(ThumbnailCache.FORMATS)}"}), 400
+    if width is not None and width < 16:
+        return jsonify({'error': 'Invalid width (minimum 16)'}), 400
+    
     try:
-        # Construir caminho completo
-        full_path = app.config['MEDIA_ROOT'] / filepath
+        conn = _get_db_conn()
+        video = conn.execute('SELECT thumbnail_path FROM videos WHERE id = ?', (video_id,)).fetchone()
+        conn.close()
+        if not video or not video['thumbnail_path']:
+            return jsonify({'error': 'Thumbnail not found'}), 404
         
-        logger.info(f"Serving media: {filepath}")
-        logger.info(f"Full path: {full_path}")
-        logger.info(f"Exists: {full_path.exists()}")
+        source_path = (app.config['MEDIA_ROOT'] / video['thumbnail_path']).parent / f"frame_{frame:04d}.jpg"
+        if not source_path.is_file():
+            return jsonify({'error': 'Thumbnail not found'}), 404
+        
+        # Larguras maiores que a do original ficam na largura do original
+        source_width = app.config['THUMBNAIL_WIDTH']
+        width = min(width or source_width, source_width)
+        path = thumbnail_cache.path(video_id, frame, width, fmt)
+        
+        if thumbnail_cache.get(path) is None:
+            image = cv2.imread(str(source_path))
+            if image is None:
+                # Arquivo ilegível ou truncado: não há o que redimensionar
+                logger.warning(f"Unreadable thumbnail source: {source_path}")
+                return jsonify({'error': 'Thumbnail not found'}), 404
+            if image.shape[1] > width:
+                height = max(1, round(image.shape[0] * width / image.shape[1]))
+                image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+            thumbnail_cache.put(path, image, fmt)
+        
+        return send_file(path, mimetype=ThumbnailCache.FORMATS[fmt][1], max_age=86400)
         
-        if full_path.exists() and full_path.is_file():
-            return send_from_directory(app.config['MEDIA_ROOT'], filepath)
-        else:
-            logger.error(f"File not found: {full_path}")
-            return "File not found", 404
-            
     except Exception as e:
-        logger.error(f"Error serving media: {e}")
-        return str(e), 500
+        logger.error(f"Error serving thumbnail: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/media/<path:filepath>')
+def serve_media(filepath):
+    """Serve arquivos de mídia com suporte a Range, validadores e cache HTTP
+    
+    Um único stat fornece tamanho, ETag e Last-Modified; requisições condicionais que batem
+    com os validadores recebem 304 sem abrir o arquivo. Os arquivos em `videos/` nunca mudam
+    depois de gravados (o caminho contém o ID do vídeo), então são servidos como imutáveis;
+    a exceção são as playlists HLS, reescritas enquanto o job roda.
+    
+    Em MEDIA_DELIVERY 'x-accel'/'x-sendfile' a rota só autoriza e resolve o caminho: o proxy
+    reverso envia os bytes (e atende Range). As respostas completas sempre passam pelo
+    wsgi.file_wrapper quando o servidor WSGI o oferece (os.sendfile no gunicorn); em
+    'file-wrapper', também os trechos pedidos com Range. O servidor de desenvolvimento do
+    Werkzeug não tem file_wrapper, então nele o modo equivale a 'app' (ver check_media_delivery).
+    """
+    full_path = safe_join(str(app.config['MEDIA_ROOT']), filepath)
+    try:
+        file_stat = os.stat(full_path) if full_path else None
+    except OSError:
+        file_stat = None
+    if file_stat is None or not S_ISREG(file_stat.st_mode):
+        logger.warning(f"Media not found: {filepath}")
+        return "File not found", 404
+    
+    etag = f"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"
+    last_modified = datetime.fromtimestamp(int(file_stat.st_mtime), timezone.utc)
+    response = Response(mimetype=mimetypes.guess_type(filepath)[0] or 'application/octet-stream')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    if filepath.startswith('videos/') and not filepath.endswith('.m3u8'):
+        response.cache_control.public = True
+        response.cache_control.max_age = app.config['MEDIA_CACHE_MAX_AGE']
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response.status_code = 304
+        return response
+    
+    delivery = app.config['MEDIA_DELIVERY']
+    if delivery == 'x-accel':
+        response.headers['X-Accel-Redirect'] = app.config['MEDIA_ACCEL_PREFIX'].rstrip('/') + '/' + quote(filepath)
+        return response
+    if delivery == 'x-sendfile':
+        response.headers['X-Sendfile'] = full_path
+        return response
+    
+    media_file = open(full_path, 'rb')
+    response.response = wrap_file(request.environ, media_file)
+    response.direct_passthrough = True
+    response.content_length = file_stat.st_size
+    try:
+        response = response.make_conditional(request, accept_ranges=True, complete_length=file_stat.st_size)
+    except RequestedRangeNotSatisfiable:
+        response.close()
+        raise
+    
+    file_wrapper = request.environ.get('wsgi.file_wrapper')
+    if delivery == 'file-wrapper' and response.status_code == 206 and file_wrapper is not None:
+        # Arquivo posicionado no início do trecho; o Content-Length limita o envio
+        media_file.seek(response.content_range.start)
+        response.response = file_wrapper(media_file)
+    return response
+
+def check_media_delivery(standalone):
+    """Avisa na inicialização quando MEDIA_DELIVERY não terá efeito no servidor em uso"""
+    delivery = app.config['MEDIA_DELIVERY']
+    if delivery not in ('app', 'file-wrapper', 'x-accel', 'x-sendfile'):
+        logger.warning(f"Unknown MEDIA_DELIVERY {delivery!r}; serving media from the app")
+    elif delivery == 'file-wrapper' and standalone:
+        logger.warning("MEDIA_DELIVERY='file-wrapper' needs a WSGI server with wsgi.file_wrapper "
+                       "(e.g. gunicorn -c gunicorn.conf.py server:app); the development server "
+                       "serves media like 'app'")
 
 @app.errorhandler(413)
 def request_entity_too_large(error):
@@ -712,6 +4215,20 @@ GALLERY_TEMPLATE = '''<!DOCTYPE html>
             font-size: 0.9rem;
             margin-top: 10px;
         }
+        .pagination {
+            display: flex;
+            justify-content: center;
+            gap: 15px;
+            margin-top: 30px;
+        }
+        .pagination a {
+            background: white;
+            color: #667eea;
+            padding: 10px 20px;
+            border-radius: 20px;
+            text-decoration: none;
+            font-weight: 600;
+        }
     </style>
 </head>
 <body>
@@ -719,7 +4236,7 @@ GALLERY_TEMPLATE = '''<!DOCTYPE html>
         <h1>🎬 Galeria de Vídeos Processados</h1>
         <div class="stats">
             <div class="stat-item">
-                <div class="stat-value">{{ videos|length }}</div>
+                <div class="stat-value">{{ total_videos }}</div>
                 <div class="stat-label">Total de Vídeos</div>
             </div>
             <div class="stat-item">
@@ -731,7 +4248,8 @@ GALLERY_TEMPLATE = '''<!DOCTYPE html>
             {% for video in videos %}
             <div class="video-card">
                 {% if video.thumbnail_path %}
-                <img src="/media/{{ video.thumbnail_path }}" alt="{{ video.original_name }}" class="video-thumbnail">
+                <img src="/thumb/{{ video.id }}?w=320&fmt=webp" alt="{{ video.original_name }}" class="video-thumbnail"
+                     width="320" height="200" decoding="async" loading="{{ 'eager' if loop.index <= 4 else 'lazy' }}">
                 {% else %}
                 <div class="video-thumbnail" style="display: flex; align-items: center; justify-content: center; color: #999;">
                     📹 No Thumbnail
@@ -742,12 +4260,18 @@ GALLERY_TEMPLATE = '''<!DOCTYPE html>
                     <span class="filter-badge">{{ video.filter|upper }}</span>
                     <div class="video-meta">
                         Duration: {{ "%.1f"|format(video.duration_sec) }}s<br>
-                        Created: {{ video.created_at[:19] }}
+                        Created: {{ video.created_at.strftime('%d/%m/%Y %H:%M') if video.created_at else '-' }}
                     </div>
                 </div>
             </div>
             {% endfor %}
         </div>
+        {% if first_url or next_url %}
+        <div class="pagination">
+            {% if first_url %}<a href="{{ first_url }}">← Mais recentes</a>{% endif %}
+            {% if next_url %}<a href="{{ next_url }}">Mais antigos →</a>{% endif %}
+        </div>
+        {% endif %}
     </div>
 </body>
 </html>'''
@@ -760,5 +4284,11 @@ if __name__ == '__main__':
     logger.info(f"Server running on http://localhost:5000")
     logger.info(f"Gallery available at http://localhost:5000/gallery")
     logger.info(f"Media root: {app.config['MEDIA_ROOT']}")
+    check_media_delivery(standalone=True)
+    
+    # Com debug=True o reloader executa o app em um processo filho; os workers
+    # são iniciados apenas nele para não duplicar o pool
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_job_workers()
     
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
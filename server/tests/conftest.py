@@ -0,0 +1,80 @@
+"""
+Fixtures dos testes do servidor
+server.py guarda a configuração e os caches em variáveis de módulo: cada teste recebe um
+MEDIA_ROOT e um banco novos em um diretório temporário, e caches vazios
+
+Uso (a partir da pasta server):
+    python -m pytest
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope='session')
+def server_module(tmp_path_factory):
+    """Importa server.py uma única vez (o import cria logs/ no diretório atual)"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('server'))
+    try:
+        import server
+    finally:
+        os.chdir(cwd)
+    return server
+
+
+@pytest.fixture
+def server(server_module, tmp_path, monkeypatch):
+    """server.py com diretórios, banco e caches isolados no diretório temporário do teste"""
+    monkeypatch.chdir(tmp_path)
+    config = server_module.app.config
+    monkeypatch.setitem(config, 'MEDIA_ROOT', tmp_path / 'media')
+    monkeypatch.setitem(config, 'UPLOAD_FOLDER', tmp_path / 'media' / 'incoming')
+    monkeypatch.setitem(config, 'DATABASE', tmp_path / 'database' / 'videos.db')
+    monkeypatch.setitem(config, 'VIDEO_CACHE_URL', None)
+    monkeypatch.setitem(config, 'HLS_OUTPUT', False)
+    monkeypatch.setitem(config, 'MEDIA_DELIVERY', 'app')
+    monkeypatch.setattr(server_module, 'video_cache', server_module.VideoCache())
+    monkeypatch.setattr(server_module, 'gallery_cache', server_module.RenderCache(max_entries=32))
+    monkeypatch.setattr(server_module, 'thumbnail_cache', server_module.ThumbnailCache())
+    server_module.setup_directories()
+    server_module.init_database()
+    return server_module
+
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
+
+
+def make_video(path, frames=30, width=160, height=120, fps=25):
+    """Grava um vídeo curto com movimento e ruído (o conteúdo muda a cada frame)"""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    rng = np.random.default_rng(0)
+    for i in range(frames):
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        cv2.rectangle(frame, (i * 4 % width, 20), (i * 4 % width + 30, 60), (0, 200, 255), -1)
+        writer.write(frame)
+    writer.release()
+    return Path(path)
+
+
+@pytest.fixture
+def video_file(tmp_path):
+    return make_video(tmp_path / 'sample.mp4')
+
+
+def upload(client, path, filters='grayscale'):
+    """Envia um vídeo por /api/upload e retorna o JSON da resposta 202"""
+    with open(path, 'rb') as f:
+        response = client.post('/api/upload', data={'file': (f, Path(path).name), 'filter': filters},
+                               content_type='multipart/form-data')
+    assert response.status_code == 202, response.get_json()
+    return response.get_json()
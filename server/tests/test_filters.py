@@ -0,0 +1,81 @@
+"""Filtros em lote e cadeias fundidas comparados à aplicação sequencial de process_frame"""
+
+import numpy as np
+import pytest
+
+BATCH = 4
+SIZE = (48, 64)
+
+
+@pytest.fixture
+def frames():
+    return np.random.default_rng(1).integers(0, 256, (BATCH,) + SIZE + (3,), dtype=np.uint8)
+
+
+def _sequential(server, frames, names):
+    """Aplica os filtros um a um, frame a frame (o caminho de referência)"""
+    result = []
+    for frame in frames:
+        for name in names:
+            frame = server.VideoProcessor.process_frame(frame, name)
+        result.append(frame)
+    return np.stack(result)
+
+
+def _batched(server, frames, spec):
+    batch_filter = server.FrameBatchFilter(spec, SIZE, BATCH)
+    return batch_filter.apply(frames, batch_filter.allocate_output())
+
+
+@pytest.mark.parametrize('name', ['grayscale', 'blur', 'edge', 'pixelate', 'sepia', 'negative'])
+def test_single_filter_matches_process_frame(server_module, frames, name):
+    expected = _sequential(server_module, frames, [name])
+    result = _batched(server_module, frames, name)
+    assert result.shape == expected.shape
+    # Ponto fixo do OpenCV no lote x ponto flutuante por frame: no máximo 1 de arredondamento
+    assert np.abs(result.astype(int) - expected).max() <= 1
+
+
+@pytest.mark.parametrize('spec', [
+    'sepia,negative',
+    'negative,sepia,negative',
+    'negative,negative',
+    'grayscale,negative',
+    'negative,grayscale',
+    'blur,pixelate',
+    'negative,blur,sepia',
+])
+def test_fused_chain_matches_sequential(server_module, frames, spec):
+    names = spec.split(',')
+    expected = _sequential(server_module, frames, names)
+    result = _batched(server_module, frames, spec)
+    assert result.shape == expected.shape
+    assert np.abs(result.astype(int) - expected).max() <= 1
+
+
+def test_point_filters_are_fused(server_module):
+    chain = server_module.FilterChain.parse('negative,sepia,negative')
+    assert len(chain.steps) == 1
+    assert server_module.FilterChain.parse('grayscale,negative').output_channels == 1
+
+
+def test_partial_batch_uses_prefix_of_buffers(server_module, frames):
+    batch_filter = server_module.FrameBatchFilter('sepia,negative', SIZE, BATCH)
+    out = batch_filter.allocate_output()
+    result = batch_filter.apply(frames[:2], out)
+    assert len(result) == 2
+    assert np.abs(result.astype(int) - _sequential(server_module, frames[:2], ['sepia', 'negative'])).max() <= 1
+
+
+def test_chain_on_single_channel_input(server_module, frames):
+    gray = _sequential(server_module, frames, ['grayscale'])
+    batch_filter = server_module.FrameBatchFilter('negative', SIZE, BATCH, input_channels=1)
+    assert batch_filter.allocate_input().shape == (BATCH,) + SIZE
+    result = batch_filter.apply(gray, batch_filter.allocate_output())
+    assert np.array_equal(result, 255 - gray)
+
+
+@pytest.mark.parametrize('spec', ['', 'sepia,unknown', ','.join(['blur'] * 9), 5])
+def test_invalid_chain(server_module, spec):
+    with pytest.raises(ValueError):
+        server_module.FilterChain.parse(spec)
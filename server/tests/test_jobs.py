@@ -0,0 +1,100 @@
+"""Ciclo de vida dos jobs da fila: enfileirar, reservar, concluir, falhar e recuperar"""
+
+import json
+import os
+
+from conftest import upload
+
+
+def _job(server, job_id):
+    conn = server._get_db_conn()
+    try:
+        return conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    finally:
+        conn.close()
+
+
+def _running_job(server, video_id, attempts, worker_pid):
+    """Enfileira um job e o deixa 'running' como se um worker o tivesse reservado"""
+    conn = server._get_db_conn()
+    try:
+        job_id = server.enqueue_job(conn, video_id, None, {'filter': 'grayscale'})
+        conn.execute("UPDATE jobs SET status = 'running', attempts = ?, worker_pid = ? WHERE id = ?",
+                     (attempts, worker_pid, job_id))
+        conn.commit()
+        return job_id
+    finally:
+        conn.close()
+
+
+def test_upload_is_queued_then_processed(server, client, video_file):
+    accepted = upload(client, video_file, 'grayscale')
+    status = client.get(f"/api/jobs/{accepted['job_id']}").get_json()
+    assert status['status'] == 'queued'
+    assert status['queue_position'] == 1
+
+    job = server.claim_next_job()
+    assert job['id'] == accepted['job_id']
+    claimed = _job(server, job['id'])
+    assert claimed['status'] == 'running'
+    assert claimed['attempts'] == 1
+    assert claimed['worker_pid'] == os.getpid()
+    assert server.claim_next_job() is None
+
+    server.run_job(job)
+    status = client.get(f"/api/jobs/{job['id']}").get_json()
+    assert status['status'] == 'done'
+    assert status['job']['error'] is None
+    assert status['info']['filter'] == 'grayscale'
+    video = client.get(f"/api/video/{accepted['video_id']}").get_json()['video']
+    assert video['renditions'][0]['filter'] == 'grayscale'
+
+
+def test_process_next_job_on_empty_queue(server):
+    assert server.process_next_job() is False
+
+
+def test_failed_job_records_error_and_cleans_up(server, client, video_file):
+    accepted = upload(client, video_file)
+    job = server.claim_next_job()
+    payload = json.loads(job['payload'])
+    base_dir = server.app.config['MEDIA_ROOT'] / payload['base_path']
+    (server.app.config['MEDIA_ROOT'] / payload['original_path']).unlink()
+
+    server.run_job(job)
+    failed = _job(server, job['id'])
+    assert failed['status'] == 'failed'
+    assert failed['error']
+    assert not base_dir.exists()
+    assert client.get(f"/api/video/{accepted['video_id']}").status_code == 404
+
+
+def test_release_running_jobs_of_dead_worker(server):
+    assert server.app.config['JOB_MAX_ATTEMPTS'] == 3
+    retry = _running_job(server, 'v1', attempts=1, worker_pid=111)
+    exhausted = _running_job(server, 'v2', attempts=3, worker_pid=111)
+    other = _running_job(server, 'v3', attempts=1, worker_pid=222)
+
+    conn = server._get_db_conn()
+    try:
+        assert server.release_running_jobs(conn, worker_pid=111) == (1, 1)
+    finally:
+        conn.close()
+    assert _job(server, retry)['status'] == 'queued'
+    assert _job(server, retry)['worker_pid'] is None
+    assert _job(server, exhausted)['status'] == 'failed'
+    assert 'interrupted 3 times' in _job(server, exhausted)['error']
+    assert _job(server, other)['status'] == 'running'
+
+
+def test_recover_stale_jobs_requeues_all_running(server):
+    first = _running_job(server, 'v1', attempts=1, worker_pid=111)
+    second = _running_job(server, 'v2', attempts=2, worker_pid=222)
+    server.recover_stale_jobs()
+    assert _job(server, first)['status'] == 'queued'
+    assert _job(server, second)['status'] == 'queued'
+
+    # Uma nova reserva conta mais uma tentativa
+    job = server.claim_next_job()
+    assert job['id'] == first
+    assert _job(server, first)['attempts'] == 2
@@ -0,0 +1,88 @@
+"""/media: requisições Range, GET condicional (ETag e Last-Modified) e cabeçalhos de cache"""
+
+import os
+
+import pytest
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def media_file(server):
+    path = server.app.config['MEDIA_ROOT'] / 'videos' / 'abc' / 'original' / 'video.mp4'
+    path.parent.mkdir(parents=True)
+    path.write_bytes(CONTENT)
+    return 'videos/abc/original/video.mp4'
+
+
+def test_full_response_is_immutable(client, media_file):
+    response = client.get(f'/media/{media_file}')
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified']
+    assert response.cache_control.public and response.cache_control.immutable
+
+
+def test_range_request(client, media_file):
+    response = client.get(f'/media/{media_file}', headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+    assert response.content_length == 100
+
+
+def test_suffix_and_open_ended_ranges(client, media_file):
+    response = client.get(f'/media/{media_file}', headers={'Range': 'bytes=-10'})
+    assert response.status_code == 206
+    assert response.data == CONTENT[-10:]
+
+    response = client.get(f'/media/{media_file}', headers={'Range': f'bytes={len(CONTENT) - 5}-'})
+    assert response.data == CONTENT[-5:]
+
+
+def test_unsatisfiable_range(client, media_file):
+    response = client.get(f'/media/{media_file}', headers={'Range': f'bytes={len(CONTENT)}-'})
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+
+def test_if_none_match_and_if_modified_since(client, media_file):
+    first = client.get(f'/media/{media_file}')
+    etag = first.headers['ETag']
+
+    response = client.get(f'/media/{media_file}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    response = client.get(f'/media/{media_file}', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert response.status_code == 304
+
+    assert client.get(f'/media/{media_file}', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_if_range_with_stale_etag_returns_full_file(server, client, media_file):
+    etag = client.get(f'/media/{media_file}').headers['ETag']
+    path = server.app.config['MEDIA_ROOT'] / media_file
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    response = client.get(f'/media/{media_file}', headers={'Range': 'bytes=0-9', 'If-Range': etag})
+    assert response.status_code == 200
+    assert response.data == CONTENT
+
+
+def test_playlists_are_revalidated(server, client):
+    path = server.app.config['MEDIA_ROOT'] / 'videos' / 'abc' / 'hls' / 'index.m3u8'
+    path.parent.mkdir(parents=True)
+    path.write_text('#EXTM3U\n')
+    response = client.get('/media/videos/abc/hls/index.m3u8')
+    assert response.status_code == 200
+    assert response.cache_control.no_cache
+
+
+@pytest.mark.parametrize('filepath', ['videos/abc/missing.mp4', '../database/videos.db', 'videos/abc'])
+def test_missing_or_outside_media_root(client, media_file, filepath):
+    assert client.get(f'/media/{filepath}').status_code == 404
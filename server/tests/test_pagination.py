@@ -0,0 +1,76 @@
+"""Paginação por cursor de /api/videos e os totais de video_counts"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def videos(server):
+    """25 vídeos, do mais antigo ao mais recente, com datas repetidas para testar o desempate por id"""
+    conn = server._get_db_conn()
+    start = datetime(2024, 1, 1)
+    ids = []
+    for i in range(25):
+        video_id = f'video-{i:02d}'
+        conn.execute(
+            "INSERT INTO videos (id, original_name, original_ext, filter, created_at) VALUES (?, ?, 'mp4', ?, ?)",
+            (video_id, f'{video_id}.mp4', 'sepia' if i % 3 else 'blur', start + timedelta(minutes=i // 2))
+        )
+        ids.append(video_id)
+    # Versão extra: video-01 também aparece em ?filter=blur
+    conn.execute("INSERT INTO renditions (video_id, filter, path) VALUES ('video-01', 'blur', 'x')")
+    conn.commit()
+    conn.close()
+    # Mais recente primeiro; empates de created_at ordenados pelo id decrescente
+    return sorted(ids, key=lambda video_id: (int(video_id[-2:]) // 2, video_id), reverse=True)
+
+
+def _walk(client, **params):
+    """Percorre todas as páginas seguindo next_cursor; retorna (ids, respostas)"""
+    ids, pages, cursor = [], [], None
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        page = client.get('/api/videos', query_string=query).get_json()
+        pages.append(page)
+        ids.extend(video['id'] for video in page['videos'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids, pages
+
+
+def test_cursor_walks_every_video_once_in_order(client, videos):
+    ids, pages = _walk(client, per_page=7)
+    assert ids == videos
+    assert [page['count'] for page in pages] == [7, 7, 7, 4]
+    assert all(page['total'] == 25 for page in pages)
+
+
+def test_cursor_is_stable_when_new_videos_arrive(server, client, videos):
+    first = client.get('/api/videos', query_string={'per_page': 10}).get_json()
+    conn = server._get_db_conn()
+    conn.execute("INSERT INTO videos (id, original_name, original_ext, created_at) VALUES ('new', 'new.mp4', 'mp4', ?)",
+                 (datetime(2030, 1, 1),))
+    conn.commit()
+    conn.close()
+
+    second = client.get('/api/videos', query_string={'per_page': 10, 'cursor': first['next_cursor']}).get_json()
+    assert [video['id'] for video in second['videos']] == videos[10:20]
+    assert second['total'] == 26
+
+
+def test_filter_includes_extra_renditions(client, videos):
+    ids, pages = _walk(client, per_page=4, filter='blur')
+    expected = [video_id for video_id in videos if int(video_id[-2:]) % 3 == 0 or video_id == 'video-01']
+    assert ids == expected
+    assert pages[0]['total'] == len(expected)
+
+
+def test_offset_pagination_still_supported(client, videos):
+    page = client.get('/api/videos', query_string={'per_page': 10, 'page': 3}).get_json()
+    assert [video['id'] for video in page['videos']] == videos[20:]
+    assert page['total_pages'] == 3
+
+
+def test_invalid_cursor(client, videos):
+    assert client.get('/api/videos', query_string={'cursor': 'garbage'}).status_code == 400
@@ -0,0 +1,92 @@
+"""Upload em partes: retomada de partes faltantes, reenvio e conteúdo corrompido"""
+
+import hashlib
+
+import pytest
+
+from conftest import make_video
+
+CHUNK_SIZE = 256 * 1024  # Menor parte aceita pelo servidor
+
+
+@pytest.fixture
+def content(tmp_path):
+    """Vídeo válido com pelo menos três partes"""
+    data = make_video(tmp_path / 'sample.mp4', width=320, height=240).read_bytes()
+    assert len(data) > 2 * CHUNK_SIZE
+    return data
+
+
+def _open_session(client, content, **extra):
+    response = client.post('/api/uploads', json={
+        'filename': 'sample.mp4', 'size': len(content), 'chunk_size': CHUNK_SIZE, 'filter': 'grayscale', **extra
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def _put_chunk(client, session, content, index, data=None):
+    if data is None:
+        data = content[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+    return client.put(f"/api/uploads/{session['upload_id']}/chunks/{index}", data=data)
+
+
+def test_resume_uploads_only_missing_chunks(client, content):
+    session = _open_session(client, content, checksum=hashlib.md5(content).hexdigest())
+    total = session['total_chunks']
+    for index in range(0, total, 2):
+        assert _put_chunk(client, session, content, index).status_code == 200
+
+    # Retomada: o cliente pergunta o que falta e envia só essas partes
+    state = client.get(f"/api/uploads/{session['upload_id']}").get_json()
+    assert state['complete'] is False
+    assert state['missing_chunks'] == list(range(1, total, 2))
+    assert client.post(f"/api/uploads/{session['upload_id']}/complete").status_code == 409
+
+    for index in state['missing_chunks']:
+        assert _put_chunk(client, session, content, index).status_code == 200
+    assert client.get(f"/api/uploads/{session['upload_id']}").get_json()['complete'] is True
+
+    response = client.post(f"/api/uploads/{session['upload_id']}/complete")
+    assert response.status_code == 202
+    assert response.get_json()['job_id']
+    # A sessão termina na finalização
+    assert client.post(f"/api/uploads/{session['upload_id']}/complete").status_code == 404
+
+
+def test_short_chunk_stays_missing(client, content):
+    session = _open_session(client, content)
+    assert _put_chunk(client, session, content, 0).status_code == 200
+
+    # Um reenvio que chega incompleto desfaz o registro da parte
+    response = _put_chunk(client, session, content, 0, data=content[:1000])
+    assert response.status_code == 400
+    state = client.get(f"/api/uploads/{session['upload_id']}").get_json()
+    assert 0 in state['missing_chunks']
+
+
+def test_checksum_mismatch_requires_reupload(client, content):
+    session = _open_session(client, content, checksum=hashlib.md5(content).hexdigest())
+    corrupted = bytearray(content)
+    corrupted[CHUNK_SIZE + 10] ^= 0xFF
+    for index in range(session['total_chunks']):
+        assert _put_chunk(client, session, bytes(corrupted), index).status_code == 200
+
+    response = client.post(f"/api/uploads/{session['upload_id']}/complete")
+    assert response.status_code == 422
+    state = client.get(f"/api/uploads/{session['upload_id']}").get_json()
+    assert state['missing_chunks'] == list(range(session['total_chunks']))
+
+    for index in range(session['total_chunks']):
+        assert _put_chunk(client, session, content, index).status_code == 200
+    assert client.post(f"/api/uploads/{session['upload_id']}/complete").status_code == 202
+
+
+@pytest.mark.parametrize('body', [
+    ['sample.mp4'],
+    {'filename': 'sample.mp4', 'size': 10, 'checksum': 'not-md5'},
+    {'filename': 'sample.mp4', 'size': 10, 'filters': [1]},
+    {'filename': 5, 'size': 10},
+])
+def test_invalid_session_body(client, body):
+    assert client.post('/api/uploads', json=body).status_code == 400
@@ -0,0 +1,44 @@
+"""/api/video/<id>: cache de leitura, ETag/304 e invalidação por escritas de qualquer processo"""
+
+import pytest
+
+from conftest import upload
+
+
+@pytest.fixture
+def video_id(server, client, video_file):
+    accepted = upload(client, video_file, 'grayscale')
+    assert server.process_next_job()
+    return accepted['video_id']
+
+
+def test_etag_and_not_modified(server, client, video_id):
+    first = client.get(f'/api/video/{video_id}')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.cache_control.no_cache
+
+    response = client.get(f'/api/video/{video_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert server.video_cache.stats()['hits'] >= 1
+
+
+def test_write_changes_etag(server, client, video_id):
+    etag = client.get(f'/api/video/{video_id}').headers['ETag']
+
+    # Escrita direta no banco, como a de um worker ou da manutenção em outro processo
+    conn = server._get_db_conn()
+    conn.execute('UPDATE renditions SET size_bytes = size_bytes + 1 WHERE video_id = ?', (video_id,))
+    conn.commit()
+    conn.close()
+
+    response = client.get(f'/api/video/{video_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_deleted_video_is_not_served_from_cache(client, video_id):
+    assert client.get(f'/api/video/{video_id}').status_code == 200
+    assert client.delete(f'/api/video/{video_id}').status_code == 200
+    assert client.get(f'/api/video/{video_id}').status_code == 404